@@ -29,6 +29,12 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(reuseab
     return user
 
 
+def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.email.lower() not in settings.admin_emails:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return current_user
+
+
 def authenticate_user(db: Session, email: str, password: str) -> User | None:
     user = db.query(User).filter(User.email == email).first()
     if not user:
@@ -1,3 +1,3 @@
-from . import auth, discounts, plans, purchases, surveys, users
+from . import admin, auth, discounts, plans, purchases, surveys, users
 
-__all__ = ["auth", "plans", "users", "purchases", "discounts", "surveys"]
+__all__ = ["admin", "auth", "plans", "users", "purchases", "discounts", "surveys"]
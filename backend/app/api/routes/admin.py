@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.api.deps import get_current_admin
+from app.models.user import User
+from app.schemas.memory import (
+    AllocationStat,
+    MemoryDiffReport,
+    MemorySnapshotCreate,
+    MemorySnapshotInfo,
+    MemorySnapshotReport,
+    MemoryStatus,
+    MemoryTracingStart,
+)
+from app.services.memory import MemoryTracingError, memory_tracer
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+GroupByQuery = Literal["lineno", "filename", "traceback"]
+
+
+@router.get("/memory", response_model=MemoryStatus)
+def read_memory_status(_: User = Depends(get_current_admin)) -> MemoryStatus:
+    return MemoryStatus.model_validate(memory_tracer.status())
+
+
+@router.post("/memory/tracing", response_model=MemoryStatus)
+def start_memory_tracing(payload: MemoryTracingStart, _: User = Depends(get_current_admin)) -> MemoryStatus:
+    memory_tracer.start(payload.frames)
+    return MemoryStatus.model_validate(memory_tracer.status())
+
+
+@router.delete("/memory/tracing", response_model=MemoryStatus)
+def stop_memory_tracing(_: User = Depends(get_current_admin)) -> MemoryStatus:
+    memory_tracer.stop()
+    return MemoryStatus.model_validate(memory_tracer.status())
+
+
+@router.post("/memory/snapshots", response_model=MemorySnapshotReport, status_code=status.HTTP_201_CREATED)
+def take_memory_snapshot(
+    payload: MemorySnapshotCreate,
+    group_by: GroupByQuery = Query(default="lineno"),
+    limit: int = Query(default=20, ge=1, le=200),
+    _: User = Depends(get_current_admin),
+) -> MemorySnapshotReport:
+    try:
+        info = memory_tracer.take_snapshot(payload.label)
+        top = memory_tracer.top(info.id, group_by, limit)
+    except MemoryTracingError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    return MemorySnapshotReport(
+        pid=os.getpid(),
+        snapshot=MemorySnapshotInfo.model_validate(info),
+        top=[AllocationStat.model_validate(stat) for stat in top],
+    )
+
+
+@router.get("/memory/snapshots/{second_id}/diff", response_model=MemoryDiffReport)
+def diff_memory_snapshots(
+    second_id: int,
+    against: int = Query(..., description="Ankstesnės momentinės kopijos ID."),
+    group_by: GroupByQuery = Query(default="lineno"),
+    limit: int = Query(default=30, ge=1, le=500),
+    _: User = Depends(get_current_admin),
+) -> MemoryDiffReport:
+    try:
+        stats = memory_tracer.diff(against, second_id, group_by, limit)
+    except MemoryTracingError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    return MemoryDiffReport(
+        pid=os.getpid(),
+        first_id=against,
+        second_id=second_id,
+        group_by=group_by,
+        stats=[AllocationStat.model_validate(stat) for stat in stats],
+    )
@@ -12,11 +12,13 @@ from app.db.session import get_db
 from app.models.user import User
 from app.schemas.auth import LoginRequest, LoginResponse
 from app.schemas.user import UserCreate, UserRead
+from app.services.query_budget import query_budget
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+@query_budget(4)
 def register_user(user_in: UserCreate, db: Session = Depends(get_db)) -> User:
     email = user_in.email.lower()
     existing = db.query(User).filter(User.email == email).first()
@@ -53,6 +55,7 @@ def register_user(user_in: UserCreate, db: Session = Depends(get_db)) -> User:
 
 
 @router.post("/login", response_model=LoginResponse)
+@query_budget(2)
 def login(login_in: LoginRequest, db: Session = Depends(get_db)) -> LoginResponse:
     user = authenticate_user(db, login_in.email.lower(), login_in.password)
     if not user:
@@ -8,11 +8,13 @@ from app.api.deps import get_current_user
 from app.core.config import settings
 from app.models.user import User
 from app.schemas.discount import DiscountCode
+from app.services.query_budget import query_budget
 
 router = APIRouter(prefix="/discounts", tags=["discounts"])
 
 
 @router.get("/codes", response_model=List[DiscountCode])
+@query_budget(2)
 def list_discount_codes(current_user: User = Depends(get_current_user)) -> List[DiscountCode]:
     """Return all manually configured discount codes (excluding birthday)."""
     return [
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import RedirectResponse
+
+from app.services.media_serving import presigned_redirect
+from app.services.media_store import media_store
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+@router.get("/{key:path}")
+def redirect_to_media(key: str) -> RedirectResponse:
+    """Object storage counterpart of the local ``/media`` mount: redirect to a short-lived signed URL."""
+    presigned_url = media_store.presigned_url(key)
+    if not presigned_url:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return presigned_redirect(presigned_url)
@@ -1,53 +1,110 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session, selectinload
 
 from app.api.deps import get_current_user
+from app.core.allergens import deserialize_allergens, normalize_allergen_list, serialize_allergens
 from app.db.session import get_db
 from app.models.nutrition_plan import NutritionPlan
+from app.models.plan_meal import PlanMeal
 from app.models.user import User
 from app.schemas.plan import (
+    CatalogSearchResult,
     CustomPlanCreate,
+    MealSwapCandidate,
+    MealSwapRequest,
     NutritionPlanDetail,
     NutritionPlanSummary,
+    PlanMealRead,
     PlanSelectionRequest,
     RecommendedPlanDetail,
+    WeekAssemblyRequest,
 )
 from app.schemas.purchase import PlanCheckoutRequest, PlanCheckoutResponse
+from app.schemas.user import GoalLiteral
+from app.services.meal_index import SwapNotAllowedError, ensure_swap_allowed, find_swap_candidates
 from app.services.payments import PaymentError, process_checkout
+from app.services.plan_catalog import (
+    InvalidCursorError,
+    PlanCatalogFilters,
+    list_catalog_page,
+    refresh_plan_catalog_fields,
+)
 from app.services.plan_recommendation import (
     attach_macro_totals,
     create_custom_plan,
     get_recommended_plan,
 )
+from app.services.query_budget import query_budget
+from app.services.search import search_catalog
+from app.services.week_assembler import WeekAssemblyError, generate_custom_plan
 
 router = APIRouter(prefix="/plans", tags=["plans"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 50
+PlanSortLiteral = Literal["name", "calories", "-calories", "protein", "-protein", "price", "-price"]
+
 
 @router.get("", response_model=List[NutritionPlanSummary])
+@query_budget(5)
 def list_plans(
+    response: Response,
+    goal_type: Optional[GoalLiteral] = None,
+    is_custom: Optional[bool] = None,
+    min_calories: Optional[int] = Query(default=None, ge=0, description="Mažiausios dienos kalorijos."),
+    max_calories: Optional[int] = Query(default=None, ge=0, description="Didžiausios dienos kalorijos."),
+    min_protein: Optional[int] = Query(default=None, ge=0),
+    max_protein: Optional[int] = Query(default=None, ge=0),
+    min_carbs: Optional[int] = Query(default=None, ge=0),
+    max_carbs: Optional[int] = Query(default=None, ge=0),
+    min_fats: Optional[int] = Query(default=None, ge=0),
+    max_fats: Optional[int] = Query(default=None, ge=0),
+    min_price: Optional[float] = Query(default=None, ge=0, description="Mažiausia dienos kaina (EUR)."),
+    max_price: Optional[float] = Query(default=None, ge=0, description="Didžiausia dienos kaina (EUR)."),
+    exclude_allergens: List[str] = Query(default_factory=list),
+    sort: PlanSortLiteral = "name",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(
+        default=None, ge=1, le=200, description="Puslapio dydis; be jo ir be cursor grąžinami visi planai."
+    ),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> List[NutritionPlan]:
-    plans = (
-        db.query(NutritionPlan)
-        .options(
-            selectinload(NutritionPlan.meals),
-            selectinload(NutritionPlan.pricing_entries),
-        )
-        .filter((NutritionPlan.owner_id.is_(None)) | (NutritionPlan.owner_id == current_user.id))
-        .order_by(NutritionPlan.is_custom.asc(), NutritionPlan.name.asc())
-        .all()
+    filters = PlanCatalogFilters(
+        goal_type=goal_type,
+        is_custom=is_custom,
+        min_calories=min_calories,
+        max_calories=max_calories,
+        min_protein=min_protein,
+        max_protein=max_protein,
+        min_carbs=min_carbs,
+        max_carbs=max_carbs,
+        min_fats=min_fats,
+        max_fats=max_fats,
+        min_price_cents=round(min_price * 100) if min_price is not None else None,
+        max_price_cents=round(max_price * 100) if max_price is not None else None,
+        exclude_allergens=normalize_allergen_list(exclude_allergens),
     )
+    if cursor and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    try:
+        plans, next_cursor = list_catalog_page(db, current_user, filters, sort=sort, cursor=cursor, limit=limit)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     for plan in plans:
         attach_macro_totals(plan)
     return plans
 
 
 @router.get("/recommended", response_model=RecommendedPlanDetail)
+@query_budget(5)
 def recommended_plan(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -64,6 +121,17 @@ def recommended_plan(
     return plan
 
 
+@router.get("/search", response_model=List[CatalogSearchResult])
+@query_budget(3)
+def search_plans(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> List[CatalogSearchResult]:
+    return [CatalogSearchResult.model_validate(hit) for hit in search_catalog(db, current_user.id, q, limit)]
+
+
 @router.post("/custom", response_model=NutritionPlanDetail, status_code=status.HTTP_201_CREATED)
 def create_custom(
     payload: CustomPlanCreate,
@@ -75,7 +143,22 @@ def create_custom(
     return plan
 
 
+@router.post("/custom/generate", response_model=NutritionPlanDetail, status_code=status.HTTP_201_CREATED)
+def generate_custom(
+    payload: WeekAssemblyRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> NutritionPlan:
+    try:
+        plan = generate_custom_plan(db, current_user, payload)
+    except WeekAssemblyError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    attach_macro_totals(plan)
+    return plan
+
+
 @router.post("/select", response_model=NutritionPlanSummary)
+@query_budget(10)
 def select_plan(
     payload: PlanSelectionRequest,
     current_user: User = Depends(get_current_user),
@@ -106,6 +189,7 @@ def select_plan(
 
 
 @router.post("/{plan_id}/checkout", response_model=PlanCheckoutResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(18)
 def checkout_plan(
     plan_id: int,
     payload: PlanCheckoutRequest,
@@ -148,7 +232,97 @@ def checkout_plan(
     )
 
 
+def _fetch_plan_meal_or_404(db: Session, user: User, plan_id: int, meal_id: int) -> PlanMeal:
+    meal = (
+        db.query(PlanMeal)
+        .filter(PlanMeal.id == meal_id, PlanMeal.plan_id == plan_id)
+        .first()
+    )
+    if not meal:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meal not found")
+
+    if meal.plan.owner_id not in (None, user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Plan is not available to this user")
+    return meal
+
+
+@router.get("/{plan_id}/meals/{meal_id}/swap-candidates", response_model=List[MealSwapCandidate])
+def meal_swap_candidates(
+    plan_id: int,
+    meal_id: int,
+    limit: int = Query(default=5, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> List[MealSwapCandidate]:
+    meal = _fetch_plan_meal_or_404(db, current_user, plan_id, meal_id)
+    candidates = find_swap_candidates(
+        db,
+        current_user,
+        meal_type=meal.meal_type,
+        title=meal.title,
+        calories=meal.calories,
+        protein_grams=meal.protein_grams,
+        carbs_grams=meal.carbs_grams,
+        fats_grams=meal.fats_grams,
+        exclude_ids=[meal.id],
+        limit=limit,
+    )
+    return [
+        MealSwapCandidate(
+            **PlanMealRead.model_validate(candidate).model_dump(),
+            plan_id=candidate.plan_id,
+            distance=round(distance, 4),
+        )
+        for candidate, distance in candidates
+    ]
+
+
+@router.post("/{plan_id}/meals/{meal_id}/swap", response_model=NutritionPlanDetail)
+def swap_plan_meal(
+    plan_id: int,
+    meal_id: int,
+    payload: MealSwapRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> NutritionPlan:
+    meal = _fetch_plan_meal_or_404(db, current_user, plan_id, meal_id)
+    plan = meal.plan
+    if not plan.is_custom or plan.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only your custom plans can be edited")
+
+    replacement = db.get(PlanMeal, payload.replacement_meal_id)
+    if not replacement or replacement.plan.owner_id not in (None, current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Replacement meal not found")
+    try:
+        ensure_swap_allowed(current_user, meal.meal_type, replacement)
+    except SwapNotAllowedError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    meal.title = replacement.title
+    meal.description = replacement.description
+    meal.calories = replacement.calories
+    meal.protein_grams = replacement.protein_grams
+    meal.carbs_grams = replacement.carbs_grams
+    meal.fats_grams = replacement.fats_grams
+    meal.allergens = replacement.allergens
+    db.add(meal)
+
+    plan.allergens = serialize_allergens(
+        normalize_allergen_list(
+            allergen for plan_meal in plan.meals for allergen in deserialize_allergens(plan_meal.allergens)
+        )
+    )
+    refresh_plan_catalog_fields(plan)
+    db.add(plan)
+    db.commit()
+    db.refresh(plan)
+
+    attach_macro_totals(plan)
+    return plan
+
+
 @router.get("/{plan_id}", response_model=NutritionPlanDetail)
+@query_budget(5)
 def plan_detail(
     plan_id: int,
     current_user: User = Depends(get_current_user),
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
-from pathlib import Path
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
 from sqlalchemy.orm import Session, selectinload
 
 from app.api.deps import get_current_user
+from app.core.config import settings
 from app.db.session import get_db
-from app.models.plan_purchase import PlanPurchase
+from app.models.plan_meal import PlanMeal
+from app.models.plan_purchase import PlanPurchase, PlanPurchaseItem
 from app.models.user import User
+from app.schemas.plan import MealSwapCandidate, MealSwapRequest, PlanMealRead
 from app.schemas.purchase import PurchaseDetail, PurchaseMealSnapshot, PurchaseSummary
+from app.services.media_serving import PRIVATE_IMMUTABLE_CACHE_CONTROL, media_file_response, presigned_redirect
+from app.services.media_store import media_store
+from app.services.meal_index import SwapNotAllowedError, ensure_swap_allowed, find_swap_candidates
+from app.services.pdf_export import render_purchase_pdf
+from app.services.query_budget import query_budget
 from app.services.surveys import activate_final_survey
 
 router = APIRouter(prefix="/purchases", tags=["purchases"])
@@ -44,6 +51,7 @@ def _to_summary(purchase: PlanPurchase) -> PurchaseSummary:
 
 
 @router.get("", response_model=List[PurchaseSummary])
+@query_budget(3)
 def list_purchases(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -70,13 +78,7 @@ def _fetch_purchase_or_404(db: Session, user_id: str, purchase_id: int) -> PlanP
     return purchase
 
 
-@router.get("/{purchase_id}", response_model=PurchaseDetail)
-def purchase_detail(
-    purchase_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> PurchaseDetail:
-    purchase = _fetch_purchase_or_404(db, current_user.id, purchase_id)
+def _to_detail(purchase: PlanPurchase) -> PurchaseDetail:
     items = [
         PurchaseMealSnapshot.model_validate(item, from_attributes=True)
         for item in sorted(purchase.items, key=lambda i: (i.day_of_week, i.meal_type, i.id))
@@ -97,24 +99,141 @@ def purchase_detail(
     )
 
 
+@router.get("/{purchase_id}", response_model=PurchaseDetail)
+@query_budget(4)
+def purchase_detail(
+    purchase_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> PurchaseDetail:
+    purchase = _fetch_purchase_or_404(db, current_user.id, purchase_id)
+    return _to_detail(purchase)
+
+
+def _fetch_purchase_item_or_404(purchase: PlanPurchase, item_id: int) -> PlanPurchaseItem:
+    item = next((entry for entry in purchase.items if entry.id == item_id), None)
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Purchase item not found")
+    return item
+
+
+@router.get("/{purchase_id}/items/{item_id}/swap-candidates", response_model=List[MealSwapCandidate])
+def purchase_item_swap_candidates(
+    purchase_id: int,
+    item_id: int,
+    limit: int = Query(default=5, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> List[MealSwapCandidate]:
+    purchase = _fetch_purchase_or_404(db, current_user.id, purchase_id)
+    item = _fetch_purchase_item_or_404(purchase, item_id)
+    candidates = find_swap_candidates(
+        db,
+        current_user,
+        meal_type=item.meal_type,
+        title=item.meal_title,
+        calories=item.calories,
+        protein_grams=item.protein_grams,
+        carbs_grams=item.carbs_grams,
+        fats_grams=item.fats_grams,
+        limit=limit,
+    )
+    return [
+        MealSwapCandidate(
+            **PlanMealRead.model_validate(candidate).model_dump(),
+            plan_id=candidate.plan_id,
+            distance=round(distance, 4),
+        )
+        for candidate, distance in candidates
+    ]
+
+
+@router.post("/{purchase_id}/items/{item_id}/swap", response_model=PurchaseDetail)
+def swap_purchase_item(
+    purchase_id: int,
+    item_id: int,
+    payload: MealSwapRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> PurchaseDetail:
+    purchase = _fetch_purchase_or_404(db, current_user.id, purchase_id)
+    if purchase.status == "canceled":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Purchase already canceled")
+    item = _fetch_purchase_item_or_404(purchase, item_id)
+
+    replacement = db.get(PlanMeal, payload.replacement_meal_id)
+    if not replacement or replacement.plan.owner_id not in (None, current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Replacement meal not found")
+    try:
+        ensure_swap_allowed(current_user, item.meal_type, replacement)
+    except SwapNotAllowedError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    item.meal_title = replacement.title
+    item.meal_description = replacement.description
+    item.calories = replacement.calories
+    item.protein_grams = replacement.protein_grams
+    item.carbs_grams = replacement.carbs_grams
+    item.fats_grams = replacement.fats_grams
+    db.add(item)
+
+    # receipts are served as immutable content, so the swapped meal needs a new file
+    if purchase.pdf_path:
+        db.flush()
+        items = (
+            db.query(PlanPurchaseItem)
+            .filter(PlanPurchaseItem.purchase_id == purchase.id)
+            .order_by(PlanPurchaseItem.id.asc())
+            .all()
+        )
+        previous_pdf_path = purchase.pdf_path
+        purchase.pdf_path = render_purchase_pdf(db, purchase, items)
+        media_store.release(db, previous_pdf_path)
+
+    db.commit()
+    db.refresh(purchase)
+
+    return _to_detail(purchase)
+
+
 @router.get("/{purchase_id}/receipt")
+@query_budget(4)
 def download_receipt(
     purchase_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> FileResponse:
+) -> Response:
     purchase = _fetch_purchase_or_404(db, current_user.id, purchase_id)
     if purchase.status != "paid" or not purchase.pdf_path:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Receipt not available yet")
 
-    return FileResponse(
-        path=f"media/{purchase.pdf_path}",
-        filename=f"FitBite_planas_{purchase.plan_name_snapshot}_{purchase.id}.pdf",
-        media_type="application/pdf",
-    )
+    filename = f"FitBite_planas_{purchase.plan_name_snapshot}_{purchase.id}.pdf"
+    # object storage: the client downloads straight from the bucket
+    presigned_url = media_store.presigned_url(purchase.pdf_path, filename=filename, content_type="application/pdf")
+    if presigned_url:
+        return presigned_redirect(presigned_url)
+
+    path = media_store.local_path(purchase.pdf_path)
+    try:
+        if path is None:
+            raise FileNotFoundError(purchase.pdf_path)
+        return media_file_response(
+            request,
+            path,
+            purchase.pdf_path,
+            cache_control=PRIVATE_IMMUTABLE_CACHE_CONTROL,
+            media_type="application/pdf",
+            filename=filename,
+            offload=settings.media_offload,
+            accel_redirect_prefix=settings.media_accel_redirect_prefix,
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Receipt not available yet")
 
 
 @router.post("/{purchase_id}/cancel", response_model=PurchaseSummary)
+@query_budget(12)
 def cancel_purchase(
     purchase_id: int,
     current_user: User = Depends(get_current_user),
@@ -124,11 +243,9 @@ def cancel_purchase(
     if purchase.status == "canceled":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Purchase already canceled")
 
-    # remove stored PDF if exists
+    # drop the receipt reference; the media GC removes the file
     if purchase.pdf_path:
-        pdf_full_path = Path("media") / purchase.pdf_path
-        if pdf_full_path.exists():
-            pdf_full_path.unlink(missing_ok=True)
+        media_store.release(db, purchase.pdf_path)
         purchase.pdf_path = None
 
     purchase.status = "canceled"
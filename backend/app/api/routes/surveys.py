@@ -1,20 +1,34 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
-from app.db.session import get_db
+from app.api.deps import get_current_admin, get_current_user
+from app.db.session import SessionLocal, get_db
 from app.models.plan_progress_survey import PlanProgressSurvey
 from app.models.plan_progress_survey_response import PlanProgressSurveyResponse
 from app.models.user import User
-from app.schemas.survey import SurveyDetail, SurveyQuestion, SurveySubmitRequest, SurveySubmitResponse
+from app.schemas.survey import (
+    PlanSurveyAnalytics,
+    SurveyDetail,
+    SurveyQuestionAnalytics,
+    SurveySegmentMember,
+    SurveySubmitRequest,
+    SurveySubmitResponse,
+)
+from app.services.query_budget import query_budget
+from app.services.survey_analytics import plan_survey_rollups
+from app.services.survey_answers import find_segment
+from app.services.survey_export import SurveyExportFilters, iter_export_chunks, stream_csv, stream_ndjson
+from app.services.survey_registry import SurveyValidationError, survey_registry
 from app.services.surveys import (
     SCHEDULED_STATUS,
     activate_final_survey,
-    get_questions_for_type,
     record_survey_response,
 )
 
@@ -32,7 +46,80 @@ def _fetch_survey_or_404(db: Session, survey_id: int, user_id: str) -> PlanProgr
     return survey
 
 
+@router.get("/analytics/plans/{plan_id}", response_model=PlanSurveyAnalytics)
+def read_plan_survey_analytics(
+    plan_id: int,
+    survey_type: Optional[Literal["progress", "final"]] = Query(default=None),
+    _: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+) -> PlanSurveyAnalytics:
+    rollups = plan_survey_rollups(db, plan_id, survey_type)
+    return PlanSurveyAnalytics(
+        plan_id=plan_id,
+        questions=[SurveyQuestionAnalytics.model_validate(rollup) for rollup in rollups],
+    )
+
+
+@router.get("/analytics/segments", response_model=list[SurveySegmentMember])
+def read_survey_segment(
+    question_id: str = Query(..., min_length=1),
+    min_scale: Optional[int] = Query(default=None),
+    max_scale: Optional[int] = Query(default=None),
+    choice: Optional[str] = Query(default=None),
+    plan_id: Optional[int] = Query(default=None),
+    survey_type: Optional[Literal["progress", "final"]] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+    _: User = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+) -> list[SurveySegmentMember]:
+    members = find_segment(
+        db,
+        question_id,
+        min_scale=min_scale,
+        max_scale=max_scale,
+        choice=choice,
+        plan_id=plan_id,
+        survey_type=survey_type,
+        limit=limit,
+    )
+    return [SurveySegmentMember.model_validate(member) for member in members]
+
+
+@router.get("/export")
+def export_survey_responses(
+    export_format: Literal["csv", "ndjson"] = Query(default="csv", alias="format"),
+    plan_id: Optional[int] = Query(default=None),
+    survey_type: Optional[Literal["progress", "final"]] = Query(default=None),
+    submitted_from: Optional[date] = Query(default=None),
+    submitted_to: Optional[date] = Query(default=None),
+    _: User = Depends(get_current_admin),
+) -> StreamingResponse:
+    if submitted_from and submitted_to and submitted_from > submitted_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Netinkamas datų intervalas")
+
+    chunks = iter_export_chunks(
+        SessionLocal,
+        SurveyExportFilters(
+            plan_id=plan_id,
+            survey_type=survey_type,
+            submitted_from=submitted_from,
+            submitted_to=submitted_to,
+        ),
+    )
+    if export_format == "csv":
+        body, media_type = stream_csv(chunks), "text/csv; charset=utf-8"
+    else:
+        body, media_type = stream_ndjson(chunks), "application/x-ndjson"
+    filename = f"survey-responses-{datetime.utcnow():%Y%m%d%H%M%S}.{export_format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/{survey_id}", response_model=SurveyDetail)
+@query_budget(4)
 def read_survey(
     survey_id: int,
     current_user: User = Depends(get_current_user),
@@ -60,8 +147,9 @@ def read_survey(
         db.commit()
         db.refresh(survey)
 
-    questions_data = get_questions_for_type(survey.survey_type)
-    questions = [SurveyQuestion.model_validate(q) for q in questions_data]
+    # completed surveys render the definition they were answered against
+    answered_version = survey.responses[0].definition_version if survey.responses else None
+    compiled = survey_registry.get(survey.survey_type, answered_version)
     can_submit = survey.status == SCHEDULED_STATUS
 
     return SurveyDetail(
@@ -70,66 +158,24 @@ def read_survey(
         status=survey.status,
         plan_name=survey.plan_name_snapshot,
         day_offset=survey.day_offset,
+        definition_version=compiled.version,
         scheduled_at=survey.scheduled_at,
-        questions=questions,
+        questions=list(compiled.questions),
         can_submit=can_submit,
     )
 
 
-def _validate_answers(survey: PlanProgressSurvey, payload: SurveySubmitRequest) -> dict:
-    question_map = {q["id"]: q for q in get_questions_for_type(survey.survey_type)}
-    answers_dict: dict[str, object] = {}
-    provided = {answer.question_id for answer in payload.answers}
-
-    missing = [qid for qid in question_map.keys() if qid not in provided]
-    if missing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Trūksta atsakymų klausimams: {', '.join(missing)}",
-        )
-
-    for answer in payload.answers:
-        question = question_map.get(answer.question_id)
-        if not question:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nežinomas klausimo ID")
-
-        value = answer.value
-        q_type = question["type"]
-
-        if q_type == "scale":
-            try:
-                value = int(value)  # type: ignore[arg-type]
-            except (TypeError, ValueError):
-                raise HTTPException(status_code=400, detail="Skalės klausimams reikia skaitinės reikšmės")
-            min_val = question.get("scale_min", 1)
-            max_val = question.get("scale_max", 5)
-            if value < min_val or value > max_val:
-                raise HTTPException(status_code=400, detail="Skalės reikšmė už ribų")
-        elif q_type == "single_choice":
-            if not isinstance(value, str):
-                raise HTTPException(status_code=400, detail="Pasirinkite vieną iš pasiūlytų variantų")
-            if value not in question.get("options", []):
-                raise HTTPException(status_code=400, detail="Pasirinktas variantas neleistinas")
-        elif q_type == "multi_choice":
-            if not isinstance(value, list) or len(value) == 0:
-                raise HTTPException(status_code=400, detail="Pasirinkite bent vieną variantą")
-            invalid = [item for item in value if item not in question.get("options", [])]
-            if invalid:
-                raise HTTPException(status_code=400, detail="Pasirinktas variantas neleistinas")
-        elif q_type == "text":
-            if value is None:
-                value = ""
-            if not isinstance(value, str):
-                raise HTTPException(status_code=400, detail="Komentarai turi būti tekstiniai")
-        else:
-            raise HTTPException(status_code=400, detail="Nežinomas klausimo tipas")
-
-        answers_dict[answer.question_id] = value
-
-    return answers_dict
+def _validate_answers(survey: PlanProgressSurvey, payload: SurveySubmitRequest) -> tuple[int, dict]:
+    compiled = survey_registry.get(survey.survey_type)
+    try:
+        answers = compiled.validate((answer.question_id, answer.value) for answer in payload.answers)
+    except SurveyValidationError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return compiled.version, answers
 
 
 @router.post("/{survey_id}/responses", response_model=SurveySubmitResponse)
+@query_budget(15)
 def submit_survey(
     survey_id: int,
     payload: SurveySubmitRequest,
@@ -151,9 +197,9 @@ def submit_survey(
     if existing_response:
         raise HTTPException(status_code=400, detail="Apklausa jau užpildyta")
 
-    answers = _validate_answers(survey, payload)
+    definition_version, answers = _validate_answers(survey, payload)
 
-    response = record_survey_response(db, survey, current_user.id, answers)
+    response = record_survey_response(db, survey, current_user.id, answers, definition_version)
     db.commit()
     db.refresh(response)
 
@@ -1,15 +1,15 @@
 from __future__ import annotations
 
-import shutil
 from datetime import datetime, timedelta
 import math
-from pathlib import Path
-from typing import Annotated
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, selectinload
 
 from app.api.deps import get_current_user
+from app.core.config import settings
 from app.db.session import get_db
 from app.core.allergens import serialize_allergens
 from app.models.user import User
@@ -24,20 +24,25 @@ from app.schemas.user import (
     UserRead,
     UserUpdate,
 )
+from app.services.avatars import (
+    AVATAR_INCOMING_DIR,
+    AVATAR_PROCESSING,
+    new_avatar_version,
+    schedule_avatar_processing,
+)
+from app.services.query_budget import query_budget
+from app.services.survey_registry import survey_registry
+from app.services.uploads import UploadError, UploadTooLargeError, receive_image_upload
 from app.services.surveys import (
     CANCELLED_STATUS,
     SCHEDULED_STATUS,
-    get_questions_for_type,
     schedule_surveys_for_purchase,
 )
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-MEDIA_ROOT = Path(__file__).resolve().parents[3] / "media" / "profile_pictures"
-MEDIA_ROOT.mkdir(parents=True, exist_ok=True)
-
-
 @router.get("/me", response_model=UserProfile)
+@query_budget(14)
 def read_me(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -59,6 +64,7 @@ def read_me(
 
 
 @router.put("/me", response_model=UserRead)
+@query_budget(4)
 def update_me(
     payload: UserUpdate,
     current_user: User = Depends(get_current_user),
@@ -177,12 +183,17 @@ def _resolve_plan_surveys(
         .all()
     )
     if not surveys and purchase.period_days > 0:
+        purchase_id = purchase.id
         schedule_surveys_for_purchase(db, purchase)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # a concurrent request scheduled the same purchase first; its rows are just as good
+            db.rollback()
         surveys = (
             db.query(PlanProgressSurvey)
             .options(selectinload(PlanProgressSurvey.responses))
-            .filter(PlanProgressSurvey.plan_purchase_id == purchase.id)
+            .filter(PlanProgressSurvey.plan_purchase_id == purchase_id)
             .order_by(PlanProgressSurvey.day_offset.asc())
             .all()
         )
@@ -218,7 +229,6 @@ def _resolve_plan_surveys(
 
     upcoming_results: list[PlanProgressSurveyRead] = []
     completed_results: list[PlanProgressSurveyHistory] = []
-    question_cache: dict[str, dict[str, object]] = {}
 
     for survey in surveys:
         responses = sorted(survey.responses, key=lambda resp: resp.submitted_at) if survey.responses else []
@@ -229,16 +239,10 @@ def _resolve_plan_surveys(
         payload.response_submitted = has_response or survey.status == "completed"
 
         if payload.response_submitted and response:
-            cache_key = survey.survey_type
-            if cache_key not in question_cache:
-                question_cache[cache_key] = {
-                    q["id"]: q for q in get_questions_for_type(survey.survey_type)
-                }
-            question_map = question_cache[cache_key]
+            compiled = survey_registry.get(survey.survey_type, response.definition_version)
             answers: list[SurveyAnswerSummary] = []
             for qid, value in response.answers.items():
-                question = question_map.get(qid, {})
-                prompt = question.get("prompt", qid)
+                prompt = compiled.prompt_for(qid)
                 if isinstance(value, list):
                     answer_value = [str(item) for item in value]
                 else:
@@ -285,30 +289,63 @@ def _resolve_plan_surveys(
     return upcoming_results, completed_results
 
 
-@router.post("/me/avatar", response_model=UserRead)
-def upload_avatar(
+def _mark_avatar_processing(db: Session, user: User, version: str) -> User:
+    user.avatar_version = version
+    user.avatar_status = AVATAR_PROCESSING
+    user.avatar_requested_at = datetime.utcnow()
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@router.post(
+    "/me/avatar",
+    response_model=UserRead,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {
+                            "file": {
+                                "type": "string",
+                                "format": "binary",
+                                "description": "Profile image (PNG or JPEG)",
+                            }
+                        },
+                    }
+                }
+            },
+        }
+    },
+)
+async def upload_avatar(
     request: Request,
-    file: Annotated[UploadFile, File(..., description="Profile image (PNG or JPEG)")],
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> User:
-    if file.content_type not in {"image/png", "image/jpeg"}:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only PNG and JPEG images are allowed")
-
-    extension = ".png" if file.content_type == "image/png" else ".jpg"
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    filename = f"{current_user.id}_{timestamp}{extension}"
-    destination = MEDIA_ROOT / filename
-
-    with destination.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    relative_path = f"/media/profile_pictures/{filename}"
-    base_url = str(request.base_url).rstrip("/")
-    current_user.avatar_url = f"{base_url}{relative_path}"
-
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    version = new_avatar_version()
+    upload_path = AVATAR_INCOMING_DIR / f"{current_user.id}_{version}"
+    try:
+        await receive_image_upload(
+            request,
+            field_name="file",
+            destination=upload_path,
+            max_bytes=settings.avatar_max_upload_bytes,
+        )
+    except UploadTooLargeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image is larger than {settings.avatar_max_upload_bytes // (1024 * 1024)} MB",
+        ) from exc
+    except UploadError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    current_user = await run_in_threadpool(_mark_avatar_processing, db, current_user, version)
+    schedule_avatar_processing(current_user.id, upload_path, version, str(request.base_url).rstrip("/"))
 
     return current_user
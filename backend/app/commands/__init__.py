@@ -0,0 +1 @@
+"""Management commands, run from ``backend/`` as ``python -m app.commands.<name>``."""
@@ -0,0 +1,149 @@
+"""Drive the main API flows against a throwaway database and fail on routes over their query budget.
+
+Usage (from ``backend/``)::
+
+    python -m app.commands.check_query_budgets
+    python -m app.commands.check_query_budgets --purchases 10 --verbose
+
+Budgets are declared next to the routes with ``@query_budget(n)``. The check registers a user,
+buys ``--purchases`` plans (so per-row lazy loads show up as extra statements), answers a survey and
+walks the profile, catalog, purchase and survey endpoints. It exits with status 1 and prints the
+offending statements, grouped with their repeat counts, when any request exceeds its budget. Run it in
+CI next to the smoke tests.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from typing import Any
+
+
+def _answers(questions: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    values = {"scale": 4, "text": "Viskas gerai"}
+    answers = []
+    for question in questions:
+        if question["type"] in {"single_choice", "multi_choice"}:
+            value: Any = question["options"][0]
+            if question["type"] == "multi_choice":
+                value = [value]
+        else:
+            value = values[question["type"]]
+        answers.append({"question_id": question["id"], "value": value})
+    return answers
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--purchases", type=int, default=4, help="Plans bought before the read endpoints run.")
+    parser.add_argument("--verbose", action="store_true", help="Print every request, not only violations.")
+    args = parser.parse_args()
+
+    # the app reads its settings and creates the engine on import, so configure it first
+    workdir = tempfile.mkdtemp(prefix="fitbite-query-budgets-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/budgets.db"
+    os.environ["QUERY_BUDGET_MODE"] = "warn"
+    os.environ["MEDIA_STORAGE"] = "local"
+    os.environ["MEDIA_ROOT"] = os.path.join(workdir, "media")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.db.session import SessionLocal, engine
+    from app.main import app
+    from app.models.plan_progress_survey import PlanProgressSurvey
+    from app.services.query_budget import recent_violations
+
+    # violations are printed once at the end instead of as log warnings during the run
+    logging.getLogger("app.services.query_budget").setLevel(logging.ERROR)
+
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *call: statements.append(call[2]))
+    results: list[tuple[str, int, int]] = []
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+
+        def call(method: str, url: str, expected: int = 200, **kwargs: Any) -> Any:
+            statements.clear()
+            checked_before = len(recent_violations)
+            response = client.request(method, url, headers=headers, **kwargs)
+            if response.status_code != expected:
+                print(f"[query-budgets] {method} {url} returned {response.status_code}: {response.text}", flush=True)
+                sys.exit(2)
+            over_budget = len(recent_violations) > checked_before
+            results.append((f"{method} {url}", len(statements), over_budget))
+            if args.verbose:
+                print(f"[query-budgets] {method} {url}: {len(statements)} statements", flush=True)
+            return response.json() if response.headers.get("content-type", "").startswith("application/json") else None
+
+        headers: dict[str, str] = {}
+        profile = {
+            "email": "budget@fitbite.lt",
+            "password": "Biudzetas123!",
+            "first_name": "Biudžetas",
+            "goal": "weight_loss",
+            "height_cm": 172,
+            "weight_kg": 74,
+            "activity_level": "moderate",
+            "allergies": ["milk"],
+        }
+        call("POST", "/api/auth/register", 201, json=profile)
+        token = call("POST", "/api/auth/login", json={"email": profile["email"], "password": profile["password"]})
+        headers["Authorization"] = f"Bearer {token['access_token']}"
+
+        plans = call("GET", "/api/plans")
+        call("GET", "/api/plans/recommended")
+        call("GET", "/api/plans/search", params={"q": "vištiena"})
+        call("GET", f"/api/plans/{plans[0]['id']}")
+        call("POST", "/api/plans/select", json={"plan_id": plans[0]["id"]})
+
+        purchase_ids = []
+        for index in range(args.purchases):
+            plan = plans[index % len(plans)]
+            checkout = call(
+                "POST",
+                f"/api/plans/{plan['id']}/checkout",
+                201,
+                json={
+                    "period_days": 14,
+                    "payment_method": "cash",
+                    "buyer_full_name": "Biudžetas Testas",
+                    "buyer_email": profile["email"],
+                },
+            )
+            purchase_ids.append(checkout["purchase_id"])
+
+        call("GET", "/api/users/me")
+        call("PUT", "/api/users/me", json={"weight_kg": 73})
+        call("GET", "/api/purchases")
+        call("GET", f"/api/purchases/{purchase_ids[0]}")
+        call("GET", f"/api/purchases/{purchase_ids[0]}/receipt")
+
+        # the profile endpoint settles overdue surveys, so the survey is opened right before it is answered
+        db = SessionLocal()
+        try:
+            survey = db.query(PlanProgressSurvey).order_by(PlanProgressSurvey.id).first()
+            survey.status = "scheduled"
+            db.commit()
+            survey_id = survey.id
+        finally:
+            db.close()
+        questions = call("GET", f"/api/surveys/{survey_id}")["questions"]
+        call("POST", f"/api/surveys/{survey_id}/responses", json={"answers": _answers(questions)})
+        call("GET", f"/api/surveys/{survey_id}")
+        call("GET", "/api/discounts/codes")
+        call("POST", f"/api/purchases/{purchase_ids[-1]}/cancel")
+        call("GET", "/api/users/me")
+
+    for violation in recent_violations:
+        print(violation.describe(), flush=True)
+    failures = sum(1 for _, _, over_budget in results if over_budget)
+    print(f"[query-budgets] {len(results)} requests, {failures} over budget", flush=True)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Delete media files that nothing references any more and report the reclaimed space.
+
+Usage (from ``backend/``)::
+
+    python -m app.commands.collect_media_garbage
+    python -m app.commands.collect_media_garbage --grace-hours 1 --batch-size 200 --dry-run
+    python -m app.commands.collect_media_garbage --legacy
+
+Blobs whose reference count dropped to zero longer than ``MEDIA_GC_GRACE_HOURS`` ago are
+checked against ``User.avatar_url``/``avatar_variants`` and ``PlanPurchase.pdf_path`` once more
+and deleted in batches. ``--legacy`` additionally sweeps ``media/profile_pictures`` and
+``media/purchases`` written before the content-addressed store.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import time
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.db import base  # noqa: F401 - ensures models are imported
+from app.db.base_class import Base
+from app.db.session import SessionLocal, engine
+from app.services.media_gc import (
+    MediaGCReport,
+    collect_blob_batch,
+    collect_legacy_batch,
+    count_pending_blobs,
+    iter_legacy_files,
+)
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grace-hours", type=float, default=settings.media_gc_grace_hours)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches.")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches.")
+    parser.add_argument("--legacy", action="store_true", help="Also sweep the pre-store media directories.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted.")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    cutoff = datetime.utcnow() - timedelta(hours=args.grace_hours)
+    report = MediaGCReport()
+    started = time.perf_counter()
+    batches = 0
+    db = SessionLocal()
+    try:
+        after_key = ""
+        while args.max_batches is None or batches < args.max_batches:
+            last_key = collect_blob_batch(
+                db,
+                after_key=after_key,
+                cutoff=cutoff,
+                batch_size=args.batch_size,
+                report=report,
+                dry_run=args.dry_run,
+            )
+            if last_key is None:
+                break
+            after_key = last_key
+            batches += 1
+            print(
+                f"[media-gc] blobs up to {after_key}: deleted={report.deleted_files} "
+                f"reclaimed={_megabytes(report.reclaimed_bytes)}",
+                flush=True,
+            )
+            if args.pause:
+                time.sleep(args.pause)
+        count_pending_blobs(db, cutoff, report)
+
+        if args.legacy:
+            files = iter_legacy_files()
+            while args.max_batches is None or batches < args.max_batches:
+                batch = list(itertools.islice(files, args.batch_size))
+                if not batch:
+                    break
+                collect_legacy_batch(db, batch, cutoff=cutoff, report=report, dry_run=args.dry_run)
+                batches += 1
+                print(
+                    f"[media-gc] legacy up to {batch[-1].key}: deleted={report.deleted_files} "
+                    f"reclaimed={_megabytes(report.reclaimed_bytes)}",
+                    flush=True,
+                )
+                if args.pause:
+                    time.sleep(args.pause)
+    finally:
+        db.close()
+
+    verb = "would delete" if args.dry_run else "deleted"
+    print(
+        f"[media-gc] done in {time.perf_counter() - started:.2f}s: examined={report.examined} "
+        f"{verb}={report.deleted_files} reclaimed={_megabytes(report.reclaimed_bytes)} "
+        f"repaired={report.repaired} missing={report.missing_files} "
+        f"in_grace={report.pending_files} ({_megabytes(report.pending_bytes)})",
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Email reminders for surveys that have become due.
+
+Usage (from ``backend/``)::
+
+    python -m app.commands.dispatch_survey_reminders          # poll forever
+    python -m app.commands.dispatch_survey_reminders --once   # drain the backlog and exit
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.core.config import settings
+from app.db import base  # noqa: F401 - ensures models are imported
+from app.db.session import SessionLocal
+from app.services.survey_reminders import dispatch_due_reminders
+
+
+def run_once(batch_size: int) -> None:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        report = dispatch_due_reminders(db, batch_size=batch_size)
+    finally:
+        db.close()
+    if report.batches:
+        print(
+            f"[reminders] sent={report.sent} failed={report.failed} released={report.released} "
+            f"batches={report.batches} in {time.perf_counter() - started:.2f}s",
+            flush=True,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="Dispatch everything that is due and exit.")
+    parser.add_argument("--batch-size", type=int, default=settings.reminder_batch_size)
+    parser.add_argument("--interval", type=float, default=settings.reminder_poll_interval_seconds)
+    args = parser.parse_args()
+
+    if args.once:
+        run_once(args.batch_size)
+        return
+    while True:
+        run_once(args.batch_size)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Bulk-generate a reproducible synthetic dataset for load tests and query plan checks.
+
+Usage (from ``backend/``)::
+
+    python -m app.commands.generate_synthetic_data --users 1000 --purchases 10000
+    python -m app.commands.generate_synthetic_data --users 100000 --custom-plans 5000 --purchases 1000000 --seed 7
+
+Creates users with realistic profiles, custom plans built from catalog meals, and purchases
+with their meal snapshots, survey schedules, answered surveys and rollups. Rows are written
+with batched Core inserts, one transaction per ``--batch-size`` users, plans or purchases.
+The same ``--seed`` and ``--until`` always produce the same rows; a seed can be used once per
+database. Every synthetic user logs in with ``--password`` (emails are
+``user<seed>-<n>@synthetic.fitbite.lt``). Run it while the API is stopped: ids are allocated
+above the current maximum.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from app.db import base  # noqa: F401 - ensures models are imported
+from app.db.base_class import Base
+from app.db.session import SessionLocal, engine
+from app.services.search import ensure_search_index
+from app.services.seed import seed_initial_plans
+from app.services.synthetic_data import (
+    DEFAULT_PASSWORD,
+    SyntheticDataError,
+    SyntheticDataReport,
+    SyntheticDataSpec,
+    generate_dataset,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--custom-plans", type=int, default=None, help="Defaults to 5%% of --users.")
+    parser.add_argument("--purchases", type=int, default=None, help="Defaults to 10 per user.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--until",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Newest timestamp (ISO date), defaults to today; fix it to reproduce a dataset exactly.",
+    )
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--response-rate", type=float, default=0.6, help="Share of due surveys that get answered.")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    spec = SyntheticDataSpec(
+        users=args.users,
+        custom_plans=args.users // 20 if args.custom_plans is None else args.custom_plans,
+        purchases=args.users * 10 if args.purchases is None else args.purchases,
+        seed=args.seed,
+        history_days=args.history_days,
+        response_rate=args.response_rate,
+        password=args.password,
+    )
+    if args.until is not None:
+        spec.until = args.until
+
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    started = time.perf_counter()
+    last_report = 0.0
+
+    def progress(stage: str, report: SyntheticDataReport) -> None:
+        nonlocal last_report
+        now = time.perf_counter()
+        if now - last_report >= 2:
+            last_report = now
+            print(f"[synthetic] {stage} {now - started:.0f}s {report.describe()}", flush=True)
+
+    db = SessionLocal()
+    try:
+        seed_initial_plans(db)
+        report = generate_dataset(db, spec, batch_size=args.batch_size, progress=progress)
+    except SyntheticDataError as exc:
+        print(f"[synthetic] {exc}", flush=True)
+        sys.exit(1)
+    finally:
+        db.close()
+    print(f"[synthetic] done in {time.perf_counter() - started:.1f}s {report.describe()}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
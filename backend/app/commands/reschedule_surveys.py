@@ -0,0 +1,86 @@
+"""Backfill or recompute survey schedules of paid purchases in bulk.
+
+Usage (from ``backend/``)::
+
+    python -m app.commands.reschedule_surveys --mode backfill
+    python -m app.commands.reschedule_surveys --mode recompute --interval-days 7
+
+``backfill`` only creates schedules for purchases that have none; ``recompute`` moves,
+adds and removes unanswered surveys so every purchase follows the given interval.
+Progress is checkpointed per chunk; rerunning the same command resumes where it stopped
+(``--restart`` starts over). Answered surveys are never touched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.core.config import settings
+from app.db import base  # noqa: F401 - ensures models are imported
+from app.db.base_class import Base
+from app.db.session import SessionLocal, engine
+from app.services.survey_rescheduling import (
+    checkpoint_name,
+    load_checkpoint,
+    reschedule_chunk,
+    reset_checkpoint,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["backfill", "recompute"], default="backfill")
+    parser.add_argument("--interval-days", type=int, default=settings.survey_interval_days)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks.")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint.")
+    args = parser.parse_args()
+
+    if args.interval_days != settings.survey_interval_days:
+        print(
+            f"[reschedule] note: SURVEY_INTERVAL_DAYS is {settings.survey_interval_days}; "
+            "update it too or new purchases keep the old schedule.",
+            flush=True,
+        )
+
+    Base.metadata.create_all(bind=engine)
+    name = checkpoint_name(args.mode, args.interval_days)
+    db = SessionLocal()
+    try:
+        if args.restart:
+            reset_checkpoint(db, name)
+        position = load_checkpoint(db, name)
+        if position:
+            print(f"[reschedule] resuming after purchase #{position}", flush=True)
+
+        started = time.perf_counter()
+        totals = {"purchases": 0, "inserted": 0, "updated": 0, "deleted": 0}
+        while True:
+            chunk = reschedule_chunk(
+                db,
+                mode=args.mode,
+                after_purchase_id=position,
+                chunk_size=args.chunk_size,
+                interval_days=args.interval_days,
+                checkpoint=name,
+            )
+            if chunk is None:
+                break
+            position = chunk.last_purchase_id
+            for key in totals:
+                totals[key] += getattr(chunk, key)
+            print(
+                f"[reschedule] up to purchase #{position}: "
+                + " ".join(f"{key}={value}" for key, value in totals.items()),
+                flush=True,
+            )
+            if args.pause:
+                time.sleep(args.pause)
+        print(f"[reschedule] done in {time.perf_counter() - started:.2f}s", flush=True)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
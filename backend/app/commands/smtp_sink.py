@@ -0,0 +1,95 @@
+"""Local stand-in SMTP server that accepts every message and prints it.
+
+Usage (from ``backend/``)::
+
+    python -m app.commands.smtp_sink --port 1025 [--quiet]
+
+Only the commands ``smtplib`` needs are implemented; nothing is relayed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from email import message_from_bytes, policy
+
+
+class SmtpSink:
+    def __init__(self, quiet: bool = False) -> None:
+        self.quiet = quiet
+        self.received = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 fitbite-smtp-sink ready")
+        recipients: list[str] = []
+        try:
+            while line := await reader.readline():
+                command = line.decode("utf-8", "replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    reply("250-fitbite-smtp-sink")
+                    reply("250 8BITMIME")
+                elif verb == "HELO":
+                    reply("250 fitbite-smtp-sink")
+                elif verb == "MAIL":
+                    recipients = []
+                    reply("250 OK")
+                elif verb == "RCPT":
+                    recipients.append(command.partition(":")[2].strip(" <>"))
+                    reply("250 OK")
+                elif verb == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    lines: list[bytes] = []
+                    while (chunk := await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        lines.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                    self.received += 1
+                    self._print(recipients, b"".join(lines))
+                    reply("250 OK: queued")
+                elif verb in {"RSET", "NOOP"}:
+                    reply("250 OK")
+                elif verb == "QUIT":
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("502 Command not implemented")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _print(self, recipients: list[str], data: bytes) -> None:
+        if self.quiet:
+            print(f"[smtp-sink] #{self.received} -> {', '.join(recipients)}", flush=True)
+            return
+        message = message_from_bytes(data, policy=policy.default)
+        body = message.get_body(preferencelist=("plain",))
+        print(f"----- #{self.received} to {', '.join(recipients)}: {message['Subject']}", flush=True)
+        print(body.get_content() if body else data.decode("utf-8", "replace"), flush=True)
+
+
+async def serve(host: str, port: int, quiet: bool) -> None:
+    sink = SmtpSink(quiet=quiet)
+    server = await asyncio.start_server(sink.handle, host, port)
+    print(f"[smtp-sink] listening on {host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--quiet", action="store_true", help="Print one line per message instead of the body.")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.quiet))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
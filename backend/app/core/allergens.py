@@ -54,3 +54,11 @@ def deserialize_allergens(value: str | None) -> list[str]:
     if not value:
         return []
     return normalize_allergen_list(value.split(","))
+
+
+def allergen_mask(values: Iterable[str] | None) -> int:
+    """Pack allergens into a bit mask ordered like ``ALLERGEN_IDS``."""
+    mask = 0
+    for slug in normalize_allergen_list(values):
+        mask |= 1 << _ALLERGEN_SORT_INDEX[slug]
+    return mask
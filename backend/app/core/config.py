@@ -1,6 +1,6 @@
 from functools import lru_cache
 import json
-from typing import Any, List
+from typing import Any, List, Literal
 
 from pydantic import AnyHttpUrl, BaseModel, Field, validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -27,6 +27,58 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
     generic_discount_codes: List[DiscountCodeSetting] = []
+    admin_emails: List[str] | str = []
+
+    week_assembler_budget_ms: float = 50.0
+    metrics_enabled: bool = True
+    query_budget_mode: Literal["off", "warn", "enforce"] = "off"
+    query_budget_default: int | None = None
+    profiling_enabled: bool = False
+    profiling_interval_ms: float = Field(default=1.0, gt=0)
+    profiling_dir: str | None = None
+    memory_snapshot_limit: int = Field(default=5, ge=1)
+    memory_sample_interval_seconds: float = Field(default=15.0, ge=0)
+    slow_query_threshold_ms: float | None = Field(default=None, ge=0)
+    slow_query_log_file: str | None = None
+    slow_query_log_max_bytes: int = Field(default=10 * 1024 * 1024, ge=1)
+    slow_query_log_backups: int = Field(default=5, ge=0)
+    slow_query_log_parameters: bool = True
+    slow_query_explain: bool = True
+    slow_query_explain_cooldown_seconds: float = Field(default=300.0, ge=0)
+    readiness_cache_seconds: float = Field(default=5.0, ge=0)
+    readiness_db_latency_ms: float = Field(default=250.0, gt=0)
+    readiness_pool_utilization: float = Field(default=0.9, gt=0, le=1)
+    readiness_queue_lag_seconds: float = Field(default=60.0, gt=0)
+
+    avatar_worker_threads: int = Field(default=2, ge=1)
+    avatar_max_upload_bytes: int = Field(default=10 * 1024 * 1024, ge=1)
+    avatar_processing_timeout_seconds: int = Field(default=900, ge=1)
+    media_storage: Literal["local", "s3"] = "local"
+    media_root: str = "media"
+    media_public_base_url: str | None = None
+    media_presign_expires_seconds: int = Field(default=300, ge=1)
+    s3_bucket: str | None = None
+    s3_key_prefix: str = ""
+    s3_endpoint_url: str | None = None
+    s3_region: str | None = None
+    s3_access_key_id: str | None = None
+    s3_secret_access_key: str | None = None
+    media_offload: Literal["none", "x-accel-redirect", "x-sendfile"] = "none"
+    media_accel_redirect_prefix: str = "/protected-media/"
+    media_gc_grace_hours: float = Field(default=24.0, ge=0)
+
+    survey_interval_days: int = Field(default=5, ge=1)
+
+    frontend_base_url: str = "http://localhost:3000"
+    smtp_host: str = "localhost"
+    smtp_port: int = 1025
+    smtp_username: str | None = None
+    smtp_password: str | None = None
+    smtp_use_tls: bool = False
+    smtp_timeout_seconds: float = 10.0
+    reminder_sender_email: str = "FitBite <no-reply@fitbite.lt>"
+    reminder_batch_size: int = 200
+    reminder_poll_interval_seconds: float = 60.0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=False)
 
@@ -38,6 +90,16 @@ class Settings(BaseSettings):
             return value
         raise ValueError(value)
 
+    @validator("admin_emails", pre=True)
+    def assemble_admin_emails(cls, value: Any) -> List[str]:  # type: ignore[override]
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = json.loads(value) if value.startswith("[") else value.split(",")
+        if isinstance(value, list):
+            return [str(email).strip().lower() for email in value if str(email).strip()]
+        raise ValueError(value)
+
     @validator("generic_discount_codes", pre=True)
     def parse_generic_discount_codes(cls, value: Any) -> List[dict[str, Any]]:  # type: ignore[override]
         if not value:
@@ -0,0 +1,148 @@
+"""Versioned survey question definitions.
+
+Questions are never edited in place: a change adds a new version and bumps
+``CURRENT_SURVEY_VERSIONS`` so that stored responses keep rendering against the
+definition they were answered with.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+SURVEY_DEFINITIONS: dict[str, dict[int, list[dict[str, Any]]]] = {
+    "progress": {
+        1: [
+            {
+                "id": "overall_wellbeing",
+                "prompt": "Kaip vertinate bendrą savijautą ir energijos lygį pastarosiomis dienomis?",
+                "type": "scale",
+                "scale_min": 1,
+                "scale_max": 5,
+                "scale_min_label": "Labai prasta",
+                "scale_max_label": "Puiki",
+            },
+            {
+                "id": "plan_adherence",
+                "prompt": "Kiek lengva laikytis suplanuotų patiekalų ir užkandžių grafiko?",
+                "type": "scale",
+                "scale_min": 1,
+                "scale_max": 5,
+                "scale_min_label": "Labai sudėtinga",
+                "scale_max_label": "Labai paprasta",
+            },
+            {
+                "id": "satiety_level",
+                "prompt": "Kaip vertinate sotumo jausmą po valgių?",
+                "type": "scale",
+                "scale_min": 1,
+                "scale_max": 5,
+                "scale_min_label": "Nuolat alksta",
+                "scale_max_label": "Visada pakanka",
+            },
+            {
+                "id": "main_challenge",
+                "prompt": "Kas šiuo metu didžiausias iššūkis laikantis plano?",
+                "type": "single_choice",
+                "options": [
+                    "Trūksta laiko pasiruošti patiekalus",
+                    "Norisi daugiau skonių ar įvairovės",
+                    "Porcijų dydžiai netinka",
+                    "Motyvacijos ar palaikymo stoka",
+                    "Kita (įrašysiu komentaruose)",
+                ],
+            },
+            {
+                "id": "support_need",
+                "prompt": "Kokių papildomų išteklių ar pagalbos norėtumėte artimiausioms dienoms?",
+                "type": "multi_choice",
+                "options": [
+                    "Greitų patiekalų idėjų",
+                    "Receptų su mažiau ingredientų",
+                    "Motyvacijos palaikymo patarimų",
+                    "Aiškesnio apsipirkimo plano",
+                    "Kitų (įrašysiu komentaruose)",
+                ],
+                "help_text": "Galite pasirinkti kelis variantus",
+            },
+            {
+                "id": "progress_note",
+                "prompt": "Pasidalinkite įžvalgomis, pastebėjimais ar klausimais dietologui.",
+                "type": "text",
+                "help_text": "Galite palikti tuščią, jeigu šiuo metu pastabų neturite.",
+            },
+        ],
+    },
+    "final": {
+        1: [
+            {
+                "id": "result_satisfaction",
+                "prompt": "Kaip vertinate pasiektus rezultatus užbaigus planą?",
+                "type": "scale",
+                "scale_min": 1,
+                "scale_max": 5,
+                "scale_min_label": "Nepatenkintas",
+                "scale_max_label": "Labai patenkintas",
+            },
+            {
+                "id": "meal_quality",
+                "prompt": "Kaip vertinate patiekalų skonį, kokybę ir pateikimą?",
+                "type": "scale",
+                "scale_min": 1,
+                "scale_max": 5,
+                "scale_min_label": "Silpnai",
+                "scale_max_label": "Puikiai",
+            },
+            {
+                "id": "routine_fit",
+                "prompt": "Kiek mitybos planas dera su jūsų dienos ritmu ir įpročiais?",
+                "type": "scale",
+                "scale_min": 1,
+                "scale_max": 5,
+                "scale_min_label": "Visai nederėjo",
+                "scale_max_label": "Puikiai pritaikytas",
+            },
+            {
+                "id": "support_needed",
+                "prompt": "Ko labiausiai norėtumėte kitame mitybos plane?",
+                "type": "multi_choice",
+                "options": [
+                    "Daugiau skirtingų receptų ir skonių",
+                    "Paprasčiau paruošiamų patiekalų",
+                    "Individualizuotų pasiūlymų pagal alergijas / apribojimus",
+                    "Detalesnio apsipirkimo ir paruošimo plano",
+                    "Tolesnio dietologo ar trenerio palaikymo",
+                    "Kita (įrašysiu komentaruose)",
+                ],
+                "help_text": "Galite pasirinkti kelis variantus",
+            },
+            {
+                "id": "goal_progress",
+                "prompt": "Kokį pokytį pastebėjote (svorio, savijautos, gyvenimo būdo)?",
+                "type": "text",
+                "help_text": "Įvardykite konkrečius pokyčius ar skaičius, jei galite.",
+            },
+            {
+                "id": "feedback",
+                "prompt": "Papildomi komentarai, pasiūlymai ar klausimai mūsų komandai.",
+                "type": "text",
+                "help_text": "Padėkite mums dar labiau pagerinti planą ateityje.",
+            },
+            {
+                "id": "next_goals",
+                "prompt": "Kokį kitą tikslą norėtumėte pasiekti su mūsų pagalba?",
+                "type": "single_choice",
+                "options": [
+                    "Toliau optimizuoti dabartinį svorį",
+                    "Didinti raumenų masę / sportinius rezultatus",
+                    "Pagerinti bendrą savijautą ir energiją",
+                    "Sukaupti žinių savarankiškam planavimui",
+                    "Dar nežinau – laukiu profesionalo rekomendacijos",
+                ],
+            },
+        ],
+    },
+}
+
+CURRENT_SURVEY_VERSIONS: dict[str, int] = {
+    survey_type: max(versions) for survey_type, versions in SURVEY_DEFINITIONS.items()
+}
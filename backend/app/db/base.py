@@ -1,11 +1,15 @@
 """Import SQLAlchemy models for Alembic autogenerate support."""
 
 from app.models import (  # noqa: F401
+    command_checkpoint,
+    media_blob,
     nutrition_plan,
     plan_meal,
     plan_period_pricing,
     plan_progress_survey,
+    plan_progress_survey_answer,
     plan_progress_survey_response,
     plan_purchase,
+    survey_answer_rollup,
     user,
 )
@@ -0,0 +1,59 @@
+"""Bring tables created by older releases up to the current models.
+
+``Base.metadata.create_all`` only creates missing tables, so columns and indexes added to a model
+later never reach an existing database. ``add_missing_columns`` adds them with ``ALTER TABLE ...
+ADD COLUMN`` and ``CREATE INDEX`` and is safe to run on every start. It never drops or alters
+anything, and unique constraints on existing tables are left alone since old rows may violate them.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import Column, MetaData, Table, inspect, literal
+from sqlalchemy.engine import Dialect, Engine
+
+from app.db.base_class import Base
+
+
+def _default_sql(column: Column, dialect: Dialect) -> str | None:
+    server_default = column.server_default
+    if server_default is not None:
+        default = server_default.arg  # type: ignore[attr-defined]
+        # plain strings are literals, like CREATE TABLE renders them; text() goes in verbatim
+        return f"'{default}'" if isinstance(default, str) else str(default.compile(dialect=dialect))
+    if column.default is not None and column.default.is_scalar:
+        return str(literal(column.default.arg).compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    return None
+
+
+def _add_column_sql(table: Table, column: Column, dialect: Dialect) -> str:
+    preparer = dialect.identifier_preparer
+    statement = (
+        f"ALTER TABLE {preparer.format_table(table)} "
+        f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=dialect)}"
+    )
+    default = _default_sql(column, dialect)
+    if default is not None:
+        statement += f" DEFAULT {default}"
+        # existing rows take the default, so the constraint holds right away
+        if not column.nullable:
+            statement += " NOT NULL"
+    return statement
+
+
+def add_missing_columns(engine: Engine, metadata: MetaData = Base.metadata) -> set[tuple[str, str]]:
+    """Add model columns and indexes missing from existing tables; returns the ``(table, column)`` pairs added."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added: set[tuple[str, str]] = set()
+    with engine.begin() as connection:
+        for table in metadata.tables.values():
+            if table.name not in existing_tables:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present:
+                    connection.exec_driver_sql(_add_column_sql(table, column, connection.dialect))
+                    added.add((table.name, column.name))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+    return added
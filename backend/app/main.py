@@ -1,13 +1,35 @@
-from fastapi import FastAPI
+from dataclasses import asdict
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
-from app.api.routes import auth, discounts, plans, purchases, surveys, users
+from app.api.routes import admin, auth, discounts, media, plans, purchases, surveys, users
 from app.core.config import settings
 from app.db import base  # noqa: F401 - ensures models are imported
 from app.db.base_class import Base
+from app.db.schema_upgrade import add_missing_columns
 from app.db.session import SessionLocal, engine
+from app.services.avatars import expire_stale_avatar_uploads, shutdown_avatar_worker
+from app.services.health import readiness
+from app.services.meal_index import ensure_index_loaded
+from app.services.media_serving import MediaFiles
+from app.services.media_store import media_store
+from app.services.metrics import (
+    MetricsMiddleware,
+    instrument_engine,
+    render_metrics,
+    start_memory_sampler,
+    stop_memory_sampler,
+)
+from app.services.plan_catalog import refresh_all_plan_catalog_fields
+from app.services.profiling import ProfilingMiddleware, instrument_profiled_endpoints
+from app.services.query_budget import QueryBudgetMiddleware, instrument_query_budgets
+from app.services.search import ensure_search_backfilled, ensure_search_index
 from app.services.seed import seed_initial_plans
+from app.services.slow_queries import SlowQueryMiddleware, instrument_slow_queries, shutdown_slow_query_log
+from app.services.survey_analytics import ensure_survey_rollups_backfilled
+from app.services.survey_answers import ensure_survey_answers_backfilled
+from app.services.survey_registry import survey_registry
 
 app = FastAPI(title=settings.project_name)
 
@@ -17,7 +39,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[plans.NEXT_CURSOR_HEADER],
 )
+if settings.query_budget_mode != "off":
+    instrument_query_budgets(engine)
+    app.add_middleware(QueryBudgetMiddleware)
+if settings.metrics_enabled:
+    instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
+if settings.slow_query_threshold_ms is not None:
+    instrument_slow_queries(engine)
+    app.add_middleware(SlowQueryMiddleware)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
 
 app.include_router(auth.router, prefix=settings.api_v1_prefix)
 app.include_router(users.router, prefix=settings.api_v1_prefix)
@@ -25,20 +59,69 @@ app.include_router(plans.router, prefix=settings.api_v1_prefix)
 app.include_router(purchases.router, prefix=settings.api_v1_prefix)
 app.include_router(surveys.router, prefix=settings.api_v1_prefix)
 app.include_router(discounts.router, prefix=settings.api_v1_prefix)
+app.include_router(admin.router, prefix=settings.api_v1_prefix)
+if settings.profiling_enabled:
+    instrument_profiled_endpoints(app)
 
-app.mount("/media", StaticFiles(directory="media"), name="media")
+media_root = media_store.local_path("")
+if media_root is not None:
+    media_root.mkdir(parents=True, exist_ok=True)
+    app.mount("/media", MediaFiles(directory=media_root), name="media")
+else:
+    app.include_router(media.router)
 
 
 @app.on_event("startup")
 def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
+    added_columns = add_missing_columns(engine)
+    ensure_search_index(engine)
+    survey_registry.warm()
     db = SessionLocal()
     try:
         seed_initial_plans(db)
+        if ("nutritionplan", "daily_calories") in added_columns:
+            # upgraded database: the denormalized catalog columns start out empty
+            refresh_all_plan_catalog_fields(db)
+        ensure_search_backfilled(db)
+        ensure_survey_answers_backfilled(db)
+        ensure_survey_rollups_backfilled(db)
+        ensure_index_loaded(db)
+        expire_stale_avatar_uploads(db)
     finally:
         db.close()
+    if settings.metrics_enabled:
+        start_memory_sampler(settings.memory_sample_interval_seconds)
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    shutdown_avatar_worker()
+    stop_memory_sampler()
+    shutdown_slow_query_log()
+
 
+if settings.metrics_enabled:
 
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> Response:
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
+
+# liveness only says the event loop answers; it must not depend on the database or the threadpool
 @app.get("/healthz")
-def health_check() -> dict[str, str]:
+@app.get("/livez")
+async def health_check() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readiness_check(response: Response) -> dict[str, object]:
+    ready, results = readiness()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ready" if ready else "not_ready",
+        "checks": {name: asdict(result) for name, result in results.items()},
+    }
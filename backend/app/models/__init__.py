@@ -1,9 +1,13 @@
+from .command_checkpoint import CommandCheckpoint
+from .media_blob import MediaBlob
 from .nutrition_plan import NutritionPlan
 from .plan_meal import PlanMeal
 from .plan_period_pricing import PlanPeriodPricing
 from .plan_purchase import PlanPurchase, PlanPurchaseItem
 from .plan_progress_survey import PlanProgressSurvey
+from .plan_progress_survey_answer import PlanProgressSurveyAnswer
 from .plan_progress_survey_response import PlanProgressSurveyResponse
+from .survey_answer_rollup import SurveyAnswerRollup
 from .user import User
 
 __all__ = [
@@ -15,4 +19,8 @@ __all__ = [
     "PlanPurchaseItem",
     "PlanProgressSurvey",
     "PlanProgressSurveyResponse",
+    "PlanProgressSurveyAnswer",
+    "SurveyAnswerRollup",
+    "CommandCheckpoint",
+    "MediaBlob",
 ]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -11,18 +11,31 @@ from app.db.base_class import Base
 class NutritionPlan(Base):
     """Stores prebuilt and custom nutrition plans."""
 
+    __table_args__ = (
+        Index("ix_nutritionplan_catalog_order", "is_custom", "name", "id"),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(150), nullable=False)
     description: Mapped[str] = mapped_column(String(500), nullable=False)
-    goal_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    goal_type: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
     calories: Mapped[int | None] = mapped_column(Integer, nullable=True)
     protein_grams: Mapped[int | None] = mapped_column(Integer, nullable=True)
     carbs_grams: Mapped[int | None] = mapped_column(Integer, nullable=True)
     fats_grams: Mapped[int | None] = mapped_column(Integer, nullable=True)
     allergens: Mapped[str | None] = mapped_column(String(255))
 
+    # Denormalized catalog fields (per-day averages over meals, cheapest daily price) used for
+    # filtering and keyset paging in SQL; kept in sync by ``refresh_plan_catalog_fields``.
+    daily_calories: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    daily_protein_grams: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    daily_carbs_grams: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    daily_fats_grams: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    daily_price_cents: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    allergen_mask: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
     is_custom: Mapped[bool] = mapped_column(Boolean, default=False)
-    owner_id: Mapped[str | None] = mapped_column(ForeignKey("user.id"), nullable=True)
+    owner_id: Mapped[str | None] = mapped_column(ForeignKey("user.id"), nullable=True, index=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -11,10 +11,20 @@ from app.db.base_class import Base
 class PlanProgressSurvey(Base):
     """Scheduled survey to capture nutrition plan progress feedback."""
 
+    __table_args__ = (
+        Index("ix_planprogresssurvey_due", "status", "scheduled_at"),
+        UniqueConstraint(
+            "plan_purchase_id",
+            "survey_type",
+            "day_offset",
+            name="uq_planprogresssurvey_purchase_offset",
+        ),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[str] = mapped_column(ForeignKey("user.id"), nullable=False, index=True)
     plan_purchase_id: Mapped[int] = mapped_column(ForeignKey("planpurchase.id"), nullable=False, index=True)
-    plan_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    plan_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
     plan_name_snapshot: Mapped[str] = mapped_column(String(200), nullable=False)
     survey_type: Mapped[str] = mapped_column(String(20), nullable=False, default="progress")
     day_offset: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -23,6 +33,8 @@ class PlanProgressSurvey(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     cancelled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    reminder_state: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    reminder_sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     user: Mapped["User"] = relationship("User", back_populates="surveys")
     purchase: Mapped["PlanPurchase"] = relationship("PlanPurchase", back_populates="surveys")
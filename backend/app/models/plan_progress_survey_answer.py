@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from sqlalchemy import ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base_class import Base
+
+
+class PlanProgressSurveyAnswer(Base):
+    """One typed answer of a survey response (one row per selected option for multi-choice questions)."""
+
+    __table_args__ = (
+        Index("ix_planprogresssurveyanswer_scale", "question_id", "scale_value"),
+        Index("ix_planprogresssurveyanswer_choice", "question_id", "choice_value"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    response_id: Mapped[int] = mapped_column(
+        ForeignKey("planprogresssurveyresponse.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    user_id: Mapped[str] = mapped_column(ForeignKey("user.id"), nullable=False, index=True)
+    plan_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    survey_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    question_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    question_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    scale_value: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    choice_value: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    text_value: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    response: Mapped["PlanProgressSurveyResponse"] = relationship(
+        "PlanProgressSurveyResponse", back_populates="answer_rows"
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return f"<PlanProgressSurveyAnswer response={self.response_id} question={self.question_id}>"
+
+
+from app.models.plan_progress_survey_response import PlanProgressSurveyResponse  # noqa: E402
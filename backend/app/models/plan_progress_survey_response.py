@@ -15,14 +15,22 @@ class PlanProgressSurveyResponse(Base):
     survey_id: Mapped[int] = mapped_column(ForeignKey("planprogresssurvey.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id: Mapped[str] = mapped_column(ForeignKey("user.id"), nullable=False, index=True)
     answers: Mapped[dict] = mapped_column(JSON, nullable=False)
-    submitted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    definition_version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    submitted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, index=True)
 
     survey: Mapped["PlanProgressSurvey"] = relationship("PlanProgressSurvey", back_populates="responses")
     user: Mapped["User"] = relationship("User", back_populates="survey_responses")
+    answer_rows: Mapped[list["PlanProgressSurveyAnswer"]] = relationship(
+        "PlanProgressSurveyAnswer",
+        back_populates="response",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
     def __repr__(self) -> str:  # pragma: no cover - debug helper
         return f"<PlanProgressSurveyResponse id={self.id} survey={self.survey_id}>"
 
 
 from app.models.plan_progress_survey import PlanProgressSurvey  # noqa: E402
+from app.models.plan_progress_survey_answer import PlanProgressSurveyAnswer  # noqa: E402
 from app.models.user import User  # noqa: E402
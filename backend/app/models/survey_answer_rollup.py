@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from sqlalchemy import Float, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class SurveyAnswerRollup(Base):
+    """Running answer counts per plan, survey type, day offset, question and answer option."""
+
+    __table_args__ = (
+        UniqueConstraint(
+            "plan_id",
+            "survey_type",
+            "day_offset",
+            "question_id",
+            "answer_key",
+            name="uq_surveyanswerrollup_bucket",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    plan_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    survey_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    day_offset: Mapped[int] = mapped_column(Integer, nullable=False)
+    question_id: Mapped[str] = mapped_column(String(100), nullable=False)
+    answer_key: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    response_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    value_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return (
+            f"<SurveyAnswerRollup plan={self.plan_id} {self.survey_type}/{self.day_offset} "
+            f"{self.question_id}={self.answer_key!r} count={self.response_count}>"
+        )
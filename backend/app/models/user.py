@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, date
 import uuid
 
-from sqlalchemy import Date, DateTime, Float, ForeignKey, String
+from sqlalchemy import JSON, Date, DateTime, Float, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -21,6 +21,10 @@ class User(Base):
     last_name: Mapped[str | None] = mapped_column(String(100))
     goal: Mapped[str] = mapped_column(String(50), default="balanced")
     avatar_url: Mapped[str | None] = mapped_column(String(255))
+    avatar_variants: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    avatar_status: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    avatar_version: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    avatar_requested_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     height_cm: Mapped[float | None] = mapped_column(Float)
     weight_kg: Mapped[float | None] = mapped_column(Float)
     activity_level: Mapped[str | None] = mapped_column(String(50))
@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class MemoryTracingStart(BaseModel):
+    frames: int = Field(default=1, ge=1, le=100, description="Kiek kvietimų dėklo kadrų saugoti kiekvienai alokacijai.")
+
+
+class MemorySnapshotCreate(BaseModel):
+    label: Optional[str] = Field(default=None, max_length=100)
+
+
+class MemorySnapshotInfo(BaseModel):
+    id: int
+    label: Optional[str] = None
+    taken_at: datetime
+    traced_bytes: int
+    blocks: int
+
+    class Config:
+        from_attributes = True
+
+
+class MemoryStatus(BaseModel):
+    pid: int
+    tracing: bool
+    frames: int
+    traced_bytes: int
+    traced_peak_bytes: int
+    rss_bytes: Optional[int] = None
+    gc_counts: list[int]
+    gc_collections: list[int]
+    gc_uncollectable: list[int]
+    gc_garbage: int
+    snapshots: list[MemorySnapshotInfo]
+
+    class Config:
+        from_attributes = True
+
+
+class AllocationStat(BaseModel):
+    location: str
+    size_bytes: int
+    count: int
+    size_diff_bytes: int = 0
+    count_diff: int = 0
+    traceback: list[str] = Field(default_factory=list)
+
+    class Config:
+        from_attributes = True
+
+
+class MemorySnapshotReport(BaseModel):
+    pid: int
+    snapshot: MemorySnapshotInfo
+    top: list[AllocationStat]
+
+
+class MemoryDiffReport(BaseModel):
+    pid: int
+    first_id: int
+    second_id: int
+    group_by: str
+    stats: list[AllocationStat]
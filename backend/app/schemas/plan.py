@@ -1,10 +1,12 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
 from app.core.allergens import deserialize_allergens, normalize_allergen_list
 
+MealSlotLiteral = Literal["breakfast", "lunch", "dinner", "snack"]
+
 
 class PlanMealBase(BaseModel):
     day_of_week: str = Field(
@@ -43,6 +45,27 @@ class PlanMealRead(PlanMealBase):
         from_attributes = True
 
 
+class MealSwapCandidate(PlanMealRead):
+    plan_id: int
+    distance: float = Field(ge=0, description="Atstumas tarp makroelementų vektorių (mažesnis – panašesnis).")
+
+
+class MealSwapRequest(BaseModel):
+    replacement_meal_id: int
+
+
+class CatalogSearchResult(BaseModel):
+    kind: Literal["plan", "meal"]
+    plan_id: int
+    meal_id: Optional[int] = None
+    title: str
+    description: str
+    score: float = Field(description="Atitikimo įvertis (didesnis – aktualesnis).")
+
+    class Config:
+        from_attributes = True
+
+
 class PlanPricingOption(BaseModel):
     period_days: int = Field(gt=0)
     base_price: float = Field(ge=0)
@@ -86,6 +109,35 @@ class CustomPlanCreate(BaseModel):
     meals: List[PlanMealCreate]
 
 
+class WeekAssemblyRequest(BaseModel):
+    name: str
+    description: str
+    calories: int = Field(gt=0, description="Dienos kalorijų tikslas.")
+    protein_grams: int = Field(ge=0, description="Dienos baltymų tikslas gramais.")
+    carbs_grams: int = Field(ge=0, description="Dienos angliavandenių tikslas gramais.")
+    fats_grams: int = Field(ge=0, description="Dienos riebalų tikslas gramais.")
+    meal_slots: List[MealSlotLiteral] = Field(
+        default_factory=lambda: ["breakfast", "lunch", "dinner"],
+        min_length=1,
+        max_length=6,
+        description="Valgymai kiekvieną dieną, pvz. breakfast, lunch, dinner, snack.",
+    )
+    excluded_allergens: List[str] = Field(
+        default_factory=list, description="Papildomai atmetami alergenai (naudotojo alergijos taikomos visada)."
+    )
+
+    @field_validator("excluded_allergens", mode="before")
+    @classmethod
+    def _parse_excluded_allergens(cls, value: object) -> List[str]:
+        if value is None or value == "":
+            return []
+        if isinstance(value, str):
+            return deserialize_allergens(value)
+        if isinstance(value, list):
+            return normalize_allergen_list(value)
+        return []
+
+
 class NutritionPlanSummary(NutritionPlanBase):
     id: int
     is_custom: bool
@@ -20,6 +20,7 @@ class SurveyDetail(BaseModel):
     id: int
     survey_type: Literal["progress", "final"]
     status: Literal["scheduled", "completed", "cancelled"]
+    definition_version: int
     plan_name: str
     day_offset: int
     scheduled_at: datetime
@@ -42,3 +43,37 @@ class SurveySubmitRequest(BaseModel):
 class SurveySubmitResponse(BaseModel):
     id: int
     submitted_at: datetime
+
+
+class SurveyQuestionAnalytics(BaseModel):
+    survey_type: Literal["progress", "final"]
+    question_id: str
+    question_type: Literal["scale", "single_choice", "multi_choice", "text"]
+    prompt: str
+    day_offset: int
+    responses: int
+    average: Optional[float] = None
+    distribution: dict[str, int] = Field(default_factory=dict)
+
+    class Config:
+        from_attributes = True
+
+
+class PlanSurveyAnalytics(BaseModel):
+    plan_id: int
+    questions: list[SurveyQuestionAnalytics]
+
+
+class SurveySegmentMember(BaseModel):
+    user_id: str
+    response_id: int
+    survey_id: int
+    plan_id: int
+    survey_type: Literal["progress", "final"]
+    day_offset: int
+    submitted_at: datetime
+    scale_value: Optional[int] = None
+    choice_value: Optional[str] = None
+
+    class Config:
+        from_attributes = True
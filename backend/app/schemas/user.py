@@ -87,6 +87,8 @@ class UserUpdate(BaseModel):
 class UserRead(UserBase):
     id: str
     avatar_url: Optional[str] = None
+    avatar_variants: Optional[dict[str, dict[str, str]]] = None
+    avatar_status: Optional[Literal["processing", "ready", "failed"]] = None
     current_plan_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import itertools
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.services.media_store import media_store
+
+# raw uploads still carry EXIF (GPS, device) and must never be reachable under /media
+AVATAR_INCOMING_DIR = Path(tempfile.gettempdir()) / "fitbite-avatar-uploads"
+AVATAR_INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+
+# square edge in pixels per variant
+AVATAR_SIZES = {"thumbnail": 64, "profile": 256, "full": 1024}
+AVATAR_FORMATS = {
+    "webp": ("WEBP", ".webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+AVATAR_PRIMARY = ("profile", "webp")
+
+AVATAR_PROCESSING = "processing"
+AVATAR_READY = "ready"
+AVATAR_FAILED = "failed"
+
+avatar_executor = ThreadPoolExecutor(max_workers=settings.avatar_worker_threads, thread_name_prefix="avatar")
+# submission time of every upload still waiting for a worker thread
+_queued_at: dict[int, float] = {}
+_queued_lock = threading.Lock()
+_task_ids = itertools.count()
+
+
+def new_avatar_version() -> str:
+    return secrets.token_hex(8)
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    if image.mode in {"RGBA", "LA"} or (image.mode == "P" and "transparency" in image.info):
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def render_avatar_variants(source: Path, destination: Path) -> dict[str, dict[str, Path]]:
+    """Write every size/format variant of ``source`` into ``destination``.
+
+    Images are rotated according to their EXIF orientation and then re-encoded from pixel data
+    only, so no EXIF/XMP metadata survives.
+    """
+    destination.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as original:
+        original.draft("RGB", (max(AVATAR_SIZES.values()),) * 2)
+        image = _flatten(ImageOps.exif_transpose(original))
+
+    variants: dict[str, dict[str, Path]] = {}
+    shortest_edge = min(image.size)
+    # largest first, each smaller size is resampled from the previous one
+    for name, edge in sorted(AVATAR_SIZES.items(), key=lambda item: -item[1]):
+        edge = min(edge, shortest_edge)
+        image = ImageOps.fit(image, (edge, edge), method=Image.Resampling.LANCZOS)
+        variants[name] = {}
+        for format_name, (pil_format, extension, options) in AVATAR_FORMATS.items():
+            path = destination / f"{name}{extension}"
+            image.save(path, pil_format, **options)
+            variants[name][format_name] = path
+    return variants
+
+
+def process_avatar_upload(user_id: str, upload_path: Path, version: str, base_url: str) -> None:
+    """Background job: render variants and publish them unless a newer upload superseded this one."""
+    with tempfile.TemporaryDirectory(dir=AVATAR_INCOMING_DIR) as workdir:
+        try:
+            rendered = render_avatar_variants(upload_path, Path(workdir))
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError, ValueError):
+            rendered = None
+        finally:
+            upload_path.unlink(missing_ok=True)
+
+        db = SessionLocal()
+        try:
+            user = db.get(User, user_id)
+            if user is None or user.avatar_version != version:
+                return
+            if rendered is None:
+                user.avatar_status = AVATAR_FAILED
+                db.commit()
+                return
+
+            previous_variants = user.avatar_variants
+            previous_url = user.avatar_url
+            variants = {
+                name: {
+                    format_name: media_store.public_url(
+                        media_store.put_file(db, path, AVATAR_FORMATS[format_name][1]), base_url
+                    )
+                    for format_name, path in formats.items()
+                }
+                for name, formats in rendered.items()
+            }
+            for key in media_store.avatar_keys(previous_url, previous_variants):
+                media_store.release(db, key)
+
+            user.avatar_status = AVATAR_READY
+            user.avatar_variants = variants
+            size, format_name = AVATAR_PRIMARY
+            user.avatar_url = variants[size][format_name]
+            db.commit()
+        finally:
+            db.close()
+
+
+def _process_queued_upload(task_id: int, user_id: str, upload_path: Path, version: str, base_url: str) -> None:
+    with _queued_lock:
+        _queued_at.pop(task_id, None)
+    process_avatar_upload(user_id, upload_path, version, base_url)
+
+
+def schedule_avatar_processing(user_id: str, upload_path: Path, version: str, base_url: str) -> None:
+    task_id = next(_task_ids)
+    with _queued_lock:
+        _queued_at[task_id] = time.monotonic()
+    avatar_executor.submit(_process_queued_upload, task_id, user_id, upload_path, version, base_url)
+
+
+def avatar_queue_lag_seconds() -> float:
+    """How long the oldest upload has been waiting for a worker thread, 0 when none is waiting."""
+    with _queued_lock:
+        oldest = min(_queued_at.values(), default=None)
+    return 0.0 if oldest is None else time.monotonic() - oldest
+
+
+def expire_stale_avatar_uploads(db: Session) -> int:
+    """Fail uploads whose worker is gone and drop their raw files; returns how many were expired.
+
+    The executor lives in process memory, so a restart or crash loses its queue. Other workers may
+    still be processing recent uploads, hence only those older than
+    ``AVATAR_PROCESSING_TIMEOUT_SECONDS`` are touched.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.avatar_processing_timeout_seconds)
+    stale = (
+        db.query(User)
+        .filter(
+            User.avatar_status == AVATAR_PROCESSING,
+            or_(User.avatar_requested_at.is_(None), User.avatar_requested_at < cutoff),
+        )
+        .all()
+    )
+    for user in stale:
+        user.avatar_status = AVATAR_FAILED
+        (AVATAR_INCOMING_DIR / f"{user.id}_{user.avatar_version}").unlink(missing_ok=True)
+    db.commit()
+    return len(stale)
+
+
+def shutdown_avatar_worker() -> None:
+    avatar_executor.shutdown(wait=True)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.session import connect_args, engine
+from app.services.avatars import avatar_queue_lag_seconds
+from app.services.meal_index import meal_index
+from app.services.media_store import media_store
+from app.services.survey_registry import survey_registry
+
+STATUS_OK = "ok"
+STATUS_FAIL = "fail"
+MEDIA_PROBE_NAME = ".readiness-probe"
+
+
+@dataclass
+class ProbeResult:
+    status: str
+    observed: float | None = None
+    threshold: float | None = None
+    detail: str | None = None
+    # seconds since the check actually ran; results are served from cache in between
+    age_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+
+def _within(observed: float, threshold: float, detail: str) -> ProbeResult:
+    status = STATUS_OK if observed <= threshold else STATUS_FAIL
+    return ProbeResult(status=status, observed=round(observed, 3), threshold=threshold, detail=detail)
+
+
+class CachedProbe:
+    """Runs one readiness check at most once per ``READINESS_CACHE_SECONDS`` however often it is asked."""
+
+    def __init__(self, check: Callable[[], ProbeResult]) -> None:
+        self.check = check
+        self._lock = threading.Lock()
+        self._result: ProbeResult | None = None
+        self._checked_at = 0.0
+
+    def result(self) -> ProbeResult:
+        # concurrent probes wait for the one check in flight instead of piling onto the database
+        with self._lock:
+            now = time.monotonic()
+            if self._result is None or now - self._checked_at >= settings.readiness_cache_seconds:
+                try:
+                    self._result = self.check()
+                except Exception as exc:  # noqa: BLE001 - any failure means "not ready"
+                    self._result = ProbeResult(status=STATUS_FAIL, detail=f"{exc.__class__.__name__}: {exc}")
+                self._checked_at = now = time.monotonic()
+            return ProbeResult(**{**asdict(self._result), "age_seconds": round(now - self._checked_at, 3)})
+
+
+_probe_engine: Engine | None = None
+
+
+def _database_probe_engine() -> Engine:
+    # its own unpooled connection, so an exhausted pool cannot block the probe (the pool check reports that)
+    global _probe_engine
+    if _probe_engine is None:
+        _probe_engine = create_engine(settings.database_url, poolclass=NullPool, connect_args=connect_args)
+    return _probe_engine
+
+
+def check_database() -> ProbeResult:
+    with _database_probe_engine().connect() as connection:
+        started = time.perf_counter()
+        connection.execute(text("SELECT 1")).scalar_one()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    return _within(elapsed_ms, settings.readiness_db_latency_ms, "SELECT 1 round trip, ms")
+
+
+def check_pool() -> ProbeResult:
+    pool = engine.pool
+    size = getattr(pool, "size", None)
+    if not callable(size):
+        return ProbeResult(status=STATUS_OK, detail=f"{pool.__class__.__name__} has no fixed size")
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    if max_overflow < 0:
+        return ProbeResult(status=STATUS_OK, detail="unlimited overflow")
+    capacity = size() + max_overflow
+    utilization = pool.checkedout() / capacity if capacity else 0.0
+    return _within(utilization, settings.readiness_pool_utilization, f"{pool.checkedout()} of {capacity} checked out")
+
+
+def check_media() -> ProbeResult:
+    root = media_store.local_path("")
+    started = time.perf_counter()
+    if root is None:
+        # a HEAD request proves the bucket is reachable with our credentials
+        media_store.backend.exists(MEDIA_PROBE_NAME)
+        detail = "bucket lookup, ms"
+    else:
+        probe = root / f"{MEDIA_PROBE_NAME}-{os.getpid()}"
+        probe.write_bytes(b"ok")
+        probe.unlink()
+        detail = "write and delete, ms"
+    return ProbeResult(status=STATUS_OK, observed=round((time.perf_counter() - started) * 1000, 3), detail=detail)
+
+
+def check_queues() -> ProbeResult:
+    return _within(avatar_queue_lag_seconds(), settings.readiness_queue_lag_seconds, "oldest waiting avatar upload, s")
+
+
+def check_caches() -> ProbeResult:
+    caches = {"meal_index": meal_index.loaded, "survey_registry": survey_registry.is_warm()}
+    cold = [name for name, warm in caches.items() if not warm]
+    if cold:
+        return ProbeResult(status=STATUS_FAIL, detail=f"not loaded: {', '.join(cold)}")
+    return ProbeResult(status=STATUS_OK, detail=", ".join(caches))
+
+
+READINESS_PROBES = {
+    "database": CachedProbe(check_database),
+    "pool": CachedProbe(check_pool),
+    "media": CachedProbe(check_media),
+    "queues": CachedProbe(check_queues),
+    "caches": CachedProbe(check_caches),
+}
+
+
+def readiness() -> tuple[bool, dict[str, ProbeResult]]:
+    results = {name: probe.result() for name, probe in READINESS_PROBES.items()}
+    return all(result.ok for result in results.values()), results
@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.allergens import allergen_mask, deserialize_allergens
+from app.models.nutrition_plan import NutritionPlan
+from app.models.plan_meal import PlanMeal
+from app.models.user import User
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+# calories, protein, carbs, fats -> roughly comparable units (100 kcal ~ 10 g protein ~ 5 g fat)
+MACRO_SCALE = np.array([1 / 100, 1 / 10, 1 / 10, 1 / 5], dtype=np.float32)
+MEAL_TYPE_WEIGHT = 4.0
+FEATURE_WIDTH = len(MACRO_SCALE) + len(MEAL_TYPES) + 1
+PUBLIC_OWNER_CODE = 0
+REPEAT_SUFFIX = " (pakartojimas)"
+
+_INITIAL_CAPACITY = 1024
+_PENDING_KEY = "meal_index_pending"
+
+
+class SwapNotAllowedError(ValueError):
+    """Raised when a chosen replacement breaks the rules swap candidates are picked by."""
+
+
+@dataclass
+class SwapCandidate:
+    meal_id: int
+    distance: float
+
+
+def meal_type_code(meal_type: str | None) -> int:
+    normalized = (meal_type or "").strip().lower()
+    if normalized in MEAL_TYPES:
+        return MEAL_TYPES.index(normalized)
+    return len(MEAL_TYPES)
+
+
+def build_feature_vector(
+    calories: int | None,
+    protein_grams: int | None,
+    carbs_grams: int | None,
+    fats_grams: int | None,
+    meal_type: str | None,
+) -> np.ndarray:
+    vector = np.zeros(FEATURE_WIDTH, dtype=np.float32)
+    vector[:4] = (
+        np.array([calories or 0, protein_grams or 0, carbs_grams or 0, fats_grams or 0], dtype=np.float32)
+        * MACRO_SCALE
+    )
+    vector[len(MACRO_SCALE) + meal_type_code(meal_type)] = MEAL_TYPE_WEIGHT
+    return vector
+
+
+def _base_title(title: str | None) -> str:
+    return (title or "").split(REPEAT_SUFFIX)[0].strip().lower()
+
+
+@dataclass
+class LibrarySnapshot:
+    meal_ids: np.ndarray
+    macros: np.ndarray
+    meal_types: np.ndarray
+    title_codes: np.ndarray
+
+
+class MealSimilarityIndex:
+    """Contiguous NumPy arrays of meal features, updated in place as meals change."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset(_INITIAL_CAPACITY)
+
+    def _reset(self, capacity: int) -> None:
+        self._size = 0
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._features = np.zeros((capacity, FEATURE_WIDTH), dtype=np.float32)
+        self._allergens = np.zeros(capacity, dtype=np.int32)
+        self._meal_types = np.zeros(capacity, dtype=np.int8)
+        self._owners = np.zeros(capacity, dtype=np.int32)
+        self._title_codes = np.zeros(capacity, dtype=np.int32)
+        self._rows: dict[int, int] = {}
+        self._owner_codes: dict[str, int] = {}
+        self._title_lookup: dict[str, int] = {}
+        self._plan_owners: dict[int, int] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _owner_code(self, owner_id: str | None) -> int:
+        if owner_id is None:
+            return PUBLIC_OWNER_CODE
+        code = self._owner_codes.get(owner_id)
+        if code is None:
+            code = len(self._owner_codes) + 1
+            self._owner_codes[owner_id] = code
+        return code
+
+    def _title_code(self, title: str | None) -> int:
+        base = _base_title(title)
+        code = self._title_lookup.get(base)
+        if code is None:
+            code = len(self._title_lookup)
+            self._title_lookup[base] = code
+        return code
+
+    def _grow(self) -> None:
+        capacity = max(len(self._ids) * 2, _INITIAL_CAPACITY)
+        self._ids = np.resize(self._ids, capacity)
+        features = np.zeros((capacity, FEATURE_WIDTH), dtype=np.float32)
+        features[: self._size] = self._features[: self._size]
+        self._features = features
+        self._allergens = np.resize(self._allergens, capacity)
+        self._meal_types = np.resize(self._meal_types, capacity)
+        self._owners = np.resize(self._owners, capacity)
+        self._title_codes = np.resize(self._title_codes, capacity)
+
+    def load(self, db: Session) -> None:
+        """Rebuild the whole index from the database in a single column query."""
+        rows = db.execute(
+            select(
+                PlanMeal.id,
+                PlanMeal.plan_id,
+                PlanMeal.meal_type,
+                PlanMeal.title,
+                PlanMeal.calories,
+                PlanMeal.protein_grams,
+                PlanMeal.carbs_grams,
+                PlanMeal.fats_grams,
+                PlanMeal.allergens,
+                NutritionPlan.owner_id,
+            ).join(NutritionPlan, NutritionPlan.id == PlanMeal.plan_id)
+        ).all()
+
+        with self._lock:
+            self._reset(max(_INITIAL_CAPACITY, len(rows)))
+            for row in rows:
+                self._plan_owners[row.plan_id] = self._owner_code(row.owner_id)
+                self._upsert_locked(
+                    row.id,
+                    row.plan_id,
+                    row.meal_type,
+                    row.title,
+                    row.calories,
+                    row.protein_grams,
+                    row.carbs_grams,
+                    row.fats_grams,
+                    row.allergens,
+                )
+            self._loaded = True
+
+    def register_plan(self, plan_id: int, owner_id: str | None) -> None:
+        with self._lock:
+            self._plan_owners[plan_id] = self._owner_code(owner_id)
+
+    def upsert(
+        self,
+        meal_id: int,
+        plan_id: int,
+        meal_type: str | None,
+        title: str | None,
+        calories: int | None,
+        protein_grams: int | None,
+        carbs_grams: int | None,
+        fats_grams: int | None,
+        allergens: str | None,
+    ) -> None:
+        with self._lock:
+            self._upsert_locked(
+                meal_id, plan_id, meal_type, title, calories, protein_grams, carbs_grams, fats_grams, allergens
+            )
+
+    def _upsert_locked(
+        self,
+        meal_id: int,
+        plan_id: int,
+        meal_type: str | None,
+        title: str | None,
+        calories: int | None,
+        protein_grams: int | None,
+        carbs_grams: int | None,
+        fats_grams: int | None,
+        allergens: str | None,
+    ) -> None:
+        row = self._rows.get(meal_id)
+        if row is None:
+            if self._size == len(self._ids):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[meal_id] = row
+        self._ids[row] = meal_id
+        self._features[row] = build_feature_vector(calories, protein_grams, carbs_grams, fats_grams, meal_type)
+        self._allergens[row] = allergen_mask(deserialize_allergens(allergens))
+        self._meal_types[row] = meal_type_code(meal_type)
+        self._owners[row] = self._plan_owners.get(plan_id, PUBLIC_OWNER_CODE)
+        self._title_codes[row] = self._title_code(title)
+
+    def remove(self, meal_id: int) -> None:
+        with self._lock:
+            row = self._rows.pop(meal_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                # keep the arrays dense by moving the last row into the freed slot
+                moved_id = int(self._ids[last])
+                self._ids[row] = self._ids[last]
+                self._features[row] = self._features[last]
+                self._allergens[row] = self._allergens[last]
+                self._meal_types[row] = self._meal_types[last]
+                self._owners[row] = self._owners[last]
+                self._title_codes[row] = self._title_codes[last]
+                self._rows[moved_id] = row
+            self._size = last
+
+    def snapshot(self, *, excluded_allergens: int = 0, owner_id: str | None = None) -> LibrarySnapshot:
+        """Copy out the visible, allergen-safe part of the index for batch solvers."""
+        with self._lock:
+            size = self._size
+            allowed = (self._allergens[:size] & excluded_allergens) == 0
+            visible = self._owners[:size] == PUBLIC_OWNER_CODE
+            if owner_id is not None and owner_id in self._owner_codes:
+                visible |= self._owners[:size] == self._owner_codes[owner_id]
+            allowed &= visible
+            return LibrarySnapshot(
+                meal_ids=self._ids[:size][allowed],
+                macros=np.ascontiguousarray(self._features[:size, : len(MACRO_SCALE)][allowed]),
+                meal_types=self._meal_types[:size][allowed],
+                title_codes=self._title_codes[:size][allowed],
+            )
+
+    def top_k(
+        self,
+        vector: np.ndarray,
+        k: int,
+        *,
+        excluded_allergens: int = 0,
+        meal_type: str | None = None,
+        owner_id: str | None = None,
+        exclude_ids: Iterable[int] = (),
+        exclude_titles: Iterable[str] = (),
+    ) -> list[SwapCandidate]:
+        """Return the ``k`` nearest visible meals that carry none of the excluded allergens."""
+        with self._lock:
+            size = self._size
+            if size == 0 or k <= 0:
+                return []
+
+            allowed = (self._allergens[:size] & excluded_allergens) == 0
+            visible = self._owners[:size] == PUBLIC_OWNER_CODE
+            if owner_id is not None and owner_id in self._owner_codes:
+                visible |= self._owners[:size] == self._owner_codes[owner_id]
+            allowed &= visible
+            if meal_type is not None:
+                allowed &= self._meal_types[:size] == meal_type_code(meal_type)
+            for meal_id in exclude_ids:
+                row = self._rows.get(meal_id)
+                if row is not None:
+                    allowed[row] = False
+
+            diff = self._features[:size] - vector
+            distances = np.einsum("ij,ij->i", diff, diff)
+            distances[~allowed] = np.inf
+
+            available = int(np.count_nonzero(allowed))
+            skipped_titles = {
+                self._title_lookup[_base_title(title)]
+                for title in exclude_titles
+                if _base_title(title) in self._title_lookup
+            }
+            results: list[SwapCandidate] = []
+            window = min(available, k * 4)
+            while window > 0:
+                nearest = np.argpartition(distances, window - 1)[:window]
+                nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+                results = []
+                seen_titles = set(skipped_titles)
+                for row in nearest:
+                    title = int(self._title_codes[row])
+                    if title in seen_titles:
+                        continue
+                    seen_titles.add(title)
+                    results.append(SwapCandidate(meal_id=int(self._ids[row]), distance=float(np.sqrt(distances[row]))))
+                    if len(results) == k:
+                        return results
+                if window == available:
+                    break
+                window = min(available, window * 4)
+            return results
+
+
+meal_index = MealSimilarityIndex()
+
+
+def ensure_index_loaded(db: Session) -> MealSimilarityIndex:
+    if not meal_index.loaded:
+        meal_index.load(db)
+    return meal_index
+
+
+def ensure_swap_allowed(user: User, meal_type: str | None, replacement: PlanMeal) -> None:
+    """Apply the ``find_swap_candidates`` constraints to a replacement the client picked itself."""
+    if meal_type_code(replacement.meal_type) != meal_type_code(meal_type):
+        raise SwapNotAllowedError("Replacement meal must be of the same meal type")
+    user_allergens = allergen_mask(deserialize_allergens(user.allergies))
+    if allergen_mask(deserialize_allergens(replacement.allergens)) & user_allergens:
+        raise SwapNotAllowedError("Replacement meal contains your allergens")
+
+
+def find_swap_candidates(
+    db: Session,
+    user: User,
+    *,
+    meal_type: str,
+    title: str | None,
+    calories: int | None,
+    protein_grams: int | None,
+    carbs_grams: int | None,
+    fats_grams: int | None,
+    exclude_ids: Iterable[int] = (),
+    limit: int = 5,
+) -> list[tuple[PlanMeal, float]]:
+    """Find meals with similar macros in the same meal slot that avoid the user's allergies."""
+    index = ensure_index_loaded(db)
+    vector = build_feature_vector(calories, protein_grams, carbs_grams, fats_grams, meal_type)
+    candidates = index.top_k(
+        vector,
+        limit,
+        excluded_allergens=allergen_mask(deserialize_allergens(user.allergies)),
+        meal_type=meal_type,
+        owner_id=user.id,
+        exclude_ids=exclude_ids,
+        exclude_titles=[title] if title else [],
+    )
+    if not candidates:
+        return []
+
+    meals = {
+        meal.id: meal
+        for meal in db.query(PlanMeal).filter(PlanMeal.id.in_([candidate.meal_id for candidate in candidates]))
+    }
+    return [
+        (meals[candidate.meal_id], candidate.distance)
+        for candidate in candidates
+        if candidate.meal_id in meals
+    ]
+
+
+def _queue_change(target: PlanMeal, deleted: bool) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    pending: dict[int, tuple | None] = session.info.setdefault(_PENDING_KEY, {})
+    if deleted:
+        pending[target.id] = None
+        return
+    pending[target.id] = (
+        target.plan_id,
+        target.meal_type,
+        target.title,
+        target.calories,
+        target.protein_grams,
+        target.carbs_grams,
+        target.fats_grams,
+        target.allergens,
+    )
+
+
+@event.listens_for(NutritionPlan, "after_insert")
+def _register_plan_owner(mapper, connection, target: NutritionPlan) -> None:  # noqa: ANN001
+    meal_index.register_plan(target.id, target.owner_id)
+
+
+@event.listens_for(PlanMeal, "after_insert")
+@event.listens_for(PlanMeal, "after_update")
+def _queue_meal_upsert(mapper, connection, target: PlanMeal) -> None:  # noqa: ANN001
+    _queue_change(target, deleted=False)
+
+
+@event.listens_for(PlanMeal, "after_delete")
+def _queue_meal_delete(mapper, connection, target: PlanMeal) -> None:  # noqa: ANN001
+    _queue_change(target, deleted=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not meal_index.loaded:
+        return
+    for meal_id, snapshot in pending.items():
+        if snapshot is None:
+            meal_index.remove(meal_id)
+        else:
+            meal_index.upsert(meal_id, *snapshot)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterator
+
+from sqlalchemy import String, cast, delete, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.media_blob import MediaBlob
+from app.models.plan_purchase import PlanPurchase
+from app.models.user import User
+from app.services.media_store import MediaStore, media_store
+from app.services.storage import StoredObject
+
+# directories written before the content-addressed store; nothing new lands there
+LEGACY_MEDIA_DIRS = ("profile_pictures", "purchases")
+
+
+@dataclass
+class MediaGCReport:
+    examined: int = 0
+    deleted_files: int = 0
+    reclaimed_bytes: int = 0
+    # blobs whose count had dropped to zero although a row still pointed at them
+    repaired: int = 0
+    missing_files: int = 0
+    pending_files: int = 0
+    pending_bytes: int = 0
+
+
+def referenced_keys(db: Session, keys: list[str], store: MediaStore = media_store) -> dict[str, int]:
+    """Count the purchases and user avatars that still point at each of ``keys``."""
+    counts = dict.fromkeys(keys, 0)
+    if not keys:
+        return counts
+
+    receipts = (
+        db.query(PlanPurchase.pdf_path, func.count())
+        .filter(PlanPurchase.pdf_path.in_(keys))
+        .group_by(PlanPurchase.pdf_path)
+    )
+    for pdf_path, references in receipts:
+        counts[pdf_path] += references
+
+    # avatar URLs carry the public base URL in front of the key, so the SQL match is only a
+    # prefilter and the exact keys are compared below
+    variants_text = cast(User.avatar_variants, String)
+    users = db.query(User.avatar_url, User.avatar_variants).filter(
+        or_(*(or_(User.avatar_url.endswith(key), variants_text.contains(key)) for key in keys))
+    )
+    for avatar_url, avatar_variants in users:
+        for key in store.avatar_keys(avatar_url, avatar_variants):
+            if key in counts:
+                counts[key] += 1
+    return counts
+
+
+def collect_blob_batch(
+    db: Session,
+    *,
+    after_key: str,
+    cutoff: datetime,
+    batch_size: int,
+    report: MediaGCReport,
+    dry_run: bool = False,
+    store: MediaStore = media_store,
+) -> str | None:
+    """Delete one batch of blobs unreferenced since before ``cutoff``; returns the last key seen.
+
+    Candidates come from the ``released_at`` index, so a run never walks the media tree. Each
+    file is renamed aside before its row is deleted; if an upload re-referenced the blob in the
+    meantime the conditional delete skips it and the file is put back.
+    """
+    blobs = (
+        db.query(MediaBlob)
+        .filter(
+            MediaBlob.ref_count <= 0,
+            MediaBlob.released_at <= cutoff,
+            MediaBlob.key > after_key,
+        )
+        .order_by(MediaBlob.key)
+        .limit(batch_size)
+        .all()
+    )
+    if not blobs:
+        return None
+    last_key = blobs[-1].key
+    report.examined += len(blobs)
+
+    live = referenced_keys(db, [blob.key for blob in blobs], store)
+    doomed: dict[str, int] = {}
+    for blob in blobs:
+        if live[blob.key]:
+            blob.ref_count = live[blob.key]
+            blob.released_at = None
+            report.repaired += 1
+        else:
+            doomed[blob.key] = blob.size_bytes
+
+    if dry_run:
+        db.rollback()
+        report.deleted_files += len(doomed)
+        report.reclaimed_bytes += sum(doomed.values())
+        return last_key
+
+    set_aside = {key: store.backend.set_aside(key) for key in doomed}
+
+    deleted: set[str] = set()
+    if doomed:
+        deleted = set(
+            db.execute(
+                delete(MediaBlob)
+                .where(MediaBlob.key.in_(list(doomed)), MediaBlob.ref_count <= 0)
+                .returning(MediaBlob.key)
+                .execution_options(synchronize_session=False)
+            ).scalars()
+        )
+    db.commit()
+
+    for key, token in set_aside.items():
+        if key not in deleted:
+            if token is not None:
+                store.backend.restore(key, token)
+            continue
+        if token is None:
+            report.missing_files += 1
+            continue
+        store.backend.purge(token)
+        report.deleted_files += 1
+        report.reclaimed_bytes += doomed[key]
+    return last_key
+
+
+def count_pending_blobs(db: Session, cutoff: datetime, report: MediaGCReport) -> None:
+    """Record unreferenced blobs that are still inside the grace period."""
+    files, size = (
+        db.query(func.count(MediaBlob.key), func.coalesce(func.sum(MediaBlob.size_bytes), 0))
+        .filter(MediaBlob.ref_count <= 0, MediaBlob.released_at > cutoff)
+        .one()
+    )
+    report.pending_files += files
+    report.pending_bytes += size
+
+
+def iter_legacy_files(store: MediaStore = media_store) -> Iterator[StoredObject]:
+    """Yield the files of the pre-store directories in a stable order."""
+    for directory in LEGACY_MEDIA_DIRS:
+        yield from store.backend.iter_objects(directory)
+
+
+def collect_legacy_batch(
+    db: Session,
+    files: list[StoredObject],
+    *,
+    cutoff: datetime,
+    report: MediaGCReport,
+    dry_run: bool = False,
+    store: MediaStore = media_store,
+) -> None:
+    """Delete pre-store files that no row references and that are older than ``cutoff``."""
+    report.examined += len(files)
+    live = referenced_keys(db, [stored.key for stored in files], store)
+    db.rollback()
+    cutoff_timestamp = cutoff.replace(tzinfo=timezone.utc).timestamp()
+    for stored in files:
+        if live[stored.key]:
+            continue
+        if stored.modified > cutoff_timestamp:
+            report.pending_files += 1
+            report.pending_bytes += stored.size
+            continue
+        if not dry_run:
+            store.backend.delete(stored.key)
+        report.deleted_files += 1
+        report.reclaimed_bytes += stored.size
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+from email.utils import formatdate
+from mimetypes import guess_type
+from pathlib import Path, PurePosixPath
+from typing import Iterator
+from urllib.parse import quote
+
+from fastapi.staticfiles import StaticFiles
+from starlette.requests import Request
+from starlette.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from starlette.types import Scope
+
+from app.services.media_store import IMMUTABLE_CACHE_CONTROL, is_blob_key
+
+PRIVATE_IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+# a presigned URL expires, so the redirect to it must not outlive it in any cache
+PRESIGNED_REDIRECT_CACHE_CONTROL = "private, no-store"
+RANGE_CHUNK_SIZE = 64 * 1024
+
+OFFLOAD_NONE = "none"
+OFFLOAD_X_ACCEL_REDIRECT = "x-accel-redirect"
+OFFLOAD_X_SENDFILE = "x-sendfile"
+
+
+class RangeNotSatisfiableError(ValueError):
+    """Raised when a ``Range`` header asks for bytes beyond the end of the file."""
+
+
+def media_etag(key: str, stat_result: os.stat_result) -> str:
+    """Strong ETag: the content hash for blobs, size and mtime for files written before the store."""
+    if is_blob_key(key):
+        return f'"{PurePosixPath(key).name.split(".", 1)[0]}"'
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def parse_byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """Return the inclusive ``(start, end)`` of a single-range header, or ``None`` to serve the whole file.
+
+    Multi-range and malformed headers are ignored, which RFC 9110 allows.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, separator, last = spec.strip().partition("-")
+    if not separator:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiableError(header)
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiableError(header)
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _iter_file_range(path: Path, start: int, length: int) -> Iterator[bytes]:
+    with path.open("rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def media_file_response(
+    request: Request,
+    path: Path,
+    key: str,
+    *,
+    cache_control: str,
+    media_type: str | None = None,
+    filename: str | None = None,
+    offload: str = OFFLOAD_NONE,
+    accel_redirect_prefix: str = "",
+    stat_result: os.stat_result | None = None,
+) -> Response:
+    """Serve one stored media file with validators, conditional GET and single byte ranges.
+
+    With ``offload`` the response carries only headers and the front proxy sends the bytes
+    (nginx ``X-Accel-Redirect`` or Apache/lighttpd ``X-Sendfile``). Raises ``FileNotFoundError``
+    when the file is missing.
+    """
+    stat_result = stat_result or os.stat(path)
+    media_type = media_type or guess_type(path.name)[0] or "application/octet-stream"
+    headers = {
+        "etag": media_etag(key, stat_result),
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": cache_control,
+        "accept-ranges": "bytes",
+    }
+    if filename is not None:
+        headers["content-disposition"] = _content_disposition(filename)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["etag"]):
+        headers.pop("content-disposition", None)
+        return Response(status_code=304, headers=headers)
+
+    if offload == OFFLOAD_X_ACCEL_REDIRECT:
+        headers["x-accel-redirect"] = f"{accel_redirect_prefix.rstrip('/')}/{key}"
+        return Response(media_type=media_type, headers=headers)
+    if offload == OFFLOAD_X_SENDFILE:
+        headers["x-sendfile"] = str(path.resolve())
+        return Response(media_type=media_type, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == headers["etag"]):
+        size = stat_result.st_size
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except RangeNotSatisfiableError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(length)
+            if request.method == "HEAD":
+                return Response(status_code=206, media_type=media_type, headers=headers)
+            return StreamingResponse(
+                _iter_file_range(path, start, length),
+                status_code=206,
+                media_type=media_type,
+                headers=headers,
+            )
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+
+def presigned_redirect(url: str) -> RedirectResponse:
+    return RedirectResponse(url, status_code=307, headers={"cache-control": PRESIGNED_REDIRECT_CACHE_CONTROL})
+
+
+class MediaFiles(StaticFiles):
+    """``StaticFiles`` for the media root: far-future caching for blobs, ranges for everything."""
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        if status_code != 200 or self.directory is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        key = Path(os.path.relpath(full_path, os.path.realpath(self.directory))).as_posix()
+        return media_file_response(
+            Request(scope),
+            Path(full_path),
+            key,
+            cache_control=IMMUTABLE_CACHE_CONTROL if is_blob_key(key) else REVALIDATE_CACHE_CONTROL,
+            stat_result=stat_result,
+        )
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import mimetypes
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import case, event, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.sql.dml import Update
+
+from app.core.config import settings
+from app.models.media_blob import MediaBlob
+from app.models.plan_purchase import PlanPurchase
+from app.models.user import User
+from app.services.storage import StorageBackend, build_storage_backend
+
+logger = logging.getLogger(__name__)
+
+MEDIA_URL_PREFIX = "/media"
+# blob keys embed the content hash, so a URL can never start pointing at different bytes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+BLOB_DIR = "blobs"
+HASH_CHUNK_SIZE = 1024 * 1024
+# per-transaction bookkeeping in ``Session.info``, settled when the transaction ends
+_WRITTEN_KEYS = "media_store_written"
+_LEGACY_DELETES = "media_store_legacy_deletes"
+
+
+def is_blob_key(key: str) -> bool:
+    return key.startswith(f"{BLOB_DIR}/")
+
+
+def _release_statement(key: str) -> Update:
+    return (
+        update(MediaBlob)
+        .where(MediaBlob.key == key, MediaBlob.ref_count > 0)
+        .values(
+            ref_count=MediaBlob.ref_count - 1,
+            released_at=case((MediaBlob.ref_count == 1, datetime.utcnow()), else_=MediaBlob.released_at),
+        )
+    )
+
+
+class MediaStore:
+    """Stores media once per content hash under ``blobs/aa/bb/<sha256><ext>`` and counts references.
+
+    Keys are paths relative to the storage backend root, so keys of files written before the store
+    existed (``purchases/...pdf``) resolve the same way. Files whose count drops to zero, and files
+    stored by a transaction that never commits, are left for the media garbage collector.
+    """
+
+    def __init__(self, backend: StorageBackend) -> None:
+        self.backend = backend
+
+    @staticmethod
+    def key_for(digest: str, extension: str) -> str:
+        return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}"
+
+    def local_path(self, key: str) -> Path | None:
+        return self.backend.local_path(key)
+
+    def url_path(self, key: str) -> str:
+        return f"{MEDIA_URL_PREFIX}/{key}"
+
+    def public_url(self, key: str, base_url: str) -> str:
+        """Permanent URL of ``key``: the bucket/CDN when configured, otherwise the API's ``/media``."""
+        return self.backend.public_url(key) or f"{base_url}{self.url_path(key)}"
+
+    def presigned_url(self, key: str, *, filename: str | None = None, content_type: str | None = None) -> str | None:
+        return self.backend.presigned_url(
+            key,
+            expires_in=settings.media_presign_expires_seconds,
+            filename=filename,
+            content_type=content_type,
+        )
+
+    def key_from_url(self, url: str | None) -> str | None:
+        if not url:
+            return None
+        public_prefix = self.backend.public_url("")
+        if public_prefix and url.startswith(public_prefix):
+            return url[len(public_prefix):]
+        marker = f"{MEDIA_URL_PREFIX}/"
+        index = url.find(marker)
+        return url[index + len(marker):] if index >= 0 else None
+
+    @staticmethod
+    def _content_type(extension: str) -> str:
+        return mimetypes.guess_type(f"media{extension.lower()}")[0] or "application/octet-stream"
+
+    def put_file(self, db: Session, source: Path, extension: str) -> str:
+        """Move ``source`` into the store (or drop it if the content exists) and add a reference."""
+        digest = hashlib.sha256()
+        with source.open("rb") as handle:
+            while chunk := handle.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        key = self.key_for(digest.hexdigest(), extension)
+        source_size = source.stat().st_size
+        # reference first: the row lock keeps the garbage collector off this blob until commit
+        self._add_reference(db, key, digest.hexdigest(), source_size)
+        if self.backend.exists(key):
+            source.unlink(missing_ok=True)
+        else:
+            self.backend.save_file(
+                key, source, content_type=self._content_type(extension), cache_control=IMMUTABLE_CACHE_CONTROL
+            )
+            db.info.setdefault(_WRITTEN_KEYS, {})[key] = (digest.hexdigest(), source_size)
+        return key
+
+    def put_bytes(self, db: Session, data: bytes, extension: str) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        key = self.key_for(digest, extension)
+        self._add_reference(db, key, digest, len(data))
+        if not self.backend.exists(key):
+            self.backend.save_bytes(
+                key, data, content_type=self._content_type(extension), cache_control=IMMUTABLE_CACHE_CONTROL
+            )
+            db.info.setdefault(_WRITTEN_KEYS, {})[key] = (digest, len(data))
+        return key
+
+    def avatar_keys(self, avatar_url: str | None, avatar_variants: dict[str, dict[str, str]] | None) -> list[str]:
+        """Keys referenced by a user's avatar: every variant, or the single pre-variant upload."""
+        urls = [url for formats in (avatar_variants or {}).values() for url in formats.values()] or [avatar_url]
+        keys = (self.key_from_url(url) for url in urls)
+        return [key for key in keys if key]
+
+    def release(self, db: Session, key: str | None) -> None:
+        """Drop one reference; files written before the store existed are deleted once ``db`` commits."""
+        if not key:
+            return
+        if not is_blob_key(key):
+            db.info.setdefault(_LEGACY_DELETES, []).append(key)
+            return
+        db.execute(_release_statement(key))
+
+    def _add_reference(self, db: Session, key: str, digest: str, size: int) -> None:
+        values = {"key": key, "sha256": digest, "size_bytes": size, "ref_count": 1, "created_at": datetime.utcnow()}
+        dialect = db.get_bind().dialect.name
+        if dialect in {"sqlite", "postgresql"}:
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            statement = insert(MediaBlob).values(values)
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[MediaBlob.key],
+                    set_={"ref_count": MediaBlob.ref_count + 1, "released_at": None},
+                )
+            )
+            return
+        blob = db.get(MediaBlob, key, with_for_update=True)
+        if blob is None:
+            db.add(MediaBlob(**values))
+        else:
+            blob.ref_count += 1
+            blob.released_at = None
+        db.flush()
+
+
+media_store = MediaStore(build_storage_backend())
+
+
+# rows removed through ORM cascades (user -> purchases) give their media back as well;
+# files of pre-store keys are left to the legacy sweep since the transaction may still roll back
+@event.listens_for(PlanPurchase, "before_delete")
+def _release_purchase_media(mapper, connection: Connection, target: PlanPurchase) -> None:  # noqa: ANN001
+    if target.pdf_path and is_blob_key(target.pdf_path):
+        connection.execute(_release_statement(target.pdf_path))
+
+
+@event.listens_for(User, "before_delete")
+def _release_user_media(mapper, connection: Connection, target: User) -> None:  # noqa: ANN001
+    for key in media_store.avatar_keys(target.avatar_url, target.avatar_variants):
+        if is_blob_key(key):
+            connection.execute(_release_statement(key))
+
+
+@event.listens_for(Session, "after_commit")
+def _settle_committed_media(session: Session) -> None:
+    session.info.pop(_WRITTEN_KEYS, None)
+    for key in session.info.pop(_LEGACY_DELETES, []):
+        try:
+            media_store.backend.delete(key)
+        except Exception:  # noqa: BLE001 - the row change is committed; the legacy sweep retries
+            logger.exception("Could not delete legacy media file %s", key)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _orphan_uncommitted_media(session: Session, transaction: SessionTransaction) -> None:
+    # after_commit has already settled committed transactions; anything left was rolled back or closed
+    if transaction.parent is not None:
+        return
+    session.info.pop(_LEGACY_DELETES, None)
+    written = session.info.pop(_WRITTEN_KEYS, None)
+    if not written:
+        return
+    # files stored for a rolled-back reference get an unreferenced row so the garbage collector
+    # finds them; keys another transaction committed in the meantime keep their row as it is
+    now = datetime.utcnow()
+    rows = [
+        {"key": key, "sha256": digest, "size_bytes": size, "ref_count": 0, "created_at": now, "released_at": now}
+        for key, (digest, size) in written.items()
+    ]
+    try:
+        with session.get_bind().begin() as connection:
+            dialect = connection.dialect.name
+            if dialect in {"sqlite", "postgresql"}:
+                statement = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(MediaBlob)
+                connection.execute(statement.on_conflict_do_nothing(index_elements=[MediaBlob.key]), rows)
+                return
+            known = set(connection.scalars(select(MediaBlob.key).where(MediaBlob.key.in_(list(written)))))
+            missing = [row for row in rows if row["key"] not in known]
+            if missing:
+                connection.execute(insert(MediaBlob), missing)
+    except Exception:  # noqa: BLE001 - the caller's error matters more than this bookkeeping
+        logger.exception("Could not record orphaned media files %s", sorted(written))
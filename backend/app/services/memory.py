@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import gc
+import os
+import threading
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Literal
+
+from app.core.config import settings
+
+GroupBy = Literal["lineno", "filename", "traceback"]
+
+# allocations made by tracemalloc itself and the import machinery only add noise to diffs
+_NOISE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryTracingError(RuntimeError):
+    """Raised for snapshot requests that do not fit the tracer's current state."""
+
+
+@dataclass
+class AllocationStat:
+    location: str
+    size_bytes: int
+    count: int
+    size_diff_bytes: int = 0
+    count_diff: int = 0
+    traceback: list[str] = field(default_factory=list)
+
+
+@dataclass
+class SnapshotInfo:
+    id: int
+    label: str | None
+    taken_at: datetime
+    traced_bytes: int
+    blocks: int
+
+
+@dataclass
+class MemoryStatus:
+    pid: int
+    tracing: bool
+    frames: int
+    traced_bytes: int
+    traced_peak_bytes: int
+    rss_bytes: int | None
+    gc_counts: list[int]
+    gc_collections: list[int]
+    gc_uncollectable: list[int]
+    gc_garbage: int
+    snapshots: list[SnapshotInfo]
+
+
+def resident_set_bytes() -> int | None:
+    """Current RSS of this process from ``/proc``; ``None`` where procfs is missing."""
+    try:
+        with open("/proc/self/statm", "rb") as handle:
+            resident_pages = int(handle.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _location(trace: tracemalloc.Traceback, group_by: GroupBy) -> str:
+    # frames run from the oldest to the most recent one, the allocation site is the last
+    frame = trace[-1]
+    return frame.filename if group_by == "filename" else f"{frame.filename}:{frame.lineno}"
+
+
+class MemoryTracer:
+    """Process-wide tracemalloc session with a bounded list of stored snapshots.
+
+    Every worker process traces on its own, so requests that should compare snapshots have to reach
+    the same worker; responses carry the ``pid`` to check that.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshots: dict[int, tuple[SnapshotInfo, tracemalloc.Snapshot]] = {}
+        self._next_id = 1
+
+    def start(self, frames: int) -> None:
+        with self._lock:
+            if tracemalloc.is_tracing():
+                if tracemalloc.get_traceback_limit() == frames:
+                    return
+                # a new traceback depth makes older snapshots incomparable
+                tracemalloc.stop()
+                self._snapshots.clear()
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        with self._lock:
+            tracemalloc.stop()
+            self._snapshots.clear()
+
+    def take_snapshot(self, label: str | None = None) -> SnapshotInfo:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise MemoryTracingError("Atminties sekimas neįjungtas.")
+            snapshot = tracemalloc.take_snapshot().filter_traces(_NOISE_FILTERS)
+            stats = snapshot.statistics("filename")
+            info = SnapshotInfo(
+                id=self._next_id,
+                label=label,
+                taken_at=datetime.utcnow(),
+                traced_bytes=sum(stat.size for stat in stats),
+                blocks=sum(stat.count for stat in stats),
+            )
+            self._next_id += 1
+            self._snapshots[info.id] = (info, snapshot)
+            # oldest snapshots go first, each one can hold tens of megabytes of traces
+            while len(self._snapshots) > settings.memory_snapshot_limit:
+                del self._snapshots[min(self._snapshots)]
+            return info
+
+    def _snapshot(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        entry = self._snapshots.get(snapshot_id)
+        if entry is None:
+            raise MemoryTracingError(f"Atminties momentinė kopija {snapshot_id} nerasta.")
+        return entry[1]
+
+    def top(self, snapshot_id: int, group_by: GroupBy = "lineno", limit: int = 30) -> list[AllocationStat]:
+        """Largest allocation sites of one snapshot."""
+        with self._lock:
+            snapshot = self._snapshot(snapshot_id)
+        return [
+            AllocationStat(
+                location=_location(stat.traceback, group_by),
+                size_bytes=stat.size,
+                count=stat.count,
+                traceback=stat.traceback.format() if group_by == "traceback" else [],
+            )
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+
+    def diff(
+        self, first_id: int, second_id: int, group_by: GroupBy = "lineno", limit: int = 30
+    ) -> list[AllocationStat]:
+        """Allocation sites that grew (or shrank) the most from ``first_id`` to ``second_id``."""
+        with self._lock:
+            first = self._snapshot(first_id)
+            second = self._snapshot(second_id)
+        return [
+            AllocationStat(
+                location=_location(stat.traceback, group_by),
+                size_bytes=stat.size,
+                count=stat.count,
+                size_diff_bytes=stat.size_diff,
+                count_diff=stat.count_diff,
+                traceback=stat.traceback.format() if group_by == "traceback" else [],
+            )
+            for stat in second.compare_to(first, group_by)[:limit]
+        ]
+
+    def status(self) -> MemoryStatus:
+        tracing = tracemalloc.is_tracing()
+        traced, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        generations = gc.get_stats()
+        with self._lock:
+            snapshots = [info for info, _ in self._snapshots.values()]
+        return MemoryStatus(
+            pid=os.getpid(),
+            tracing=tracing,
+            frames=tracemalloc.get_traceback_limit() if tracing else 0,
+            traced_bytes=traced,
+            traced_peak_bytes=peak,
+            rss_bytes=resident_set_bytes(),
+            gc_counts=list(gc.get_count()),
+            gc_collections=[generation["collections"] for generation in generations],
+            gc_uncollectable=[generation["uncollectable"] for generation in generations],
+            gc_garbage=len(gc.garbage),
+            snapshots=snapshots,
+        )
+
+
+memory_tracer = MemoryTracer()
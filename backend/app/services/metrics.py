@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import anyio.to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.memory import memory_tracer
+
+UNMATCHED_ROUTE = "unmatched"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+QUERY_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+REQUESTS = Counter(
+    "fitbite_http_requests_total",
+    "HTTP requests by route and status code.",
+    ["method", "route", "handler", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "fitbite_http_request_duration_seconds",
+    "Time from receiving a request until its response body was sent.",
+    ["method", "route", "handler"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "fitbite_http_requests_in_progress",
+    "Requests currently being handled.",
+    multiprocess_mode="livesum",
+)
+REQUEST_QUERIES = Histogram(
+    "fitbite_db_queries_per_request",
+    "SQL statements executed while handling one request.",
+    ["route", "handler"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_TIME = Histogram(
+    "fitbite_db_query_seconds_per_request",
+    "Total SQL execution time of one request.",
+    ["route", "handler"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_LATENCY = Histogram(
+    "fitbite_db_query_duration_seconds",
+    "Execution time of single SQL statements.",
+    buckets=QUERY_TIME_BUCKETS,
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "fitbite_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool.",
+    buckets=QUERY_TIME_BUCKETS,
+)
+POOL_CHECKED_OUT = Gauge(
+    "fitbite_db_pool_checked_out_connections",
+    "Connections currently checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_BUSY = Gauge(
+    "fitbite_threadpool_busy_threads",
+    "Worker threads running sync endpoints and dependencies.",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_LIMIT = Gauge(
+    "fitbite_threadpool_max_threads",
+    "Size of the threadpool used for sync endpoints.",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_WAITING = Gauge(
+    "fitbite_threadpool_waiting_tasks",
+    "Sync calls queued because every worker thread is busy.",
+    multiprocess_mode="livesum",
+)
+
+# per worker: a single creeping worker is what memory leaks look like
+PROCESS_RSS = Gauge(
+    "fitbite_process_resident_memory_bytes",
+    "Resident set size of the worker process.",
+    multiprocess_mode="liveall",
+)
+TRACED_MEMORY = Gauge(
+    "fitbite_tracemalloc_traced_bytes",
+    "Memory traced by tracemalloc, 0 while tracing is off.",
+    multiprocess_mode="liveall",
+)
+GC_PENDING = Gauge(
+    "fitbite_gc_pending_objects",
+    "Allocations minus deallocations since the last collection of each generation (gc.get_count).",
+    ["generation"],
+    multiprocess_mode="liveall",
+)
+GC_COLLECTIONS = Gauge(
+    "fitbite_gc_collections",
+    "Collections of each generation since the worker started.",
+    ["generation"],
+    multiprocess_mode="liveall",
+)
+GC_UNCOLLECTABLE = Gauge(
+    "fitbite_gc_uncollectable_objects",
+    "Objects the collector found uncollectable, per generation.",
+    ["generation"],
+    multiprocess_mode="liveall",
+)
+
+_memory_sampler_stop = threading.Event()
+_memory_sampler: threading.Thread | None = None
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    query_seconds: float = 0.0
+
+
+# the stats object is shared with threadpool workers, which run in a copy of the request context
+_current_request: ContextVar[RequestStats | None] = ContextVar("metrics_request", default=None)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _current_request.get()
+
+
+def _route_labels(scope: Scope) -> tuple[str, str]:
+    route = scope.get("route")
+    if route is not None:
+        return route.path, getattr(route.endpoint, "__name__", route.name)
+    # mounted apps (``/media``) report their mount point, anything else would explode cardinality
+    root_path = scope.get("root_path") or ""
+    app_root = scope.get("app_root_path", "")
+    if root_path and root_path != app_root:
+        return root_path[len(app_root):], "mount"
+    return UNMATCHED_ROUTE, UNMATCHED_ROUTE
+
+
+def sample_threadpool() -> None:
+    """Record how many of the sync-endpoint threads are busy; needs a running event loop."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    THREADPOOL_BUSY.set(statistics.borrowed_tokens)
+    THREADPOOL_LIMIT.set(statistics.total_tokens)
+    THREADPOOL_WAITING.set(statistics.tasks_waiting)
+
+
+def sample_memory() -> None:
+    """Record RSS, tracemalloc and garbage collector statistics of this worker."""
+    status = memory_tracer.status()
+    if status.rss_bytes is not None:
+        PROCESS_RSS.set(status.rss_bytes)
+    TRACED_MEMORY.set(status.traced_bytes)
+    for generation, pending in enumerate(status.gc_counts):
+        GC_PENDING.labels(str(generation)).set(pending)
+    for generation, collections in enumerate(status.gc_collections):
+        GC_COLLECTIONS.labels(str(generation)).set(collections)
+    for generation, uncollectable in enumerate(status.gc_uncollectable):
+        GC_UNCOLLECTABLE.labels(str(generation)).set(uncollectable)
+
+
+def start_memory_sampler(interval_seconds: float) -> None:
+    """Sample memory every ``interval_seconds`` so idle workers report fresh values in multiprocess mode."""
+    global _memory_sampler
+    if _memory_sampler is not None or interval_seconds <= 0:
+        return
+
+    def loop() -> None:
+        while not _memory_sampler_stop.wait(interval_seconds):
+            sample_memory()
+
+    sample_memory()
+    _memory_sampler_stop.clear()
+    _memory_sampler = threading.Thread(target=loop, name="memory-sampler", daemon=True)
+    _memory_sampler.start()
+
+
+def stop_memory_sampler() -> None:
+    global _memory_sampler
+    _memory_sampler_stop.set()
+    if _memory_sampler is not None:
+        _memory_sampler.join(timeout=5)
+        _memory_sampler = None
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request and attributing SQL work to its route."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        sample_threadpool()
+        REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_PROGRESS.dec()
+            _current_request.reset(token)
+            route, handler = _route_labels(scope)
+            method = scope["method"]
+            REQUESTS.labels(method, route, handler, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route, handler).observe(elapsed)
+            REQUEST_QUERIES.labels(route, handler).observe(stats.queries)
+            REQUEST_QUERY_TIME.labels(route, handler).observe(stats.query_seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    elapsed = time.perf_counter() - conn.info["metrics_query_started"].pop()
+    QUERY_LATENCY.observe(elapsed)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+
+def _handle_error(context) -> None:  # noqa: ANN001
+    # failed statements never reach after_cursor_execute
+    if context.connection is not None:
+        started = context.connection.info.get("metrics_query_started")
+        if started:
+            started.pop()
+
+
+def _instrument_pool(engine: Engine) -> None:
+    pool = engine.pool
+    if getattr(pool, "_metrics_instrumented", False):
+        return
+    # the pool has no "before checkout" event, so the blocking getter itself is timed
+    do_get = pool._do_get
+
+    def timed_do_get():  # noqa: ANN202
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get  # type: ignore[method-assign]
+    pool._metrics_instrumented = True  # type: ignore[attr-defined]
+
+
+def _track_checked_out(engine: Engine) -> None:
+    # set_function values never reach the per-process files read in multiprocess mode, so the
+    # gauge is set explicitly whenever a connection moves; engine.pool follows dispose()
+    def checked_out(*_args: object) -> None:
+        if hasattr(engine.pool, "checkedout"):
+            POOL_CHECKED_OUT.set(engine.pool.checkedout())
+
+    def checked_in(*_args: object) -> None:
+        # the returning connection is still counted while checkin listeners run
+        if hasattr(engine.pool, "checkedout"):
+            POOL_CHECKED_OUT.set(max(engine.pool.checkedout() - 1, 0))
+
+    event.listen(engine, "checkout", checked_out)
+    event.listen(engine, "checkin", checked_in)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach query timing and pool wait instrumentation to ``engine`` (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+        # dispose() replaces the pool, so the new one is instrumented as well
+        event.listen(engine, "engine_disposed", lambda disposed: _instrument_pool(disposed))
+        _track_checked_out(engine)
+    _instrument_pool(engine)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Prometheus text exposition of this process, or of all workers in multiprocess mode."""
+    sample_threadpool()
+    sample_memory()
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models.nutrition_plan import NutritionPlan
@@ -31,18 +32,18 @@ def _validate_payment_details(payload: PlanCheckoutRequest) -> None:
             raise PaymentError("CVC kodas turi būti 3 arba 4 skaitmenų.")
 
 
-def _create_purchase_item_from_meal(purchase_id: int, meal) -> PlanPurchaseItem:
-    return PlanPurchaseItem(
-        purchase_id=purchase_id,
-        day_of_week=meal.day_of_week,
-        meal_type=meal.meal_type,
-        meal_title=meal.title,
-        meal_description=meal.description,
-        calories=meal.calories,
-        protein_grams=meal.protein_grams,
-        carbs_grams=meal.carbs_grams,
-        fats_grams=meal.fats_grams,
-    )
+def _purchase_item_values(purchase_id: int, meal) -> dict[str, object]:
+    return {
+        "purchase_id": purchase_id,
+        "day_of_week": meal.day_of_week,
+        "meal_type": meal.meal_type,
+        "meal_title": meal.title,
+        "meal_description": meal.description,
+        "calories": meal.calories,
+        "protein_grams": meal.protein_grams,
+        "carbs_grams": meal.carbs_grams,
+        "fats_grams": meal.fats_grams,
+    }
 
 
 def process_checkout(
@@ -90,8 +91,10 @@ def process_checkout(
     db.add(purchase)
     db.flush()
 
-    for meal in sorted(plan.meals or [], key=lambda m: (m.day_of_week, m.meal_type, m.id)):
-        db.add(_create_purchase_item_from_meal(purchase.id, meal))
+    meals = sorted(plan.meals or [], key=lambda m: (m.day_of_week, m.meal_type, m.id))
+    if meals:
+        # one executemany; the ORM would insert row by row to fetch every generated id
+        db.execute(insert(PlanPurchaseItem), [_purchase_item_values(purchase.id, meal) for meal in meals])
 
     # Simulate payment success
     purchase.status = "paid"
@@ -108,7 +111,7 @@ def process_checkout(
         .all()
     )
 
-    pdf_relative_path = render_purchase_pdf(purchase, items)
+    pdf_relative_path = render_purchase_pdf(db, purchase, items)
     purchase.pdf_path = pdf_relative_path
 
     schedule_surveys_for_purchase(db, purchase)
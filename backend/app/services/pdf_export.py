@@ -1,16 +1,15 @@
 from __future__ import annotations
 
+import unicodedata
 from collections import defaultdict
-from datetime import datetime
-from pathlib import Path
 from typing import Iterable
 
 from fpdf import FPDF  # type: ignore[import-untyped]
+from sqlalchemy.orm import Session
 
 from app.models.plan_purchase import PlanPurchase, PlanPurchaseItem
+from app.services.media_store import media_store
 
-MEDIA_ROOT = Path("media")
-PURCHASES_DIR = MEDIA_ROOT / "purchases"
 
 DAY_LABELS = {
     "monday": "Pirmadienis",
@@ -33,6 +32,17 @@ class PlanPDF(FPDF):
         self.set_text_color(107, 114, 128)
         self.cell(0, 10, f"Puslapis {self.page_no()}", align="C")
 
+    def normalize_text(self, text: str) -> str:
+        # the built-in Helvetica only covers latin-1: keep the base letter of anything else (Ė -> E)
+        if not text.isascii():
+            text = "".join(char if ord(char) < 256 else _latin1_fallback(char) for char in text)
+        return super().normalize_text(text)
+
+
+def _latin1_fallback(char: str) -> str:
+    base = unicodedata.normalize("NFKD", char)[0]
+    return base if ord(base) < 256 else "?"
+
 
 def _section_title(pdf: FPDF, title: str) -> None:
     pdf.set_font("Helvetica", "B", 11)
@@ -63,14 +73,9 @@ def _wrap_text(pdf: FPDF, text: str, width: float) -> None:
 
 
 def render_purchase_pdf(
-    purchase: PlanPurchase, items: Iterable[PlanPurchaseItem]
+    db: Session, purchase: PlanPurchase, items: Iterable[PlanPurchaseItem]
 ) -> str:
-    """Generate PDF receipt and return relative path under media directory."""
-    PURCHASES_DIR.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    filename = f"purchase_{purchase.id}_{timestamp}.pdf"
-    output_path = PURCHASES_DIR / filename
-
+    """Generate PDF receipt, store it in the media store and return its media key."""
     pdf = PlanPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
@@ -219,6 +224,4 @@ def render_purchase_pdf(
         txt="Sis dokumentas yra automatiskai sugeneruotas pirkimo patvirtinimas. Jei turite klausimu ar norite plano korekciju, rasykite info@fitbite.lt",
     )
 
-    pdf.output(str(output_path))
-
-    return str(output_path.relative_to(MEDIA_ROOT))
+    return media_store.put_bytes(db, bytes(pdf.output()), ".pdf")
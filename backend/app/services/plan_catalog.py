@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import and_, case, literal, or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.allergens import allergen_mask, deserialize_allergens
+from app.models.nutrition_plan import NutritionPlan
+from app.models.user import User
+
+_METRIC_SORT_COLUMNS = {
+    "calories": NutritionPlan.daily_calories,
+    "protein": NutritionPlan.daily_protein_grams,
+    "price": NutritionPlan.daily_price_cents,
+}
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a paging cursor cannot be decoded for the requested sort."""
+
+
+@dataclass
+class PlanCatalogFilters:
+    goal_type: str | None = None
+    is_custom: bool | None = None
+    min_calories: int | None = None
+    max_calories: int | None = None
+    min_protein: int | None = None
+    max_protein: int | None = None
+    min_carbs: int | None = None
+    max_carbs: int | None = None
+    min_fats: int | None = None
+    max_fats: int | None = None
+    min_price_cents: int | None = None
+    max_price_cents: int | None = None
+    exclude_allergens: list[str] = field(default_factory=list)
+
+
+def refresh_plan_catalog_fields(plan: NutritionPlan) -> None:
+    """Recompute the denormalized per-day macro, price and allergen columns of a plan."""
+    meals = plan.meals or []
+    if meals:
+        days = len({meal.day_of_week for meal in meals}) or 1
+        plan.daily_calories = round(sum(meal.calories or 0 for meal in meals) / days)
+        plan.daily_protein_grams = round(sum(meal.protein_grams or 0 for meal in meals) / days)
+        plan.daily_carbs_grams = round(sum(meal.carbs_grams or 0 for meal in meals) / days)
+        plan.daily_fats_grams = round(sum(meal.fats_grams or 0 for meal in meals) / days)
+        allergens = {allergen for meal in meals for allergen in deserialize_allergens(meal.allergens)}
+    else:
+        plan.daily_calories = plan.calories
+        plan.daily_protein_grams = plan.protein_grams
+        plan.daily_carbs_grams = plan.carbs_grams
+        plan.daily_fats_grams = plan.fats_grams
+        allergens = set(deserialize_allergens(plan.allergens))
+    plan.allergen_mask = allergen_mask(allergens)
+
+    daily_prices = [
+        round(entry.price_cents / entry.period_days)
+        for entry in plan.pricing_entries or []
+        if entry.is_active and entry.period_days > 0
+    ]
+    plan.daily_price_cents = min(daily_prices) if daily_prices else None
+
+
+def refresh_all_plan_catalog_fields(db: Session) -> None:
+    plans = (
+        db.query(NutritionPlan)
+        .options(
+            selectinload(NutritionPlan.meals),
+            selectinload(NutritionPlan.pricing_entries),
+        )
+        .all()
+    )
+    for plan in plans:
+        refresh_plan_catalog_fields(plan)
+    db.commit()
+
+
+def _encode_cursor(values: list[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, expected_length: int) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursorError("Netinkamas puslapiavimo žymeklis.") from exc
+    if not isinstance(values, list) or len(values) != expected_length:
+        raise InvalidCursorError("Netinkamas puslapiavimo žymeklis.")
+    return values
+
+
+def _sort_keys(sort: str) -> list[tuple[ColumnElement[Any], bool]]:
+    """Return ``(expression, descending)`` pairs; the plan id is always the final tie-breaker."""
+    if sort == "name":
+        return [
+            (NutritionPlan.is_custom, False),
+            (NutritionPlan.name, False),
+            (NutritionPlan.id, False),
+        ]
+    descending = sort.startswith("-")
+    column = _METRIC_SORT_COLUMNS[sort.lstrip("-")]
+    # plans without a value go last in both directions
+    missing = case((column.is_(None), 1), else_=0)
+    return [(missing, False), (column, descending), (NutritionPlan.id, descending)]
+
+
+def _keyset_condition(keys: list[tuple[ColumnElement[Any], bool]], values: list[Any]) -> ColumnElement[bool]:
+    """Lexicographic "row comes after the cursor" predicate for mixed sort directions."""
+    clauses = []
+    for position, (expression, descending) in enumerate(keys):
+        value = values[position]
+        if value is None:
+            # NULLs are grouped by the preceding "missing" key, nothing sorts beyond them
+            continue
+        equal_prefix = [
+            keys[index][0].is_(None) if values[index] is None else keys[index][0] == literal(values[index])
+            for index in range(position)
+        ]
+        beyond = expression < literal(value) if descending else expression > literal(value)
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+def _cursor_values(plan: NutritionPlan, sort: str) -> list[Any]:
+    if sort == "name":
+        return [plan.is_custom, plan.name, plan.id]
+    value = getattr(plan, _METRIC_SORT_COLUMNS[sort.lstrip("-")].key)
+    return [1 if value is None else 0, value, plan.id]
+
+
+def _range(query, column, minimum: int | None, maximum: int | None):  # noqa: ANN001, ANN202
+    if minimum is not None:
+        query = query.filter(column >= minimum)
+    if maximum is not None:
+        query = query.filter(column <= maximum)
+    return query
+
+
+def list_catalog_page(
+    db: Session,
+    user: User,
+    filters: PlanCatalogFilters,
+    *,
+    sort: str = "name",
+    cursor: str | None = None,
+    limit: int | None = 50,
+) -> tuple[list[NutritionPlan], str | None]:
+    """Return one page of visible plans and the cursor of the next page (if any); ``limit=None`` returns all."""
+    query = db.query(NutritionPlan).filter(
+        (NutritionPlan.owner_id.is_(None)) | (NutritionPlan.owner_id == user.id)
+    )
+
+    if filters.goal_type:
+        query = query.filter(NutritionPlan.goal_type == filters.goal_type)
+    if filters.is_custom is not None:
+        query = query.filter(NutritionPlan.is_custom == filters.is_custom)
+    query = _range(query, NutritionPlan.daily_calories, filters.min_calories, filters.max_calories)
+    query = _range(query, NutritionPlan.daily_protein_grams, filters.min_protein, filters.max_protein)
+    query = _range(query, NutritionPlan.daily_carbs_grams, filters.min_carbs, filters.max_carbs)
+    query = _range(query, NutritionPlan.daily_fats_grams, filters.min_fats, filters.max_fats)
+    query = _range(query, NutritionPlan.daily_price_cents, filters.min_price_cents, filters.max_price_cents)
+    excluded_mask = allergen_mask(filters.exclude_allergens)
+    if excluded_mask:
+        query = query.filter(NutritionPlan.allergen_mask.op("&")(excluded_mask) == 0)
+
+    keys = _sort_keys(sort)
+    if cursor:
+        query = query.filter(_keyset_condition(keys, _decode_cursor(cursor, len(keys))))
+    query = query.order_by(*[expression.desc() if descending else expression.asc() for expression, descending in keys])
+
+    query = query.options(
+        selectinload(NutritionPlan.meals),
+        selectinload(NutritionPlan.pricing_entries),
+    )
+    if limit is None:
+        return query.all(), None
+    plans = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(plans) > limit:
+        plans = plans[:limit]
+        next_cursor = _encode_cursor(_cursor_values(plans[-1], sort))
+    return plans, next_cursor
@@ -9,6 +9,7 @@ from app.models.nutrition_plan import NutritionPlan
 from app.models.plan_meal import PlanMeal
 from app.models.user import User
 from app.schemas.plan import CustomPlanCreate
+from app.services.plan_catalog import refresh_plan_catalog_fields
 
 
 def _calculate_bmi(user: User) -> float | None:
@@ -128,12 +129,13 @@ def create_custom_plan(
     )
 
     for meal in meals:
-        db.add(meal)
+        plan.meals.append(meal)
 
     combined_allergens = normalize_allergen_list(
         allergen for meal in payload.meals for allergen in (meal.allergens or [])
     )
     plan.allergens = serialize_allergens(combined_allergens)
+    refresh_plan_catalog_fields(plan)
 
     db.commit()
     db.refresh(plan)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import re
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs
+
+import anyio.to_thread
+from fastapi import FastAPI, HTTPException
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.deps import get_current_admin, get_current_user
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAMETER = "profile"
+FORMAT_HTML = "html"
+FORMAT_SPEEDSCOPE = "speedscope"
+# content type and file extension per output format
+PROFILE_FORMATS = {
+    FORMAT_HTML: ("text/html; charset=utf-8", ".html"),
+    FORMAT_SPEEDSCOPE: ("application/json", ".speedscope.json"),
+}
+# samples are attributed to the innermost frame that belongs to one of these layers
+CATEGORIES = ("route", "service", "sql", "pdf", "other")
+
+_APP_ROOT = Path(__file__).resolve().parents[1]
+_ROUTES_ROOT = str(_APP_ROOT / "api")
+_SERVICES_ROOT = str(_APP_ROOT / "services")
+_PDF_MODULE = str(_APP_ROOT / "services" / "pdf_export.py")
+_SQL_PACKAGES = ("/sqlalchemy/", "/psycopg/", "/psycopg2/", "/sqlite3/")
+# frames pyinstrument inserts for time the request spent awaiting or outside its task
+_PLACEHOLDER_FRAMES = ("[await]", "[out-of-context]")
+
+
+@dataclass
+class _ProfiledRequest:
+    # sync endpoints run in threadpool workers, which are profiled separately and merged afterwards
+    worker_sessions: list[Any] = field(default_factory=list)
+
+
+_current_profile: ContextVar[_ProfiledRequest | None] = ContextVar("profiled_request", default=None)
+
+
+def requested_format(scope: Scope) -> str | None:
+    """Profile format asked for by the ``X-Profile`` header or ``?profile=`` flag, ``None`` when absent."""
+    value = None
+    for name, raw in scope["headers"]:
+        if name == PROFILE_HEADER:
+            value = raw.decode("latin-1")
+            break
+    else:
+        query_string = scope.get("query_string", b"")
+        # cheap check first, the query string is only parsed when the flag may be present
+        if b"profile=" not in query_string:
+            return None
+        values = parse_qs(query_string.decode("latin-1")).get(PROFILE_QUERY_PARAMETER)
+        if not values:
+            return None
+        value = values[-1]
+    return FORMAT_SPEEDSCOPE if value.strip().lower() == FORMAT_SPEEDSCOPE else FORMAT_HTML
+
+
+def _is_admin_request(scope: Scope) -> bool:
+    scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    db = SessionLocal()
+    try:
+        get_current_admin(get_current_user(db, token))
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+    return True
+
+
+@functools.lru_cache(maxsize=4096)
+def _frame_category(identifier: str) -> str | None:
+    parts = identifier.split("\x00")
+    path = parts[1] if len(parts) > 1 else ""
+    if any(package in path for package in _SQL_PACKAGES):
+        return "sql"
+    if "/fpdf/" in path or path == _PDF_MODULE:
+        return "pdf"
+    if path.startswith(_SERVICES_ROOT):
+        return "service"
+    if path.startswith(_ROUTES_ROOT):
+        return "route"
+    return None
+
+
+def time_breakdown(session: Any) -> dict[str, float]:
+    """Milliseconds of the profile spent in route code, services, SQL, PDF rendering and everything else."""
+    totals = dict.fromkeys(CATEGORIES, 0.0)
+    for stack, elapsed in session.frame_records:
+        if stack and stack[-1].startswith(_PLACEHOLDER_FRAMES):
+            continue
+        category = next(
+            (category for category in map(_frame_category, reversed(stack)) if category is not None), "other"
+        )
+        totals[category] += elapsed * 1000
+    return {category: round(milliseconds, 1) for category, milliseconds in totals.items()}
+
+
+def _render(session: Any, output_format: str) -> bytes:
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+
+    renderer = SpeedscopeRenderer() if output_format == FORMAT_SPEEDSCOPE else HTMLRenderer()
+    return renderer.render(session).encode()
+
+
+def _profile_path(scope: Scope, extension: str) -> Path:
+    route = scope.get("route")
+    path = route.path if route is not None else scope["path"]
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-") or "root"
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{scope['method'].lower()}-{slug}{extension}"
+    return Path(settings.profiling_dir) / name  # type: ignore[arg-type]
+
+
+def _profile_in_worker(call: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(call)
+    def profiled(*args: Any, **kwargs: Any) -> Any:
+        request = _current_profile.get()
+        if request is None:
+            return call(*args, **kwargs)
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=settings.profiling_interval_ms / 1000, async_mode="disabled")
+        profiler.start()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            request.worker_sessions.append(profiler.stop())
+
+    profiled.__profiled__ = True  # type: ignore[attr-defined]
+    return profiled
+
+
+def instrument_profiled_endpoints(app: FastAPI) -> None:
+    """Let sync endpoints profile the threadpool worker they run in; call after the routers are included."""
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.dependant.call is None:
+            continue
+        call = route.dependant.call
+        if asyncio.iscoroutinefunction(call) or getattr(call, "__profiled__", False):
+            continue
+        # the request handler keeps this dependant and looks ``call`` up for every request
+        route.dependant.call = _profile_in_worker(call)
+
+
+class ProfilingMiddleware:
+    """Samples single requests that carry the profiling flag and come from an admin.
+
+    Requests without the flag only pay for one header scan. The profile replaces the response body,
+    or, with ``PROFILING_DIR`` set, is written there while the original response goes out.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError as exc:  # pragma: no cover - config error path
+            raise RuntimeError("PROFILING_ENABLED=true reikalauja pyinstrument paketo (pip install pyinstrument).") from exc
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        output_format = requested_format(scope)
+        if output_format is None:
+            await self.app(scope, receive, send)
+            return
+        if not await anyio.to_thread.run_sync(_is_admin_request, scope):
+            logger.warning("Ignoring a profiling flag without admin credentials: %s %s", scope["method"], scope["path"])
+            await self.app(scope, receive, send)
+            return
+        await self._profile(scope, receive, send, output_format)
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, output_format: str) -> None:
+        from pyinstrument import Profiler
+        from pyinstrument.session import Session
+
+        store = bool(settings.profiling_dir)
+        # the file name goes out with the response headers, before the profile exists
+        media_type, extension = PROFILE_FORMATS[output_format]
+        path = _profile_path(scope, extension) if store else None
+        status_code = 500
+
+        async def forward_or_hold(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if path is not None:
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-file", path.name.encode())]
+            if store:
+                await send(message)
+
+        request = _ProfiledRequest()
+        token = _current_profile.set(request)
+        profiler = Profiler(interval=settings.profiling_interval_ms / 1000, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, forward_or_hold)
+        finally:
+            session = profiler.stop()
+            _current_profile.reset(token)
+
+        for worker_session in request.worker_sessions:
+            session = Session.combine(session, worker_session)
+        breakdown = time_breakdown(session)
+        summary = "; ".join(f"{category}={milliseconds}ms" for category, milliseconds in breakdown.items())
+        body = await anyio.to_thread.run_sync(_render, session, output_format)
+        logger.info("Profiled %s %s (%s): %s", scope["method"], scope["path"], status_code, summary)
+
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            await anyio.to_thread.run_sync(path.write_bytes, body)
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", media_type.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profiled-status", str(status_code).encode()),
+                    (b"x-profile-breakdown", summary.encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_ATTRIBUTE = "__query_budget__"
+MODE_OFF = "off"
+MODE_WARN = "warn"
+MODE_ENFORCE = "enforce"
+
+EndpointT = TypeVar("EndpointT", bound=Callable)
+
+
+def query_budget(limit: int) -> Callable[[EndpointT], EndpointT]:
+    """Declare how many SQL statements one request to the decorated endpoint may issue.
+
+    Place it below the ``@router.<method>`` decorator so the route registers the marked function.
+    """
+
+    def mark(endpoint: EndpointT) -> EndpointT:
+        setattr(endpoint, QUERY_BUDGET_ATTRIBUTE, limit)
+        return endpoint
+
+    return mark
+
+
+def route_budget(scope: Scope) -> int | None:
+    route = scope.get("route")
+    if route is None:
+        return None
+    return getattr(route.endpoint, QUERY_BUDGET_ATTRIBUTE, settings.query_budget_default)
+
+
+def summarize_statements(statements: list[str]) -> list[tuple[int, str]]:
+    """Identical statements collapsed with their repeat count, in order of first use (N+1 show up as big counts)."""
+    counts = Counter(statements)
+    seen: dict[str, None] = dict.fromkeys(statements)
+    return [(counts[statement], " ".join(statement.split())) for statement in seen]
+
+
+@dataclass
+class QueryBudgetViolation:
+    method: str
+    route: str
+    handler: str
+    budget: int
+    statements: list[str]
+
+    def describe(self) -> str:
+        lines = [
+            f"{self.method} {self.route} ({self.handler}) issued {len(self.statements)} SQL statements, "
+            f"budget is {self.budget}:"
+        ]
+        lines.extend(f"  {count:>3}x {statement}" for count, statement in summarize_statements(self.statements))
+        return "\n".join(lines)
+
+
+class QueryBudgetExceededError(RuntimeError):
+    """Raised from the SQL listener in ``enforce`` mode as soon as a request exceeds its budget."""
+
+
+@dataclass
+class _RequestQueries:
+    scope: Scope
+    statements: list[str] = field(default_factory=list)
+    raised: bool = False
+
+
+_current_request: ContextVar[_RequestQueries | None] = ContextVar("query_budget_request", default=None)
+# the most recent violations of this process, for the budget check command and debugging sessions
+recent_violations: deque[QueryBudgetViolation] = deque(maxlen=100)
+
+
+def _violation(tracked: _RequestQueries) -> QueryBudgetViolation | None:
+    budget = route_budget(tracked.scope)
+    if budget is None or len(tracked.statements) <= budget:
+        return None
+    route = tracked.scope["route"]
+    return QueryBudgetViolation(
+        method=tracked.scope["method"],
+        route=route.path,
+        handler=getattr(route.endpoint, "__name__", route.name),
+        budget=budget,
+        statements=list(tracked.statements),
+    )
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    tracked = _current_request.get()
+    if tracked is None:
+        return
+    tracked.statements.append(statement)
+    if settings.query_budget_mode == MODE_ENFORCE and not tracked.raised:
+        violation = _violation(tracked)
+        if violation is not None:
+            tracked.raised = True
+            raise QueryBudgetExceededError(violation.describe())
+
+
+class QueryBudgetMiddleware:
+    """Collects the SQL statements of each request and reports routes that exceed their budget."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracked = _RequestQueries(scope)
+        token = _current_request.set(tracked)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_request.reset(token)
+            violation = _violation(tracked)
+            if violation is not None:
+                recent_violations.append(violation)
+                logger.warning("Query budget exceeded: %s", violation.describe())
+
+
+def instrument_query_budgets(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _record_statement):
+        event.listen(engine, "before_cursor_execute", _record_statement)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from sqlalchemy import bindparam, event, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models.nutrition_plan import NutritionPlan
+from app.models.plan_meal import PlanMeal
+
+SEARCH_TABLE = "catalog_search"
+PLAN_KIND = "plan"
+MEAL_KIND = "meal"
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 2.0
+# columns that end up in the index; updates touching none of them leave it alone
+PLAN_INDEXED_FIELDS = ("name", "description", "owner_id")
+MEAL_INDEXED_FIELDS = ("title", "description", "plan_id")
+
+_PENDING_KEY = "search_index_pending"
+_UNKNOWN_OWNER = object()
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        title_folded,
+        body_folded,
+        kind UNINDEXED,
+        entity_id UNINDEXED,
+        plan_id UNINDEXED,
+        owner_id UNINDEXED,
+        title UNINDEXED,
+        body UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+_POSTGRES_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (
+        kind VARCHAR(10) NOT NULL,
+        entity_id INTEGER NOT NULL,
+        plan_id INTEGER NOT NULL,
+        owner_id VARCHAR(36),
+        title TEXT NOT NULL,
+        body TEXT NOT NULL,
+        title_folded TEXT NOT NULL,
+        body_folded TEXT NOT NULL,
+        document TSVECTOR GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', title_folded), 'A')
+            || setweight(to_tsvector('simple', body_folded), 'B')
+        ) STORED,
+        PRIMARY KEY (kind, entity_id)
+    )
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_owner_id ON {SEARCH_TABLE} (owner_id)",
+]
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    plan_id: int
+    meal_id: int | None
+    title: str
+    description: str
+    score: float
+
+
+def fold_text(value: str | None) -> str:
+    """Lower-case and strip diacritics so that "Vištiena" and "vistiena" index the same way."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _query_tokens(query: str) -> list[str]:
+    return _TOKEN_PATTERN.findall(fold_text(query))
+
+
+def _rowid(kind: str, entity_id: int) -> int:
+    # FTS5 rows are only indexed by rowid, so plans and meals share one id space
+    return entity_id * 2 + (1 if kind == MEAL_KIND else 0)
+
+
+def _is_supported(dialect_name: str) -> bool:
+    return dialect_name in {"sqlite", "postgresql"}
+
+
+def ensure_search_index(engine: Engine) -> None:
+    ddl = {"sqlite": _SQLITE_DDL, "postgresql": _POSTGRES_DDL}.get(engine.dialect.name)
+    if not ddl:
+        return
+    with engine.begin() as connection:
+        for statement in ddl:
+            connection.execute(text(statement))
+
+
+def _delete_entries(connection: Connection, keys: list[tuple[str, int]]) -> None:
+    if not keys:
+        return
+    if connection.dialect.name == "sqlite":
+        connection.execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"),
+            [{"rowid": _rowid(kind, entity_id)} for kind, entity_id in keys],
+        )
+    else:
+        connection.execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE kind = :kind AND entity_id = :entity_id"),
+            [{"kind": kind, "entity_id": entity_id} for kind, entity_id in keys],
+        )
+
+
+def _entry_params(
+    kind: str,
+    entity_id: int,
+    plan_id: int,
+    owner_id: str | None,
+    title: str | None,
+    body: str | None,
+) -> dict[str, object]:
+    return {
+        "kind": kind,
+        "entity_id": entity_id,
+        "plan_id": plan_id,
+        "owner_id": owner_id,
+        "title": title or "",
+        "body": body or "",
+        "title_folded": fold_text(title),
+        "body_folded": fold_text(body),
+    }
+
+
+def _insert_entries(connection: Connection, entries: list[dict[str, object]]) -> None:
+    if not entries:
+        return
+    if connection.dialect.name == "sqlite":
+        connection.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} "
+                "(rowid, title_folded, body_folded, kind, entity_id, plan_id, owner_id, title, body) "
+                "VALUES (:rowid, :title_folded, :body_folded, :kind, :entity_id, :plan_id, :owner_id, :title, :body)"
+            ),
+            [{**entry, "rowid": _rowid(entry["kind"], entry["entity_id"])} for entry in entries],  # type: ignore[arg-type]
+        )
+    else:
+        connection.execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} "
+                "(kind, entity_id, plan_id, owner_id, title, body, title_folded, body_folded) "
+                "VALUES (:kind, :entity_id, :plan_id, :owner_id, :title, :body, :title_folded, :body_folded)"
+            ),
+            entries,
+        )
+
+
+def rebuild_search_index(db: Session, batch_size: int = 5000) -> None:
+    """Re-index every plan and meal; used to backfill existing databases and after bulk imports."""
+    connection = db.connection()
+    if not _is_supported(connection.dialect.name):
+        return
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    owners: dict[int, str | None] = {}
+    entries: list[dict[str, object]] = []
+    for plan in db.query(NutritionPlan.id, NutritionPlan.owner_id, NutritionPlan.name, NutritionPlan.description):
+        owners[plan.id] = plan.owner_id
+        entries.append(_entry_params(PLAN_KIND, plan.id, plan.id, plan.owner_id, plan.name, plan.description))
+        if len(entries) >= batch_size:
+            _insert_entries(connection, entries)
+            entries = []
+    for meal in db.query(PlanMeal.id, PlanMeal.plan_id, PlanMeal.title, PlanMeal.description):
+        entries.append(
+            _entry_params(MEAL_KIND, meal.id, meal.plan_id, owners.get(meal.plan_id), meal.title, meal.description)
+        )
+        if len(entries) >= batch_size:
+            _insert_entries(connection, entries)
+            entries = []
+    _insert_entries(connection, entries)
+    db.commit()
+
+
+def ensure_search_backfilled(db: Session) -> None:
+    connection = db.connection()
+    if not _is_supported(connection.dialect.name):
+        return
+    indexed = connection.execute(text(f"SELECT 1 FROM {SEARCH_TABLE} LIMIT 1")).first()
+    if indexed is None and db.query(NutritionPlan.id).first() is not None:
+        rebuild_search_index(db)
+
+
+def search_catalog(db: Session, owner_id: str, query: str, limit: int = 20) -> list[SearchHit]:
+    """Rank visible plans and meals by relevance to ``query`` (prefix match on every word)."""
+    tokens = _query_tokens(query)
+    connection = db.connection()
+    if not tokens or not _is_supported(connection.dialect.name):
+        return []
+
+    if connection.dialect.name == "sqlite":
+        match = " ".join(f'"{token}"*' for token in tokens)
+        rows = connection.execute(
+            text(
+                f"SELECT kind, entity_id, plan_id, title, body, "
+                f"-bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score "
+                f"FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH :match AND (owner_id IS NULL OR owner_id = :owner_id) "
+                "ORDER BY score DESC LIMIT :limit"
+            ),
+            {"match": match, "owner_id": owner_id, "limit": limit},
+        ).all()
+    else:
+        ts_query = " & ".join(f"{token}:*" for token in tokens)
+        rows = connection.execute(
+            text(
+                "SELECT kind, entity_id, plan_id, title, body, "
+                "ts_rank(document, to_tsquery('simple', :ts_query)) AS score "
+                f"FROM {SEARCH_TABLE} "
+                "WHERE document @@ to_tsquery('simple', :ts_query) AND (owner_id IS NULL OR owner_id = :owner_id) "
+                "ORDER BY score DESC LIMIT :limit"
+            ),
+            {"ts_query": ts_query, "owner_id": owner_id, "limit": limit},
+        ).all()
+
+    return [
+        SearchHit(
+            kind=row.kind,
+            plan_id=row.plan_id,
+            meal_id=row.entity_id if row.kind == MEAL_KIND else None,
+            title=row.title,
+            description=row.body,
+            score=round(float(row.score), 4),
+        )
+        for row in rows
+    ]
+
+
+def _changed(target: object, fields: tuple[str, ...]) -> bool:
+    attrs = inspect(target).attrs
+    return any(attrs[field].history.has_changes() for field in fields)
+
+
+def _queue(connection: Connection, target: object, key: tuple[str, int], entry: dict[str, object] | None) -> None:
+    session = Session.object_session(target)
+    if session is None or not _is_supported(connection.dialect.name):
+        return
+    session.info.setdefault(_PENDING_KEY, {})[key] = entry
+
+
+@event.listens_for(NutritionPlan, "after_insert")
+def _queue_plan(mapper, connection: Connection, target: NutritionPlan) -> None:  # noqa: ANN001
+    entry = _entry_params(PLAN_KIND, target.id, target.id, target.owner_id, target.name, target.description)
+    _queue(connection, target, (PLAN_KIND, target.id), entry)
+
+
+@event.listens_for(NutritionPlan, "after_update")
+def _queue_plan_update(mapper, connection: Connection, target: NutritionPlan) -> None:  # noqa: ANN001
+    # catalog field refreshes and other bookkeeping updates do not touch the indexed text
+    if _changed(target, PLAN_INDEXED_FIELDS):
+        _queue_plan(mapper, connection, target)
+
+
+@event.listens_for(NutritionPlan, "after_delete")
+def _queue_plan_delete(mapper, connection: Connection, target: NutritionPlan) -> None:  # noqa: ANN001
+    _queue(connection, target, (PLAN_KIND, target.id), None)
+
+
+@event.listens_for(PlanMeal, "after_insert")
+def _queue_meal(mapper, connection: Connection, target: PlanMeal) -> None:  # noqa: ANN001
+    # read the plan only if it is already loaded; missing owners are looked up together after the flush
+    plan = inspect(target).dict.get("plan")
+    owner_id = plan.owner_id if plan is not None and plan.id == target.plan_id else _UNKNOWN_OWNER
+    entry = _entry_params(
+        MEAL_KIND, target.id, target.plan_id, owner_id, target.title, target.description  # type: ignore[arg-type]
+    )
+    _queue(connection, target, (MEAL_KIND, target.id), entry)
+
+
+@event.listens_for(PlanMeal, "after_update")
+def _queue_meal_update(mapper, connection: Connection, target: PlanMeal) -> None:  # noqa: ANN001
+    if _changed(target, MEAL_INDEXED_FIELDS):
+        _queue_meal(mapper, connection, target)
+
+
+@event.listens_for(PlanMeal, "after_delete")
+def _queue_meal_delete(mapper, connection: Connection, target: PlanMeal) -> None:  # noqa: ANN001
+    _queue(connection, target, (MEAL_KIND, target.id), None)
+
+
+@event.listens_for(Session, "after_flush")
+def _write_pending_entries(session: Session, flush_context) -> None:  # noqa: ANN001
+    pending: dict[tuple[str, int], dict[str, object] | None] | None = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    entries = [entry for entry in pending.values() if entry is not None]
+    unknown = {entry["plan_id"] for entry in entries if entry["owner_id"] is _UNKNOWN_OWNER}
+    if unknown:
+        owners = dict(
+            connection.execute(
+                text("SELECT id, owner_id FROM nutritionplan WHERE id IN :plan_ids").bindparams(
+                    bindparam("plan_ids", expanding=True)
+                ),
+                {"plan_ids": sorted(unknown)},
+            ).all()
+        )
+        for entry in entries:
+            if entry["owner_id"] is _UNKNOWN_OWNER:
+                entry["owner_id"] = owners.get(entry["plan_id"])  # type: ignore[call-overload]
+    _delete_entries(connection, list(pending))
+    _insert_entries(connection, entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_entries(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -6,6 +6,7 @@ from app.core.allergens import normalize_allergen_list, serialize_allergens
 from app.models.nutrition_plan import NutritionPlan
 from app.models.plan_meal import PlanMeal
 from app.models.plan_period_pricing import PlanPeriodPricing
+from app.services.plan_catalog import refresh_all_plan_catalog_fields
 
 
 ALLOWED_PERIODS = [1, 2, 3, 4, 5, 6, 7, 14]
@@ -678,3 +679,6 @@ def seed_initial_plans(db: Session) -> None:
             created_pricing = True
     if created_pricing:
         db.commit()
+
+    if created_or_updated or created_pricing:
+        refresh_all_plan_catalog_fields(db)
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# execution option that keeps a connection's statements (the EXPLAINs themselves) out of the log
+LOG_OPTION = "slow_query_log"
+MAX_CACHED_PLANS = 1000
+# only statements whose plan can be shown without running them
+EXPLAINABLE_PREFIXES = ("select", "with", "insert", "update", "delete")
+MAX_PARAMETER_LENGTH = 200
+QUEUE_SIZE = 1000
+_STOP = object()
+
+_current_scope: ContextVar[Scope | None] = ContextVar("slow_query_scope", default=None)
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    parameters: Any
+    elapsed_ms: float
+    occurred_at: datetime
+    executemany: bool = False
+    method: str | None = None
+    route: str | None = None
+    handler: str | None = None
+    plan: list[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        origin = f"{self.method} {self.route} ({self.handler})" if self.route else "outside a request"
+        lines = [
+            f"{self.elapsed_ms:.1f} ms {origin}, issued {self.occurred_at.isoformat(timespec='milliseconds')}",
+            f"  {' '.join(self.statement.split())}",
+        ]
+        if self.parameters is not None:
+            batch = " (first row of executemany)" if self.executemany else ""
+            lines.append(f"  parameters{batch}: {_shorten_parameters(self.parameters)}")
+        if self.plan:
+            lines.append("  plan:")
+            lines.extend(f"    {line}" for line in self.plan)
+        return "\n".join(lines)
+
+
+def _shorten(value: Any) -> Any:
+    if isinstance(value, (str, bytes)) and len(value) > MAX_PARAMETER_LENGTH:
+        return f"{value[:MAX_PARAMETER_LENGTH]!r}... ({len(value)} long)"
+    return value
+
+
+def _shorten_parameters(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: _shorten(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return tuple(_shorten(value) for value in parameters)
+    return parameters
+
+
+def explain(engine: Engine, statement: str, parameters: Any) -> list[str]:
+    """Plan of ``statement`` as text lines; nothing is executed besides ``EXPLAIN`` itself."""
+    dialect = engine.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    with engine.connect() as connection:
+        rows = connection.execution_options(**{LOG_OPTION: False}).exec_driver_sql(
+            prefix + statement, parameters if parameters is not None else ()
+        ).all()
+    if dialect != "sqlite":
+        return [str(row[0]) for row in rows]
+    # sqlite rows are (id, parent, notused, detail); indent children under their parent
+    depth: dict[int, int] = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append("  " * depth[node_id] + str(detail))
+    return lines
+
+
+class SlowQueryLog:
+    """Writes slow statements from a background thread, where their plans are captured as well.
+
+    The statement hook only enqueues; ``EXPLAIN`` runs on its own pooled connection and each distinct
+    statement is explained at most once per ``SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS``.
+    """
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=QUEUE_SIZE)
+        self._plans: dict[str, tuple[float, list[str]]] = {}
+        self._thread: threading.Thread | None = None
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def submit(self, slow_query: SlowQuery) -> None:
+        try:
+            self._queue.put_nowait(slow_query)
+        except queue.Full:
+            # a database in trouble makes everything slow; dropping beats blocking requests
+            self.dropped += 1
+
+    def _plan(self, slow_query: SlowQuery) -> list[str]:
+        if not settings.slow_query_explain or not slow_query.statement.lstrip().lower().startswith(EXPLAINABLE_PREFIXES):
+            return []
+        now = time.monotonic()
+        cached = self._plans.get(slow_query.statement)
+        if cached is not None and now - cached[0] < settings.slow_query_explain_cooldown_seconds:
+            return cached[1]
+        try:
+            plan = explain(self.engine, slow_query.statement, slow_query.parameters)
+        except Exception as exc:  # noqa: BLE001 - the plan is best effort, the log entry is not
+            plan = [f"EXPLAIN failed: {exc.__class__.__name__}: {exc}".splitlines()[0]]
+        if len(self._plans) >= MAX_CACHED_PLANS:
+            self._plans.clear()
+        self._plans[slow_query.statement] = (now, plan)
+        return plan
+
+    def _run(self) -> None:
+        while True:
+            slow_query = self._queue.get()
+            if slow_query is _STOP:
+                return
+            try:
+                slow_query.plan = self._plan(slow_query)
+                logger.warning("Slow query: %s", slow_query.describe())
+            except Exception:  # noqa: BLE001 - the writer thread must survive any single entry
+                logger.exception("Could not log a slow query")
+
+
+_slow_query_log: SlowQueryLog | None = None
+
+
+def _route_of(scope: Scope | None) -> tuple[str | None, str | None, str | None]:
+    if scope is None:
+        return None, None, None
+    route = scope.get("route")
+    if route is None:
+        return scope.get("method"), scope.get("path"), None
+    return scope.get("method"), route.path, getattr(route.endpoint, "__name__", route.name)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    if context is not None:
+        context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    started = getattr(context, "_slow_query_started", None)
+    if started is None or _slow_query_log is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms < settings.slow_query_threshold_ms or not conn.get_execution_options().get(LOG_OPTION, True):
+        return
+    if executemany and parameters:
+        parameters = parameters[0]
+    method, route, handler = _route_of(_current_scope.get())
+    _slow_query_log.submit(
+        SlowQuery(
+            statement=statement,
+            parameters=parameters if settings.slow_query_log_parameters else None,
+            elapsed_ms=elapsed_ms,
+            occurred_at=datetime.utcnow(),
+            executemany=executemany,
+            method=method,
+            route=route,
+            handler=handler,
+        )
+    )
+
+
+def _configure_log_file(path: str) -> None:
+    target = Path(path).resolve()
+    if any(getattr(handler, "baseFilename", None) == str(target) for handler in logger.handlers):
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        target,
+        maxBytes=settings.slow_query_log_max_bytes,
+        backupCount=settings.slow_query_log_backups,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    # the multi-line entries belong in their own file, not in the server log
+    logger.propagate = False
+
+
+def instrument_slow_queries(engine: Engine) -> None:
+    """Log statements slower than ``SLOW_QUERY_THRESHOLD_MS`` on ``engine`` (idempotent)."""
+    global _slow_query_log
+    if settings.slow_query_log_file:
+        _configure_log_file(settings.slow_query_log_file)
+    if _slow_query_log is None:
+        _slow_query_log = SlowQueryLog(engine)
+        _slow_query_log.start()
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def shutdown_slow_query_log() -> None:
+    global _slow_query_log
+    if _slow_query_log is not None:
+        _slow_query_log.stop()
+        _slow_query_log = None
+
+
+class SlowQueryMiddleware:
+    """Makes the current request's route known to the statement hook, including threadpool workers."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import os
+import secrets
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Protocol
+from urllib.parse import quote
+
+from app.core.config import Settings, settings
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+TRASH_PREFIX = ".gc"
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+    # POSIX timestamp of the last write
+    modified: float
+
+
+class StorageBackend(Protocol):
+    """Where media bytes live; keys are ``/``-separated paths such as ``blobs/aa/bb/<sha>.webp``."""
+
+    def exists(self, key: str) -> bool: ...
+
+    def save_file(self, key: str, source: Path, *, content_type: str, cache_control: str | None = None) -> None:
+        """Store ``source`` under ``key`` without reading it into memory; ``source`` is consumed."""
+
+    def save_bytes(self, key: str, data: bytes, *, content_type: str, cache_control: str | None = None) -> None: ...
+
+    def open(self, key: str) -> BinaryIO: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def set_aside(self, key: str) -> str | None:
+        """Move ``key`` out of reach and return a token for ``restore``/``purge`` (``None`` if missing)."""
+
+    def restore(self, key: str, token: str) -> None: ...
+
+    def purge(self, token: str) -> None: ...
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        """Yield every object under ``prefix`` in key order."""
+
+    def local_path(self, key: str) -> Path | None: ...
+
+    def public_url(self, key: str) -> str | None:
+        """Permanent URL served without the API, if the backend has one."""
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        expires_in: int,
+        filename: str | None = None,
+        content_type: str | None = None,
+    ) -> str | None:
+        """Short-lived direct download URL, if the backend can sign one."""
+
+
+class LocalStorage:
+    """Media on the local disk, served by the API's ``/media`` mount."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def _publish(self, key: str, write: Any) -> None:
+        destination = self._path(key)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        staging = destination.with_name(f".{destination.name}.{secrets.token_hex(4)}")
+        write(staging)
+        os.replace(staging, destination)
+
+    def save_file(self, key: str, source: Path, *, content_type: str, cache_control: str | None = None) -> None:
+        self._publish(key, lambda staging: shutil.move(str(source), staging))
+
+    def save_bytes(self, key: str, data: bytes, *, content_type: str, cache_control: str | None = None) -> None:
+        self._publish(key, lambda staging: staging.write_bytes(data))
+
+    def open(self, key: str) -> BinaryIO:
+        return self._path(key).open("rb")
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def set_aside(self, key: str) -> str | None:
+        path = self._path(key)
+        tombstone = path.with_name(f".{path.name}.gc-{secrets.token_hex(4)}")
+        try:
+            os.replace(path, tombstone)
+        except FileNotFoundError:
+            return None
+        return str(tombstone)
+
+    def restore(self, key: str, token: str) -> None:
+        os.replace(token, self._path(key))
+
+    def purge(self, token: str) -> None:
+        Path(token).unlink(missing_ok=True)
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        for dirpath, dirnames, filenames in os.walk(self._path(prefix)):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = Path(dirpath) / filename
+                try:
+                    stat_result = path.stat()
+                except FileNotFoundError:
+                    continue
+                yield StoredObject(path.relative_to(self.root).as_posix(), stat_result.st_size, stat_result.st_mtime)
+
+    def local_path(self, key: str) -> Path | None:
+        return self._path(key)
+
+    def public_url(self, key: str) -> str | None:
+        return None
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        expires_in: int,
+        filename: str | None = None,
+        content_type: str | None = None,
+    ) -> str | None:
+        return None
+
+
+class S3Storage:
+    """Media in an S3-compatible bucket (AWS, MinIO, moto); clients download straight from the bucket."""
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        key_prefix: str = "",
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        access_key_id: str | None = None,
+        secret_access_key: str | None = None,
+        public_base_url: str | None = None,
+    ) -> None:
+        # imported lazily: botocore adds noticeable startup time to local-only deployments
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as exc:  # pragma: no cover - config error path
+            raise RuntimeError("MEDIA_STORAGE=s3 reikalauja boto3 paketo (pip install boto3).") from exc
+
+        self.bucket = bucket
+        self.key_prefix = key_prefix.strip("/") + "/" if key_prefix.strip("/") else ""
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            # MinIO and other self-hosted endpoints rarely have per-bucket DNS names
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if endpoint_url else "auto"}),
+        )
+
+    def _name(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    @staticmethod
+    def _is_missing(exc: Exception) -> bool:
+        error = getattr(exc, "response", {}).get("Error", {})
+        return error.get("Code") in {"404", "NoSuchKey", "NotFound"}
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._name(key))
+        except ClientError as exc:
+            if self._is_missing(exc):
+                return False
+            raise
+        return True
+
+    @staticmethod
+    def _extra_args(content_type: str, cache_control: str | None) -> dict[str, str]:
+        extra = {"ContentType": content_type}
+        if cache_control:
+            extra["CacheControl"] = cache_control
+        return extra
+
+    def save_file(self, key: str, source: Path, *, content_type: str, cache_control: str | None = None) -> None:
+        # upload_file streams from disk and switches to multipart uploads for large files
+        self.client.upload_file(
+            str(source), self.bucket, self._name(key), ExtraArgs=self._extra_args(content_type, cache_control)
+        )
+        source.unlink(missing_ok=True)
+
+    def save_bytes(self, key: str, data: bytes, *, content_type: str, cache_control: str | None = None) -> None:
+        self.client.put_object(
+            Bucket=self.bucket, Key=self._name(key), Body=data, **self._extra_args(content_type, cache_control)
+        )
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._name(key))["Body"]
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._name(key))
+
+    def set_aside(self, key: str) -> str | None:
+        from botocore.exceptions import ClientError
+
+        # buckets cannot rename, so the object is copied under the trash prefix and removed
+        token = self._name(f"{TRASH_PREFIX}/{key}.{secrets.token_hex(4)}")
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket, Key=token, CopySource={"Bucket": self.bucket, "Key": self._name(key)}
+            )
+        except ClientError as exc:
+            if self._is_missing(exc):
+                return None
+            raise
+        self.client.delete_object(Bucket=self.bucket, Key=self._name(key))
+        return token
+
+    def restore(self, key: str, token: str) -> None:
+        self.client.copy_object(Bucket=self.bucket, Key=self._name(key), CopySource={"Bucket": self.bucket, "Key": token})
+        self.client.delete_object(Bucket=self.bucket, Key=token)
+
+    def purge(self, token: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=token)
+
+    def iter_objects(self, prefix: str) -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._name(prefix.rstrip("/") + "/")):
+            for item in page.get("Contents", []):
+                yield StoredObject(
+                    item["Key"][len(self.key_prefix):],
+                    item["Size"],
+                    item["LastModified"].timestamp(),
+                )
+
+    def local_path(self, key: str) -> Path | None:
+        return None
+
+    def public_url(self, key: str) -> str | None:
+        if not self.public_base_url:
+            return None
+        return f"{self.public_base_url}/{quote(self._name(key))}"
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        expires_in: int,
+        filename: str | None = None,
+        content_type: str | None = None,
+    ) -> str | None:
+        params = {"Bucket": self.bucket, "Key": self._name(key)}
+        if filename:
+            params["ResponseContentDisposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+
+def resolve_media_root(value: str) -> Path:
+    """Relative ``MEDIA_ROOT`` values are anchored at ``backend/``, never the working directory."""
+    path = Path(value).expanduser()
+    return path if path.is_absolute() else BACKEND_DIR / path
+
+
+def build_storage_backend(config: Settings = settings) -> StorageBackend:
+    if config.media_storage == "s3":
+        if not config.s3_bucket:
+            raise RuntimeError("MEDIA_STORAGE=s3 reikalauja S3_BUCKET reikšmės.")
+        # blank values from an env file mean "unset": boto3 rejects an empty endpoint, and empty
+        # credentials would shadow its default chain (environment, profile, instance role)
+        return S3Storage(
+            config.s3_bucket,
+            key_prefix=config.s3_key_prefix,
+            endpoint_url=config.s3_endpoint_url or None,
+            region=config.s3_region or None,
+            access_key_id=config.s3_access_key_id or None,
+            secret_access_key=config.s3_secret_access_key or None,
+            public_base_url=config.media_public_base_url,
+        )
+    return LocalStorage(resolve_media_root(config.media_root))
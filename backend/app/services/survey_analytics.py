@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.plan_progress_survey import PlanProgressSurvey
+from app.models.plan_progress_survey_response import PlanProgressSurveyResponse
+from app.models.survey_answer_rollup import SurveyAnswerRollup
+from app.services.survey_registry import survey_registry
+
+# Per-question bucket counting respondents (and summing scale values); option buckets hold histograms.
+TOTAL_KEY = ""
+
+_BUCKET_COLUMNS = ("plan_id", "survey_type", "day_offset", "question_id", "answer_key")
+
+
+@dataclass
+class QuestionRollup:
+    survey_type: str
+    question_id: str
+    question_type: str
+    prompt: str
+    day_offset: int
+    responses: int = 0
+    average: float | None = None
+    distribution: dict[str, int] = field(default_factory=dict)
+
+
+def _answer_increments(
+    survey_type: str,
+    answers: dict[str, object],
+    definition_version: int | None,
+) -> dict[tuple[str, str], tuple[int, float]]:
+    """Map ``(question_id, answer_key)`` to the count and value deltas one response contributes."""
+    compiled = survey_registry.get(survey_type, definition_version)
+    increments: dict[tuple[str, str], tuple[int, float]] = {}
+    for question_id, value in answers.items():
+        question_type = compiled.question_types.get(question_id)
+        if question_type == "scale":
+            increments[(question_id, TOTAL_KEY)] = (1, float(value))  # type: ignore[arg-type]
+            increments[(question_id, str(value))] = (1, 0.0)
+        elif question_type == "single_choice":
+            increments[(question_id, TOTAL_KEY)] = (1, 0.0)
+            increments[(question_id, str(value))] = (1, 0.0)
+        elif question_type == "multi_choice":
+            increments[(question_id, TOTAL_KEY)] = (1, 0.0)
+            for option in set(value):  # type: ignore[arg-type]
+                increments[(question_id, str(option))] = (1, 0.0)
+        elif question_type == "text" and isinstance(value, str) and value.strip():
+            increments[(question_id, TOTAL_KEY)] = (1, 0.0)
+    return increments
+
+
+def _apply_increments(db: Session, rows: list[dict[str, object]]) -> None:
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in {"sqlite", "postgresql"}:
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        statement = insert(SurveyAnswerRollup)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(_BUCKET_COLUMNS),
+            set_={
+                "response_count": SurveyAnswerRollup.response_count + statement.excluded.response_count,
+                "value_sum": SurveyAnswerRollup.value_sum + statement.excluded.value_sum,
+            },
+        )
+        # executemany with one cached statement; a multi-row VALUES clause is recompiled for every row count
+        db.execute(statement, rows)
+        return
+
+    for row in rows:
+        bucket = (
+            db.query(SurveyAnswerRollup)
+            .filter(*[getattr(SurveyAnswerRollup, column) == row[column] for column in _BUCKET_COLUMNS])
+            .with_for_update()
+            .first()
+        )
+        if bucket is None:
+            db.add(SurveyAnswerRollup(**row))
+        else:
+            bucket.response_count += row["response_count"]  # type: ignore[operator]
+            bucket.value_sum += row["value_sum"]  # type: ignore[operator]
+    db.flush()
+
+
+def _bucket_rows(
+    plan_id: int,
+    survey_type: str,
+    day_offset: int,
+    increments: dict[tuple[str, str], tuple[int, float]],
+) -> list[dict[str, object]]:
+    return [
+        {
+            "plan_id": plan_id,
+            "survey_type": survey_type,
+            "day_offset": day_offset,
+            "question_id": question_id,
+            "answer_key": answer_key,
+            "response_count": count,
+            "value_sum": value_sum,
+        }
+        for (question_id, answer_key), (count, value_sum) in increments.items()
+    ]
+
+
+def update_survey_rollups(
+    db: Session,
+    survey: PlanProgressSurvey,
+    answers: dict[str, object],
+    definition_version: int | None = None,
+) -> None:
+    """Add one submitted response to the rollup buckets in the caller's transaction."""
+    increments = _answer_increments(survey.survey_type, answers, definition_version)
+    _apply_increments(db, _bucket_rows(survey.plan_id, survey.survey_type, survey.day_offset, increments))
+
+
+def add_survey_rollups(
+    db: Session,
+    responses: Iterable[tuple[int, str, int, dict[str, object], int | None]],
+) -> None:
+    """Add many ``(plan_id, survey_type, day_offset, answers, definition_version)`` responses at once.
+
+    Increments are merged per bucket first, so a batch costs a few upserts instead of one per response.
+    """
+    totals: dict[tuple[int, str, int, str, str], list[float]] = defaultdict(lambda: [0, 0.0])
+    for plan_id, survey_type, day_offset, answers, definition_version in responses:
+        for (question_id, answer_key), (count, value_sum) in _answer_increments(
+            survey_type, answers, definition_version
+        ).items():
+            bucket = totals[(plan_id, survey_type, day_offset, question_id, answer_key)]
+            bucket[0] += count
+            bucket[1] += value_sum
+
+    _apply_increments(
+        db,
+        [
+            {**dict(zip(_BUCKET_COLUMNS, key)), "response_count": int(count), "value_sum": value_sum}
+            for key, (count, value_sum) in totals.items()
+        ],
+    )
+
+
+def rebuild_survey_rollups(db: Session, batch_size: int = 500) -> None:
+    """Recompute every rollup bucket from stored responses."""
+    db.query(SurveyAnswerRollup).delete(synchronize_session=False)
+    totals: dict[tuple[int, str, int, str, str], list[float]] = defaultdict(lambda: [0, 0.0])
+    rows = (
+        db.query(
+            PlanProgressSurvey.plan_id,
+            PlanProgressSurvey.survey_type,
+            PlanProgressSurvey.day_offset,
+            PlanProgressSurveyResponse.answers,
+            PlanProgressSurveyResponse.definition_version,
+        )
+        .join(PlanProgressSurveyResponse, PlanProgressSurveyResponse.survey_id == PlanProgressSurvey.id)
+        .yield_per(batch_size)
+    )
+    for plan_id, survey_type, day_offset, answers, definition_version in rows:
+        for (question_id, answer_key), (count, value_sum) in _answer_increments(
+            survey_type, answers or {}, definition_version
+        ).items():
+            bucket = totals[(plan_id, survey_type, day_offset, question_id, answer_key)]
+            bucket[0] += count
+            bucket[1] += value_sum
+
+    db.bulk_insert_mappings(
+        SurveyAnswerRollup,
+        [
+            {
+                **dict(zip(_BUCKET_COLUMNS, key)),
+                "response_count": int(count),
+                "value_sum": value_sum,
+            }
+            for key, (count, value_sum) in totals.items()
+        ],
+    )
+    db.commit()
+
+
+def ensure_survey_rollups_backfilled(db: Session) -> None:
+    has_rollups = db.query(SurveyAnswerRollup.id).first() is not None
+    if not has_rollups and db.query(PlanProgressSurveyResponse.id).first() is not None:
+        rebuild_survey_rollups(db)
+
+
+def plan_survey_rollups(db: Session, plan_id: int, survey_type: str | None = None) -> list[QuestionRollup]:
+    """Per question and day offset averages and answer distributions for one plan."""
+    query = db.query(SurveyAnswerRollup).filter(SurveyAnswerRollup.plan_id == plan_id)
+    if survey_type:
+        query = query.filter(SurveyAnswerRollup.survey_type == survey_type)
+
+    results: dict[tuple[str, int, str], QuestionRollup] = {}
+    for bucket in query.order_by(
+        SurveyAnswerRollup.survey_type,
+        SurveyAnswerRollup.day_offset,
+        SurveyAnswerRollup.question_id,
+    ):
+        key = (bucket.survey_type, bucket.day_offset, bucket.question_id)
+        rollup = results.get(key)
+        if rollup is None:
+            compiled = survey_registry.get(bucket.survey_type)
+            rollup = QuestionRollup(
+                survey_type=bucket.survey_type,
+                question_id=bucket.question_id,
+                question_type=compiled.question_types.get(bucket.question_id, "text"),
+                prompt=compiled.prompt_for(bucket.question_id),
+                day_offset=bucket.day_offset,
+            )
+            results[key] = rollup
+        if bucket.answer_key == TOTAL_KEY:
+            rollup.responses = bucket.response_count
+            if rollup.question_type == "scale" and bucket.response_count:
+                rollup.average = round(bucket.value_sum / bucket.response_count, 3)
+        else:
+            rollup.distribution[bucket.answer_key] = bucket.response_count
+    return list(results.values())
+
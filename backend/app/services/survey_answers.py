@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from app.models.plan_progress_survey import PlanProgressSurvey
+from app.models.plan_progress_survey_answer import PlanProgressSurveyAnswer
+from app.models.plan_progress_survey_response import PlanProgressSurveyResponse
+from app.services.survey_registry import survey_registry
+
+BACKFILL_BATCH_SIZE = 500
+
+
+@dataclass
+class SegmentMember:
+    user_id: str
+    response_id: int
+    survey_id: int
+    plan_id: int
+    survey_type: str
+    day_offset: int
+    submitted_at: datetime
+    scale_value: int | None
+    choice_value: str | None
+
+
+def build_answer_rows(
+    *,
+    user_id: str,
+    plan_id: int,
+    survey_type: str,
+    definition_version: int | None,
+    answers: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """Split a response's answer mapping into typed rows (without ``response_id``)."""
+    compiled = survey_registry.get(survey_type, definition_version)
+    base = {"user_id": user_id, "plan_id": plan_id, "survey_type": survey_type}
+    rows: list[dict[str, Any]] = []
+    for question_id, value in answers.items():
+        question_type = compiled.question_types.get(question_id, "text")
+        row = {**base, "question_id": question_id, "question_type": question_type}
+        if question_type == "scale":
+            rows.append({**row, "scale_value": int(value)})
+        elif question_type == "single_choice":
+            rows.append({**row, "choice_value": str(value)})
+        elif question_type == "multi_choice":
+            rows.extend({**row, "choice_value": str(option)} for option in value)
+        else:
+            rows.append({**row, "text_value": "" if value is None else str(value)})
+    return rows
+
+
+def attach_answer_rows(response: PlanProgressSurveyResponse, survey: PlanProgressSurvey) -> None:
+    for row in build_answer_rows(
+        user_id=response.user_id,
+        plan_id=survey.plan_id,
+        survey_type=survey.survey_type,
+        definition_version=response.definition_version,
+        answers=response.answers,
+    ):
+        response.answer_rows.append(PlanProgressSurveyAnswer(**row))
+
+
+def _missing_answers_query():  # noqa: ANN202
+    return (
+        select(
+            PlanProgressSurveyResponse.id,
+            PlanProgressSurveyResponse.user_id,
+            PlanProgressSurveyResponse.answers,
+            PlanProgressSurveyResponse.definition_version,
+            PlanProgressSurvey.plan_id,
+            PlanProgressSurvey.survey_type,
+        )
+        .join(PlanProgressSurvey, PlanProgressSurvey.id == PlanProgressSurveyResponse.survey_id)
+        .where(
+            ~exists().where(PlanProgressSurveyAnswer.response_id == PlanProgressSurveyResponse.id)
+        )
+        .order_by(PlanProgressSurveyResponse.id)
+    )
+
+
+def backfill_survey_answers(db: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Normalize JSON answers of responses that have no typed rows yet.
+
+    Commits after every batch, so an interrupted run resumes where it stopped.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        batch = db.execute(
+            _missing_answers_query().where(PlanProgressSurveyResponse.id > last_id).limit(batch_size)
+        ).all()
+        if not batch:
+            return processed
+        mappings: list[dict[str, Any]] = []
+        for response_id, user_id, answers, definition_version, plan_id, survey_type in batch:
+            mappings.extend(
+                {**row, "response_id": response_id}
+                for row in build_answer_rows(
+                    user_id=user_id,
+                    plan_id=plan_id,
+                    survey_type=survey_type,
+                    definition_version=definition_version,
+                    answers=answers or {},
+                )
+            )
+        db.bulk_insert_mappings(PlanProgressSurveyAnswer, mappings)
+        db.commit()
+        processed += len(batch)
+        last_id = batch[-1][0]
+
+
+def ensure_survey_answers_backfilled(db: Session) -> None:
+    if db.execute(_missing_answers_query().limit(1)).first() is not None:
+        backfill_survey_answers(db)
+
+
+def find_segment(
+    db: Session,
+    question_id: str,
+    *,
+    min_scale: int | None = None,
+    max_scale: int | None = None,
+    choice: str | None = None,
+    plan_id: int | None = None,
+    survey_type: str | None = None,
+    limit: int = 100,
+) -> list[SegmentMember]:
+    """Responses whose answer to ``question_id`` matches the scale range and/or chosen option."""
+    query = (
+        db.query(
+            PlanProgressSurveyAnswer.user_id,
+            PlanProgressSurveyAnswer.response_id,
+            PlanProgressSurveyResponse.survey_id,
+            PlanProgressSurveyAnswer.plan_id,
+            PlanProgressSurveyAnswer.survey_type,
+            PlanProgressSurvey.day_offset,
+            PlanProgressSurveyResponse.submitted_at,
+            PlanProgressSurveyAnswer.scale_value,
+            PlanProgressSurveyAnswer.choice_value,
+        )
+        .join(PlanProgressSurveyResponse, PlanProgressSurveyResponse.id == PlanProgressSurveyAnswer.response_id)
+        .join(PlanProgressSurvey, PlanProgressSurvey.id == PlanProgressSurveyResponse.survey_id)
+        .filter(PlanProgressSurveyAnswer.question_id == question_id)
+    )
+    if min_scale is not None:
+        query = query.filter(PlanProgressSurveyAnswer.scale_value >= min_scale)
+    if max_scale is not None:
+        query = query.filter(PlanProgressSurveyAnswer.scale_value <= max_scale)
+    if choice is not None:
+        query = query.filter(PlanProgressSurveyAnswer.choice_value == choice)
+    if plan_id is not None:
+        query = query.filter(PlanProgressSurveyAnswer.plan_id == plan_id)
+    if survey_type:
+        query = query.filter(PlanProgressSurveyAnswer.survey_type == survey_type)
+
+    rows = query.order_by(PlanProgressSurveyAnswer.response_id.desc()).limit(limit).all()
+    return [SegmentMember(*row) for row in rows]
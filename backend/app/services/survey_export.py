@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.models.plan_progress_survey import PlanProgressSurvey
+from app.models.plan_progress_survey_response import PlanProgressSurveyResponse
+from app.models.plan_purchase import PlanPurchase
+
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    "response_id",
+    "submitted_at",
+    "definition_version",
+    "user_id",
+    "survey_id",
+    "survey_type",
+    "day_offset",
+    "scheduled_at",
+    "plan_id",
+    "plan_name",
+    "purchase_id",
+    "period_days",
+    "purchase_status",
+    "paid_at",
+    "answers",
+)
+
+
+@dataclass
+class SurveyExportFilters:
+    plan_id: int | None = None
+    survey_type: str | None = None
+    submitted_from: date | None = None
+    submitted_to: date | None = None
+
+
+def _export_statement(filters: SurveyExportFilters) -> Select[Any]:
+    statement = (
+        select(
+            PlanProgressSurveyResponse.id.label("response_id"),
+            PlanProgressSurveyResponse.submitted_at,
+            PlanProgressSurveyResponse.definition_version,
+            PlanProgressSurveyResponse.user_id,
+            PlanProgressSurvey.id.label("survey_id"),
+            PlanProgressSurvey.survey_type,
+            PlanProgressSurvey.day_offset,
+            PlanProgressSurvey.scheduled_at,
+            PlanProgressSurvey.plan_id,
+            PlanProgressSurvey.plan_name_snapshot.label("plan_name"),
+            PlanPurchase.id.label("purchase_id"),
+            PlanPurchase.period_days,
+            PlanPurchase.status.label("purchase_status"),
+            PlanPurchase.paid_at,
+            PlanProgressSurveyResponse.answers,
+        )
+        .join(PlanProgressSurvey, PlanProgressSurvey.id == PlanProgressSurveyResponse.survey_id)
+        .join(PlanPurchase, PlanPurchase.id == PlanProgressSurvey.plan_purchase_id)
+        .order_by(PlanProgressSurveyResponse.id)
+    )
+    if filters.plan_id is not None:
+        statement = statement.where(PlanProgressSurvey.plan_id == filters.plan_id)
+    if filters.survey_type:
+        statement = statement.where(PlanProgressSurvey.survey_type == filters.survey_type)
+    if filters.submitted_from:
+        statement = statement.where(
+            PlanProgressSurveyResponse.submitted_at >= datetime.combine(filters.submitted_from, time.min)
+        )
+    if filters.submitted_to:
+        # inclusive end date
+        statement = statement.where(
+            PlanProgressSurveyResponse.submitted_at
+            < datetime.combine(filters.submitted_to + timedelta(days=1), time.min)
+        )
+    return statement
+
+
+def iter_export_chunks(
+    session_factory: Callable[[], Session],
+    filters: SurveyExportFilters,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[list[dict[str, Any]]]:
+    """Yield export rows in fixed-size chunks from a server-side cursor.
+
+    The session is owned by the generator because a streamed response outlives the request's
+    ``get_db`` session.
+    """
+    db = session_factory()
+    try:
+        result = db.execute(
+            _export_statement(filters),
+            execution_options={"stream_results": True, "yield_per": chunk_size},
+        )
+        for partition in result.mappings().partitions(chunk_size):
+            yield [dict(row) for row in partition]
+    finally:
+        db.close()
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(chunks: Iterator[list[dict[str, Any]]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in chunks:
+        for row in chunk:
+            writer.writerow(
+                [
+                    json.dumps(row[column], ensure_ascii=False) if column == "answers" else _serialize(row[column])
+                    for column in EXPORT_COLUMNS
+                ]
+            )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(chunks: Iterator[list[dict[str, Any]]]) -> Iterator[str]:
+    for chunk in chunks:
+        yield "".join(
+            json.dumps({column: _serialize(row[column]) for column in EXPORT_COLUMNS}, ensure_ascii=False) + "\n"
+            for row in chunk
+        )
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from app.core.survey_definitions import CURRENT_SURVEY_VERSIONS, SURVEY_DEFINITIONS
+from app.schemas.survey import SurveyQuestion
+
+FALLBACK_SURVEY_TYPE = "final"
+
+
+class SurveyValidationError(ValueError):
+    """Raised when submitted answers do not match the survey definition."""
+
+
+class ScaleValidator:
+    __slots__ = ("minimum", "maximum")
+
+    def __init__(self, question: dict[str, Any]) -> None:
+        self.minimum = question.get("scale_min", 1)
+        self.maximum = question.get("scale_max", 5)
+
+    def __call__(self, value: object) -> object:
+        try:
+            number = int(value)  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            raise SurveyValidationError("Skalės klausimams reikia skaitinės reikšmės")
+        if number < self.minimum or number > self.maximum:
+            raise SurveyValidationError("Skalės reikšmė už ribų")
+        return number
+
+
+class SingleChoiceValidator:
+    __slots__ = ("options",)
+
+    def __init__(self, question: dict[str, Any]) -> None:
+        self.options = frozenset(question.get("options", []))
+
+    def __call__(self, value: object) -> object:
+        if not isinstance(value, str):
+            raise SurveyValidationError("Pasirinkite vieną iš pasiūlytų variantų")
+        if value not in self.options:
+            raise SurveyValidationError("Pasirinktas variantas neleistinas")
+        return value
+
+
+class MultiChoiceValidator:
+    __slots__ = ("options",)
+
+    def __init__(self, question: dict[str, Any]) -> None:
+        self.options = frozenset(question.get("options", []))
+
+    def __call__(self, value: object) -> object:
+        if not isinstance(value, list) or len(value) == 0:
+            raise SurveyValidationError("Pasirinkite bent vieną variantą")
+        # options are strings; checking the type first keeps unhashable items out of the set lookup
+        if not all(isinstance(item, str) and item in self.options for item in value):
+            raise SurveyValidationError("Pasirinktas variantas neleistinas")
+        return value
+
+
+class TextValidator:
+    __slots__ = ()
+
+    def __init__(self, question: dict[str, Any]) -> None:
+        pass
+
+    def __call__(self, value: object) -> object:
+        if value is None:
+            value = ""
+        if not isinstance(value, str):
+            raise SurveyValidationError("Komentarai turi būti tekstiniai")
+        return value
+
+
+VALIDATORS = {
+    "scale": ScaleValidator,
+    "single_choice": SingleChoiceValidator,
+    "multi_choice": MultiChoiceValidator,
+    "text": TextValidator,
+}
+
+
+@dataclass(frozen=True)
+class CompiledSurvey:
+    """One survey definition version with its validators and lookup tables prepared up front."""
+
+    survey_type: str
+    version: int
+    questions: tuple[SurveyQuestion, ...]
+    question_ids: tuple[str, ...]
+    prompts: dict[str, str]
+    question_types: dict[str, str]
+    validators: dict[str, Any]
+
+    def validate(self, answers: Iterable[tuple[str, object]]) -> dict[str, object]:
+        """Validate ``(question_id, value)`` pairs and return the normalized answer mapping."""
+        answers = list(answers)
+        provided = {question_id for question_id, _ in answers}
+        missing = [question_id for question_id in self.question_ids if question_id not in provided]
+        if missing:
+            raise SurveyValidationError(f"Trūksta atsakymų klausimams: {', '.join(missing)}")
+
+        normalized: dict[str, object] = {}
+        for question_id, value in answers:
+            validator = self.validators.get(question_id)
+            if validator is None:
+                raise SurveyValidationError("Nežinomas klausimo ID")
+            normalized[question_id] = validator(value)
+        return normalized
+
+    def prompt_for(self, question_id: str) -> str:
+        return self.prompts.get(question_id, question_id)
+
+
+def compile_survey(survey_type: str, version: int, questions: list[dict[str, Any]]) -> CompiledSurvey:
+    validators: dict[str, Any] = {}
+    for question in questions:
+        validator_class = VALIDATORS.get(question["type"])
+        if validator_class is None:
+            raise ValueError(f"Unknown survey question type {question['type']!r} in {survey_type} v{version}")
+        validators[question["id"]] = validator_class(question)
+
+    return CompiledSurvey(
+        survey_type=survey_type,
+        version=version,
+        questions=tuple(SurveyQuestion.model_validate(question) for question in questions),
+        question_ids=tuple(question["id"] for question in questions),
+        prompts={question["id"]: str(question.get("prompt", question["id"])) for question in questions},
+        question_types={question["id"]: question["type"] for question in questions},
+        validators=validators,
+    )
+
+
+class SurveyRegistry:
+    """Compiles each survey definition version once and serves it for the life of the process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._compiled: dict[tuple[str, int], CompiledSurvey] = {}
+
+    @staticmethod
+    def _resolve_type(survey_type: str) -> str:
+        return survey_type if survey_type in SURVEY_DEFINITIONS else FALLBACK_SURVEY_TYPE
+
+    def current_version(self, survey_type: str) -> int:
+        return CURRENT_SURVEY_VERSIONS[self._resolve_type(survey_type)]
+
+    def get(self, survey_type: str, version: int | None = None) -> CompiledSurvey:
+        resolved_type = self._resolve_type(survey_type)
+        versions = SURVEY_DEFINITIONS[resolved_type]
+        if version is None or version not in versions:
+            version = CURRENT_SURVEY_VERSIONS[resolved_type]
+
+        key = (resolved_type, version)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.get(key)
+                if compiled is None:
+                    compiled = compile_survey(resolved_type, version, versions[version])
+                    self._compiled[key] = compiled
+        return compiled
+
+    def is_warm(self) -> bool:
+        """Whether every known definition version has been compiled."""
+        return all(
+            (survey_type, version) in self._compiled
+            for survey_type, versions in SURVEY_DEFINITIONS.items()
+            for version in versions
+        )
+
+    def warm(self) -> None:
+        for survey_type, versions in SURVEY_DEFINITIONS.items():
+            for version in versions:
+                self.get(survey_type, version)
+
+
+survey_registry = SurveyRegistry()
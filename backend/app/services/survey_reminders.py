@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import smtplib
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.header import Header
+from email.mime.text import MIMEText
+from email.utils import make_msgid, parseaddr
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.plan_progress_survey import PlanProgressSurvey
+from app.models.plan_purchase import PlanPurchase
+from app.models.user import User
+from app.services.surveys import CANCELLED_STATUS, SCHEDULED_STATUS
+
+# reminder_state: NULL (not sent yet) -> "sending" (claimed by a dispatcher) -> "sent" | "failed".
+# A claimed reminder is never picked up again, so a crash between sending and marking it
+# can lose a reminder but cannot send it twice.
+# ``status`` is only brought up to date when the user opens their profile, so a survey that has
+# come due may still read "cancelled"; due-ness is decided by ``scheduled_at`` alone.
+OPEN_STATUSES = (SCHEDULED_STATUS, CANCELLED_STATUS)
+PAID_PURCHASE_STATUS = "paid"
+REMINDER_SENDING = "sending"
+REMINDER_SENT = "sent"
+REMINDER_FAILED = "failed"
+
+
+class ReminderTransportError(Exception):
+    """Raised when the SMTP server cannot be reached for a whole batch."""
+
+
+@dataclass
+class SurveyReminder:
+    survey_id: int
+    survey_type: str
+    plan_name: str
+    email: str
+    first_name: str | None
+
+
+@dataclass
+class DispatchReport:
+    batches: int = 0
+    sent: int = 0
+    failed: int = 0
+    released: int = 0
+    failed_ids: list[int] = field(default_factory=list)
+
+
+def claim_due_reminders(db: Session, now: datetime, batch_size: int) -> list[SurveyReminder]:
+    """Atomically mark up to ``batch_size`` due surveys as being reminded and return them."""
+    statement = (
+        select(
+            PlanProgressSurvey.id,
+            PlanProgressSurvey.survey_type,
+            PlanProgressSurvey.plan_name_snapshot,
+            User.email,
+            User.first_name,
+        )
+        .join(User, User.id == PlanProgressSurvey.user_id)
+        .join(PlanPurchase, PlanPurchase.id == PlanProgressSurvey.plan_purchase_id)
+        .where(
+            PlanProgressSurvey.status.in_(OPEN_STATUSES),
+            PlanProgressSurvey.scheduled_at <= now,
+            PlanProgressSurvey.reminder_state.is_(None),
+            PlanPurchase.status == PAID_PURCHASE_STATUS,
+        )
+        .order_by(PlanProgressSurvey.scheduled_at, PlanProgressSurvey.id)
+        .limit(batch_size)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        # concurrent dispatchers take disjoint batches instead of waiting on each other
+        statement = statement.with_for_update(of=PlanProgressSurvey, skip_locked=True)
+    rows = db.execute(statement).all()
+    if not rows:
+        db.rollback()
+        return []
+
+    claimed = db.execute(
+        update(PlanProgressSurvey)
+        .where(
+            PlanProgressSurvey.id.in_([row.id for row in rows]),
+            PlanProgressSurvey.reminder_state.is_(None),
+        )
+        .values(reminder_state=REMINDER_SENDING)
+        .returning(PlanProgressSurvey.id)
+    ).scalars().all()
+    db.commit()
+
+    claimed_ids = set(claimed)
+    return [
+        SurveyReminder(
+            survey_id=row.id,
+            survey_type=row.survey_type,
+            plan_name=row.plan_name_snapshot,
+            email=row.email,
+            first_name=row.first_name,
+        )
+        for row in rows
+        if row.id in claimed_ids
+    ]
+
+
+def build_reminder_message(reminder: SurveyReminder) -> MIMEText:
+    # compat32 MIMEText: the default-policy EmailMessage spends ~2 ms per message parsing headers
+    survey_name = "baigiamoji apklausa" if reminder.survey_type == "final" else "progreso apklausa"
+    link = f"{settings.frontend_base_url.rstrip('/')}/surveys/{reminder.survey_id}"
+    greeting = f"Sveiki, {reminder.first_name}!" if reminder.first_name else "Sveiki!"
+    message = MIMEText(
+        f"{greeting}\n\n"
+        f"Jūsų plano „{reminder.plan_name}“ {survey_name} jau laukia. "
+        f"Užpildyti galite čia:\n{link}\n\n"
+        "Ačiū, kad padedate mums tobulinti planą!\nFitBite komanda\n",
+        "plain",
+        "utf-8",
+    )
+    message["From"] = settings.reminder_sender_email
+    message["To"] = reminder.email
+    message["Subject"] = Header(f"FitBite: laukia jūsų {survey_name}", "utf-8")
+    message["Message-ID"] = make_msgid(domain="fitbite.lt")
+    return message
+
+
+def open_smtp_connection() -> smtplib.SMTP:
+    try:
+        connection = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout_seconds)
+        if settings.smtp_use_tls:
+            connection.starttls()
+        if settings.smtp_username:
+            connection.login(settings.smtp_username, settings.smtp_password or "")
+    except (OSError, smtplib.SMTPException) as exc:
+        raise ReminderTransportError(str(exc)) from exc
+    return connection
+
+
+def send_reminders(reminders: list[SurveyReminder]) -> tuple[list[int], list[int]]:
+    """Send a batch over one SMTP connection; returns ``(sent_ids, failed_ids)``.
+
+    If the connection drops mid-batch the rest of the batch is left out of both lists. The
+    message in flight counts as failed because it may already have been delivered.
+    """
+    sent: list[int] = []
+    failed: list[int] = []
+    sender = parseaddr(settings.reminder_sender_email)[1]
+    connection = open_smtp_connection()
+    try:
+        for reminder in reminders:
+            try:
+                connection.sendmail(sender, [reminder.email], build_reminder_message(reminder).as_bytes())
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused):
+                failed.append(reminder.survey_id)
+            except (OSError, smtplib.SMTPException):
+                failed.append(reminder.survey_id)
+                break
+            else:
+                sent.append(reminder.survey_id)
+    finally:
+        try:
+            connection.quit()
+        except (OSError, smtplib.SMTPException):
+            connection.close()
+    return sent, failed
+
+
+def _set_reminder_state(db: Session, survey_ids: list[int], state: str | None, sent_at: datetime | None) -> None:
+    if survey_ids:
+        db.execute(
+            update(PlanProgressSurvey)
+            .where(PlanProgressSurvey.id.in_(survey_ids))
+            .values(reminder_state=state, reminder_sent_at=sent_at)
+        )
+
+
+def dispatch_due_reminders(
+    db: Session,
+    *,
+    now: datetime | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> DispatchReport:
+    """Drain due surveys batch by batch until none are left (or ``max_batches`` is reached)."""
+    batch_size = batch_size or settings.reminder_batch_size
+    report = DispatchReport()
+    while max_batches is None or report.batches < max_batches:
+        now_value = now or datetime.utcnow()
+        reminders = claim_due_reminders(db, now_value, batch_size)
+        if not reminders:
+            break
+        report.batches += 1
+
+        sent_ids: list[int] = []
+        failed_ids: list[int] = []
+        try:
+            sent_ids, failed_ids = send_reminders(reminders)
+        except ReminderTransportError:
+            pass
+        finally:
+            finished = set(sent_ids) | set(failed_ids)
+            released = [reminder.survey_id for reminder in reminders if reminder.survey_id not in finished]
+            _set_reminder_state(db, sent_ids, REMINDER_SENT, datetime.utcnow())
+            _set_reminder_state(db, failed_ids, REMINDER_FAILED, None)
+            _set_reminder_state(db, released, None, None)
+            db.commit()
+
+        report.sent += len(sent_ids)
+        report.failed += len(failed_ids)
+        report.failed_ids.extend(failed_ids)
+        report.released += len(released)
+        if released:
+            # SMTP is unavailable; retry on the next poll instead of spinning
+            break
+    return report
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import bindparam, delete, exists, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.command_checkpoint import CommandCheckpoint
+from app.models.plan_progress_survey import PlanProgressSurvey
+from app.models.plan_purchase import PlanPurchase
+from app.services.surveys import COMPLETED_STATUS, build_survey_schedule
+
+PAID_STATUS = "paid"
+
+RescheduleMode = Literal["backfill", "recompute"]
+
+
+@dataclass
+class RescheduleChunk:
+    purchases: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    last_purchase_id: int = 0
+
+
+def checkpoint_name(mode: RescheduleMode, interval_days: int) -> str:
+    return f"reschedule_surveys:{mode}:{interval_days}"
+
+
+def load_checkpoint(db: Session, name: str) -> int:
+    checkpoint = db.get(CommandCheckpoint, name)
+    return checkpoint.position if checkpoint else 0
+
+
+def reset_checkpoint(db: Session, name: str) -> None:
+    db.execute(delete(CommandCheckpoint).where(CommandCheckpoint.name == name))
+    db.commit()
+
+
+def _save_checkpoint(db: Session, name: str, position: int) -> None:
+    checkpoint = db.get(CommandCheckpoint, name)
+    if checkpoint is None:
+        db.add(CommandCheckpoint(name=name, position=position))
+    else:
+        checkpoint.position = position
+    db.flush()
+
+
+def _insert_ignoring_duplicates(db: Session, rows: list[dict[str, Any]]) -> None:
+    """Insert survey rows, skipping ones the API created concurrently for the same offset."""
+    if not rows:
+        return
+    # Core executemany: the ORM bulk path splits rows around NULL values into per-row statements
+    table = PlanProgressSurvey.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        db.execute(sqlite.insert(table).on_conflict_do_nothing(), rows)
+    elif dialect == "postgresql":
+        db.execute(postgresql.insert(table).on_conflict_do_nothing(), rows)
+    else:
+        db.execute(insert(table), rows)
+
+
+def _plan_purchase(
+    desired: list[dict[str, Any]],
+    existing: list[Any],
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], list[int]]:
+    """Diff one purchase's surveys against the policy: ``(inserts, updates, delete_ids)``.
+
+    Unanswered surveys at offsets the policy no longer uses are moved to the new offsets
+    (keeping their ids and any links already sent); only the surplus is deleted.
+    """
+    existing_keys = {(row.survey_type, row.day_offset) for row in existing}
+    desired_keys = {(row["survey_type"], row["day_offset"]) for row in desired}
+
+    missing: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for row in desired:
+        if (row["survey_type"], row["day_offset"]) not in existing_keys:
+            missing[row["survey_type"]].append(row)
+    stale: dict[str, list[Any]] = defaultdict(list)
+    for row in existing:
+        if (row.survey_type, row.day_offset) not in desired_keys and row.status != COMPLETED_STATUS:
+            stale[row.survey_type].append(row)
+
+    inserts: list[dict[str, Any]] = []
+    updates: list[dict[str, Any]] = []
+    delete_ids: list[int] = []
+    for survey_type in set(missing) | set(stale):
+        targets = missing.get(survey_type, [])
+        sources = sorted(stale.get(survey_type, []), key=lambda row: row.day_offset)
+        for source, target in zip(sources, targets):
+            updates.append(
+                {
+                    "b_id": source.id,
+                    "day_offset": target["day_offset"],
+                    "scheduled_at": target["scheduled_at"],
+                    "status": target["status"],
+                    "cancelled_at": target["cancelled_at"],
+                }
+            )
+        inserts.extend(targets[len(sources):])
+        delete_ids.extend(row.id for row in sources[len(targets):])
+    return inserts, updates, delete_ids
+
+
+def reschedule_chunk(
+    db: Session,
+    *,
+    mode: RescheduleMode,
+    after_purchase_id: int,
+    chunk_size: int,
+    interval_days: int,
+    checkpoint: str,
+    now: datetime | None = None,
+) -> RescheduleChunk | None:
+    """Bring the next ``chunk_size`` paid purchases in line with the schedule policy.
+
+    Writes and the checkpoint are committed together, so a rerun continues after the last
+    committed chunk. Every write re-checks ``status != completed``, so a survey answered while
+    the command runs is never moved or deleted. Returns ``None`` once no purchases are left.
+    """
+    now = now or datetime.utcnow()
+    query = (
+        select(
+            PlanPurchase.id,
+            PlanPurchase.user_id,
+            PlanPurchase.plan_id,
+            PlanPurchase.plan_name_snapshot,
+            PlanPurchase.period_days,
+            PlanPurchase.paid_at,
+            PlanPurchase.created_at,
+        )
+        .where(
+            PlanPurchase.id > after_purchase_id,
+            PlanPurchase.status == PAID_STATUS,
+            PlanPurchase.period_days > 0,
+        )
+        .order_by(PlanPurchase.id)
+        .limit(chunk_size)
+    )
+    if mode == "backfill":
+        query = query.where(~exists().where(PlanProgressSurvey.plan_purchase_id == PlanPurchase.id))
+    purchases = db.execute(query).all()
+    if not purchases:
+        return None
+
+    existing_by_purchase: dict[int, list[Any]] = defaultdict(list)
+    if mode == "recompute":
+        for row in db.execute(
+            select(
+                PlanProgressSurvey.id,
+                PlanProgressSurvey.plan_purchase_id,
+                PlanProgressSurvey.survey_type,
+                PlanProgressSurvey.day_offset,
+                PlanProgressSurvey.status,
+            ).where(PlanProgressSurvey.plan_purchase_id.in_([purchase.id for purchase in purchases]))
+        ):
+            existing_by_purchase[row.plan_purchase_id].append(row)
+
+    inserts: list[dict[str, Any]] = []
+    updates: list[dict[str, Any]] = []
+    delete_ids: list[int] = []
+    for purchase in purchases:
+        start_at = purchase.paid_at or purchase.created_at
+        if not start_at:
+            continue
+        desired = build_survey_schedule(
+            user_id=purchase.user_id,
+            purchase_id=purchase.id,
+            plan_id=purchase.plan_id,
+            plan_name=purchase.plan_name_snapshot,
+            period_days=purchase.period_days,
+            start_at=start_at,
+            now=now,
+            interval_days=interval_days,
+        )
+        purchase_inserts, purchase_updates, purchase_deletes = _plan_purchase(
+            desired, existing_by_purchase.get(purchase.id, [])
+        )
+        inserts.extend(purchase_inserts)
+        updates.extend(purchase_updates)
+        delete_ids.extend(purchase_deletes)
+
+    table = PlanProgressSurvey.__table__
+    if delete_ids:
+        db.execute(
+            delete(table).where(table.c.id.in_(delete_ids), table.c.status != COMPLETED_STATUS)
+        )
+    if updates:
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.status != COMPLETED_STATUS)
+            .values(
+                day_offset=bindparam("day_offset"),
+                scheduled_at=bindparam("scheduled_at"),
+                status=bindparam("status"),
+                cancelled_at=bindparam("cancelled_at"),
+                reminder_state=None,
+                reminder_sent_at=None,
+            ),
+            updates,
+        )
+    _insert_ignoring_duplicates(db, inserts)
+
+    last_purchase_id = purchases[-1].id
+    _save_checkpoint(db, checkpoint, last_purchase_id)
+    db.commit()
+    return RescheduleChunk(
+        purchases=len(purchases),
+        inserted=len(inserts),
+        updated=len(updates),
+        deleted=len(delete_ids),
+        last_purchase_id=last_purchase_id,
+    )
@@ -1,53 +1,82 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
+from typing import Any
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.survey_definitions import SURVEY_DEFINITIONS
 from app.models.plan_progress_survey import PlanProgressSurvey
 from app.models.plan_progress_survey_response import PlanProgressSurveyResponse
 from app.models.plan_purchase import PlanPurchase
+from app.services.survey_analytics import update_survey_rollups
+from app.services.survey_answers import attach_answer_rows
+from app.services.survey_registry import survey_registry
 
 CANCELLED_STATUS = "cancelled"
 SCHEDULED_STATUS = "scheduled"
+COMPLETED_STATUS = "completed"
+
+
+def survey_offsets(period_days: int, interval_days: int | None = None) -> list[int]:
+    """Day offsets of the progress surveys followed by the final survey on the last day."""
+    interval = interval_days or settings.survey_interval_days
+    if period_days <= 0:
+        return []
+    return [*range(interval, period_days, interval), period_days]
+
+
+def build_survey_schedule(
+    *,
+    user_id: str,
+    purchase_id: int,
+    plan_id: int,
+    plan_name: str,
+    period_days: int,
+    start_at: datetime,
+    now: datetime,
+    interval_days: int | None = None,
+) -> list[dict[str, Any]]:
+    """Column values of every survey a purchase should have under the current schedule policy."""
+    rows: list[dict[str, Any]] = []
+    for offset in survey_offsets(period_days, interval_days):
+        scheduled_at = start_at + timedelta(days=offset)
+        effective_scheduled_at = scheduled_at.replace(tzinfo=None) if scheduled_at.tzinfo else scheduled_at
+        is_in_future = effective_scheduled_at > now
+        rows.append(
+            {
+                "user_id": user_id,
+                "plan_purchase_id": purchase_id,
+                "plan_id": plan_id,
+                "plan_name_snapshot": plan_name,
+                "survey_type": "final" if offset == period_days else "progress",
+                "day_offset": offset,
+                "scheduled_at": scheduled_at,
+                "status": SCHEDULED_STATUS if is_in_future else CANCELLED_STATUS,
+                "cancelled_at": None if is_in_future else now,
+            }
+        )
+    return rows
 
 
 def schedule_surveys_for_purchase(db: Session, purchase: PlanPurchase) -> None:
     """Create progress and final survey schedule for a purchase."""
 
-    if purchase.period_days <= 0:
-        return
-
     start_at = purchase.paid_at or purchase.created_at
     if not start_at:
         return
 
-    offsets: list[int] = []
-    day = 5
-    while day < purchase.period_days:
-        offsets.append(day)
-        day += 5
-    offsets.append(purchase.period_days)
-
-    now = datetime.utcnow()
-    for offset in offsets:
-        scheduled_at = start_at + timedelta(days=offset)
-        survey_type = "final" if offset == purchase.period_days else "progress"
-        effective_scheduled_at = scheduled_at.replace(tzinfo=None) if scheduled_at.tzinfo else scheduled_at
-        is_in_future = effective_scheduled_at > now
-        status = SCHEDULED_STATUS if is_in_future else CANCELLED_STATUS
-        survey = PlanProgressSurvey(
-            user_id=purchase.user_id,
-            plan_purchase_id=purchase.id,
-            plan_id=purchase.plan_id,
-            plan_name_snapshot=purchase.plan_name_snapshot,
-            survey_type=survey_type,
-            day_offset=offset,
-            scheduled_at=scheduled_at,
-            status=status,
-            cancelled_at=None if is_in_future else now,
-        )
-        db.add(survey)
+    rows = build_survey_schedule(
+        user_id=purchase.user_id,
+        purchase_id=purchase.id,
+        plan_id=purchase.plan_id,
+        plan_name=purchase.plan_name_snapshot,
+        period_days=purchase.period_days,
+        start_at=start_at,
+        now=datetime.utcnow(),
+    )
+    db.add_all(PlanProgressSurvey(**row) for row in rows)
 
 
 def activate_final_survey(db: Session, purchase: PlanPurchase, trigger_time: datetime | None = None) -> None:
@@ -74,6 +103,8 @@ def activate_final_survey(db: Session, purchase: PlanPurchase, trigger_time: dat
         final.day_offset = day_offset
         final.cancelled_at = None
         final.completed_at = None
+        final.reminder_state = None
+        final.reminder_sent_at = None
         db.add(final)
     else:
         survey = PlanProgressSurvey(
@@ -90,136 +121,9 @@ def activate_final_survey(db: Session, purchase: PlanPurchase, trigger_time: dat
 
 
 def get_questions_for_type(survey_type: str) -> list[dict]:
-    if survey_type == "progress":
-        return [
-            {
-                "id": "overall_wellbeing",
-                "prompt": "Kaip vertinate bendrą savijautą ir energijos lygį pastarosiomis dienomis?",
-                "type": "scale",
-                "scale_min": 1,
-                "scale_max": 5,
-                "scale_min_label": "Labai prasta",
-                "scale_max_label": "Puiki",
-            },
-            {
-                "id": "plan_adherence",
-                "prompt": "Kiek lengva laikytis suplanuotų patiekalų ir užkandžių grafiko?",
-                "type": "scale",
-                "scale_min": 1,
-                "scale_max": 5,
-                "scale_min_label": "Labai sudėtinga",
-                "scale_max_label": "Labai paprasta",
-            },
-            {
-                "id": "satiety_level",
-                "prompt": "Kaip vertinate sotumo jausmą po valgių?",
-                "type": "scale",
-                "scale_min": 1,
-                "scale_max": 5,
-                "scale_min_label": "Nuolat alksta",
-                "scale_max_label": "Visada pakanka",
-            },
-            {
-                "id": "main_challenge",
-                "prompt": "Kas šiuo metu didžiausias iššūkis laikantis plano?",
-                "type": "single_choice",
-                "options": [
-                    "Trūksta laiko pasiruošti patiekalus",
-                    "Norisi daugiau skonių ar įvairovės",
-                    "Porcijų dydžiai netinka",
-                    "Motyvacijos ar palaikymo stoka",
-                    "Kita (įrašysiu komentaruose)",
-                ],
-            },
-            {
-                "id": "support_need",
-                "prompt": "Kokių papildomų išteklių ar pagalbos norėtumėte artimiausioms dienoms?",
-                "type": "multi_choice",
-                "options": [
-                    "Greitų patiekalų idėjų",
-                    "Receptų su mažiau ingredientų",
-                    "Motyvacijos palaikymo patarimų",
-                    "Aiškesnio apsipirkimo plano",
-                    "Kitų (įrašysiu komentaruose)",
-                ],
-                "help_text": "Galite pasirinkti kelis variantus",
-            },
-            {
-                "id": "progress_note",
-                "prompt": "Pasidalinkite įžvalgomis, pastebėjimais ar klausimais dietologui.",
-                "type": "text",
-                "help_text": "Galite palikti tuščią, jeigu šiuo metu pastabų neturite.",
-            },
-        ]
-
-    # final survey
-    return [
-        {
-            "id": "result_satisfaction",
-            "prompt": "Kaip vertinate pasiektus rezultatus užbaigus planą?",
-            "type": "scale",
-            "scale_min": 1,
-            "scale_max": 5,
-            "scale_min_label": "Nepatenkintas",
-            "scale_max_label": "Labai patenkintas",
-        },
-        {
-            "id": "meal_quality",
-            "prompt": "Kaip vertinate patiekalų skonį, kokybę ir pateikimą?",
-            "type": "scale",
-            "scale_min": 1,
-            "scale_max": 5,
-            "scale_min_label": "Silpnai",
-            "scale_max_label": "Puikiai",
-        },
-        {
-            "id": "routine_fit",
-            "prompt": "Kiek mitybos planas dera su jūsų dienos ritmu ir įpročiais?",
-            "type": "scale",
-            "scale_min": 1,
-            "scale_max": 5,
-            "scale_min_label": "Visai nederėjo",
-            "scale_max_label": "Puikiai pritaikytas",
-        },
-        {
-            "id": "support_needed",
-            "prompt": "Ko labiausiai norėtumėte kitame mitybos plane?",
-            "type": "multi_choice",
-            "options": [
-                "Daugiau skirtingų receptų ir skonių",
-                "Paprasčiau paruošiamų patiekalų",
-                "Individualizuotų pasiūlymų pagal alergijas / apribojimus",
-                "Detalesnio apsipirkimo ir paruošimo plano",
-                "Tolesnio dietologo ar trenerio palaikymo",
-                "Kita (įrašysiu komentaruose)",
-            ],
-            "help_text": "Galite pasirinkti kelis variantus",
-        },
-        {
-            "id": "goal_progress",
-            "prompt": "Kokį pokytį pastebėjote (svorio, savijautos, gyvenimo būdo)?",
-            "type": "text",
-            "help_text": "Įvardykite konkrečius pokyčius ar skaičius, jei galite.",
-        },
-        {
-            "id": "feedback",
-            "prompt": "Papildomi komentarai, pasiūlymai ar klausimai mūsų komandai.",
-            "type": "text",
-            "help_text": "Padėkite mums dar labiau pagerinti planą ateityje.",
-        },
-        {
-            "id": "next_goals",
-            "prompt": "Kokį kitą tikslą norėtumėte pasiekti su mūsų pagalba?",
-            "type": "single_choice",
-            "options": [
-                "Toliau optimizuoti dabartinį svorį",
-                "Didinti raumenų masę / sportinius rezultatus",
-                "Pagerinti bendrą savijautą ir energiją",
-                "Sukaupti žinių savarankiškam planavimui",
-                "Dar nežinau – laukiu profesionalo rekomendacijos",
-            ],
-        },
-    ]
+    """Raw question dicts of the current definition version of ``survey_type``."""
+    compiled = survey_registry.get(survey_type)
+    return SURVEY_DEFINITIONS[compiled.survey_type][compiled.version]
 
 
 def record_survey_response(
@@ -227,14 +131,18 @@ def record_survey_response(
     survey: PlanProgressSurvey,
     user_id: str,
     answers: dict,
+    definition_version: int | None = None,
 ) -> PlanProgressSurveyResponse:
     response = PlanProgressSurveyResponse(
         survey_id=survey.id,
         user_id=user_id,
         answers=answers,
+        definition_version=definition_version or survey_registry.current_version(survey.survey_type),
     )
+    attach_answer_rows(response, survey)
     db.add(response)
-    survey.status = "completed"
+    update_survey_rollups(db, survey, answers, response.definition_version)
+    survey.status = COMPLETED_STATUS
     survey.completed_at = datetime.utcnow()
     db.add(survey)
     return response
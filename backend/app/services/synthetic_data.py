@@ -0,0 +1,619 @@
+from __future__ import annotations
+
+import random
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import cached_property
+from types import SimpleNamespace
+from typing import Any, Callable, get_args
+
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+
+from app.core.allergens import ALLERGEN_IDS, serialize_allergens
+from app.core.security import get_password_hash
+from app.models.nutrition_plan import NutritionPlan
+from app.models.plan_meal import PlanMeal
+from app.models.plan_period_pricing import PlanPeriodPricing
+from app.models.plan_progress_survey import PlanProgressSurvey
+from app.models.plan_progress_survey_answer import PlanProgressSurveyAnswer
+from app.models.plan_progress_survey_response import PlanProgressSurveyResponse
+from app.models.plan_purchase import PlanPurchase, PlanPurchaseItem
+from app.models.user import User
+from app.schemas.user import ActivityLevelLiteral, GoalLiteral
+from app.services.discounts import FIRST_PURCHASE_PERCENT
+from app.services.plan_catalog import refresh_plan_catalog_fields
+from app.services.search import rebuild_search_index
+from app.services.seed import DEFAULT_DAILY_PRICE_BY_GOAL, WEEK_DAYS, build_pricing_options
+from app.services.survey_analytics import add_survey_rollups
+from app.services.survey_answers import build_answer_rows
+from app.services.survey_registry import survey_registry
+from app.services.surveys import COMPLETED_STATUS, build_survey_schedule, get_questions_for_type
+
+SYNTHETIC_EMAIL_DOMAIN = "synthetic.fitbite.lt"
+DEFAULT_PASSWORD = "Sintetinis123!"
+
+FIRST_NAMES = (
+    "Jonas", "Lukas", "Matas", "Dovydas", "Mantas", "Tomas", "Paulius", "Rokas", "Andrius", "Karolis",
+    "Ieva", "Rūta", "Austėja", "Gabija", "Eglė", "Laura", "Greta", "Kotryna", "Milda", "Ugnė",
+)
+LAST_NAMES = (
+    "Kazlauskas", "Jankauskas", "Petrauskas", "Stankevičius", "Vasiliauskas", "Žukauskas", "Butkus",
+    "Paulauskas", "Urbonas", "Kavaliauskas", "Navickas", "Ramanauskas", "Savickas", "Rimkus", "Šimkus",
+)
+DIETARY_PREFERENCES = (
+    "Vegetariška mityba", "Be laktozės", "Mažiau angliavandenių", "Daugiau žuvies", "Be kiaulienos",
+)
+PROGRESS_NOTES = (
+    "Energijos daugiau nei anksčiau.",
+    "Norėtųsi daugiau užkandžių variantų.",
+    "Porcijos vakarienei kiek per didelės.",
+    "Sunku spėti pasiruošti pusryčius darbo dienomis.",
+)
+GOALS: tuple[str, ...] = get_args(GoalLiteral)
+ACTIVITY_LEVELS: tuple[str, ...] = get_args(ActivityLevelLiteral)
+CUSTOM_PLAN_MEAL_TYPES = ("breakfast", "lunch", "dinner")
+# weights lean on the week and two-week options, like real checkouts
+PERIOD_WEIGHTS = {1: 4, 2: 2, 3: 3, 4: 1, 5: 2, 6: 1, 7: 45, 14: 42}
+PAYMENT_METHOD_WEIGHTS = {"card": 70, "bank_transfer": 20, "cash": 10}
+PURCHASE_STATUS_WEIGHTS = {"paid": 90, "cancelled": 7, "pending": 3}
+# typed answer rows only carry their own value column; executemany needs every row to have all of them
+EMPTY_ANSWER_VALUES = {"scale_value": None, "choice_value": None, "text_value": None}
+
+# tables whose integer ids are assigned here; Postgres sequences are moved past them afterwards
+_ID_MODELS = (
+    NutritionPlan,
+    PlanMeal,
+    PlanPeriodPricing,
+    PlanPurchase,
+    PlanPurchaseItem,
+    PlanProgressSurvey,
+    PlanProgressSurveyResponse,
+    PlanProgressSurveyAnswer,
+)
+
+
+class SyntheticDataError(RuntimeError):
+    """Raised when a dataset cannot be generated into the current database."""
+
+
+@dataclass
+class SyntheticDataSpec:
+    users: int
+    custom_plans: int
+    purchases: int
+    seed: int = 1
+    # timestamps are spread over ``history_days`` before ``until``; a fixed ``until`` reproduces a dataset exactly
+    until: datetime = field(default_factory=lambda: datetime.combine(date.today(), datetime.min.time()))
+    history_days: int = 365
+    response_rate: float = 0.6
+    password: str = DEFAULT_PASSWORD
+
+
+@dataclass
+class SyntheticDataReport:
+    users: int = 0
+    plans: int = 0
+    meals: int = 0
+    purchases: int = 0
+    items: int = 0
+    surveys: int = 0
+    responses: int = 0
+    answers: int = 0
+
+    def describe(self) -> str:
+        return " ".join(f"{name}={value}" for name, value in vars(self).items())
+
+
+@dataclass
+class _Buyer:
+    id: str
+    full_name: str
+    email: str
+    goal: str
+    created_at: datetime
+    preferred_plan: _PlanTemplate
+    custom_plans: list[_PlanTemplate] = field(default_factory=list)
+
+
+@dataclass
+class _PlanTemplate:
+    id: int
+    name: str
+    goal_type: str
+    # ``(period_days, price_cents, currency)`` of the active pricing options
+    pricing: list[tuple[int, int, str]]
+    # meal snapshots ordered like checkout copies them into purchase items
+    meals: list[dict[str, Any]]
+
+    @cached_property
+    def item_snapshots(self) -> list[dict[str, Any]]:
+        """``PlanPurchaseItem`` columns of every meal, shared by all purchases of the plan."""
+        return [
+            {
+                "day_of_week": meal["day_of_week"],
+                "meal_type": meal["meal_type"],
+                "meal_title": meal["title"],
+                "meal_description": meal["description"],
+                "calories": meal["calories"],
+                "protein_grams": meal["protein_grams"],
+                "carbs_grams": meal["carbs_grams"],
+                "fats_grams": meal["fats_grams"],
+            }
+            for meal in self.meals
+        ]
+
+
+ProgressCallback = Callable[[str, SyntheticDataReport], None]
+
+
+def _weighted(rng: random.Random, weights: dict[Any, int]) -> Any:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _insert(db: Session, model: type, rows: list[dict[str, Any]]) -> None:
+    # Core executemany: one prepared statement for the batch, no ORM identity map or unit of work
+    if rows:
+        db.execute(insert(model.__table__), rows)
+
+
+class _IdAllocator:
+    """Hands out integer primary keys above the current maximum so child rows can reference parents."""
+
+    def __init__(self, db: Session) -> None:
+        self._next = {model: (db.query(func.max(model.id)).scalar() or 0) + 1 for model in _ID_MODELS}
+
+    def take(self, model: type) -> int:
+        value = self._next[model]
+        self._next[model] = value + 1
+        return value
+
+
+def sync_id_sequences(db: Session) -> None:
+    """Move Postgres ``SERIAL`` sequences past explicitly inserted ids (no-op elsewhere)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for model in _ID_MODELS:
+        table = model.__tablename__
+        db.execute(
+            text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))")
+        )
+    db.commit()
+
+
+def _meal_snapshot(meal: PlanMeal) -> dict[str, Any]:
+    return {
+        "day_of_week": meal.day_of_week,
+        "meal_type": meal.meal_type,
+        "title": meal.title,
+        "description": meal.description,
+        "calories": meal.calories,
+        "protein_grams": meal.protein_grams,
+        "carbs_grams": meal.carbs_grams,
+        "fats_grams": meal.fats_grams,
+        "allergens": meal.allergens,
+    }
+
+
+def _checkout_order(meals: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # ``process_checkout`` copies meals sorted by day name and meal type
+    return sorted(meals, key=lambda meal: (meal["day_of_week"], meal["meal_type"]))
+
+
+def load_catalog(db: Session) -> list[_PlanTemplate]:
+    plans = (
+        db.query(NutritionPlan)
+        .filter(NutritionPlan.is_custom.is_(False))
+        .order_by(NutritionPlan.id)
+        .all()
+    )
+    if not plans:
+        raise SyntheticDataError("Katalogas tuščias: pirmiausia paleiskite API, kad būtų sukurti baziniai planai.")
+    return [
+        _PlanTemplate(
+            id=plan.id,
+            name=plan.name,
+            goal_type=plan.goal_type,
+            pricing=[(entry.period_days, entry.price_cents, entry.currency) for entry in plan.pricing_options],
+            meals=_checkout_order([_meal_snapshot(meal) for meal in sorted(plan.meals, key=lambda meal: meal.id)]),
+        )
+        for plan in plans
+    ]
+
+
+def _birth_date(rng: random.Random, until: datetime) -> date | None:
+    if rng.random() < 0.15:
+        return None
+    return (until - timedelta(days=rng.randint(18 * 365, 65 * 365))).date()
+
+
+def _allergies(rng: random.Random) -> str | None:
+    if rng.random() < 0.7:
+        return None
+    return serialize_allergens(rng.sample(ALLERGEN_IDS, rng.choice((1, 1, 2))))
+
+
+def generate_users(
+    db: Session,
+    spec: SyntheticDataSpec,
+    rng: random.Random,
+    catalog: list[_PlanTemplate],
+    report: SyntheticDataReport,
+    *,
+    batch_size: int,
+    progress: ProgressCallback | None = None,
+) -> list[_Buyer]:
+    first_email = f"user{spec.seed}-0000000@{SYNTHETIC_EMAIL_DOMAIN}"
+    if db.query(User.id).filter(User.email == first_email).first() is not None:
+        raise SyntheticDataError(
+            f"Sėkla {spec.seed} jau panaudota šioje duomenų bazėje; pasirinkite kitą --seed reikšmę."
+        )
+
+    # one bcrypt hash for everyone: hashing per user would dominate the run, and load tests can log in
+    hashed_password = get_password_hash(spec.password)
+    plans_by_goal: dict[str, list[_PlanTemplate]] = {}
+    for plan in catalog:
+        plans_by_goal.setdefault(plan.goal_type, []).append(plan)
+
+    buyers: list[_Buyer] = []
+    rows: list[dict[str, Any]] = []
+    for index in range(spec.users):
+        goal = rng.choice(GOALS)
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        height = round(min(max(rng.gauss(172, 9), 150), 205), 1)
+        weight = round(min(max(rng.gauss(25, 4), 17), 40) * (height / 100) ** 2, 1)
+        created_at = spec.until - timedelta(seconds=rng.randint(0, spec.history_days * 86400))
+        preferred_plan = rng.choice(plans_by_goal.get(goal) or catalog)
+        user_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        email = f"user{spec.seed}-{index:07d}@{SYNTHETIC_EMAIL_DOMAIN}"
+        rows.append(
+            {
+                "id": user_id,
+                "email": email,
+                "hashed_password": hashed_password,
+                "first_name": first_name,
+                "last_name": last_name,
+                "goal": goal,
+                "height_cm": height,
+                "weight_kg": weight,
+                "activity_level": rng.choice(ACTIVITY_LEVELS),
+                "dietary_preferences": rng.choice(DIETARY_PREFERENCES) if rng.random() < 0.2 else None,
+                "allergies": _allergies(rng),
+                "birth_date": _birth_date(rng, spec.until),
+                "current_plan_id": preferred_plan.id,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+        )
+        buyers.append(_Buyer(user_id, f"{first_name} {last_name}", email, goal, created_at, preferred_plan))
+        if len(rows) >= batch_size or index == spec.users - 1:
+            _insert(db, User, rows)
+            db.commit()
+            report.users += len(rows)
+            rows = []
+            if progress:
+                progress("users", report)
+    return buyers
+
+
+def generate_custom_plans(
+    db: Session,
+    spec: SyntheticDataSpec,
+    rng: random.Random,
+    ids: _IdAllocator,
+    buyers: list[_Buyer],
+    catalog: list[_PlanTemplate],
+    report: SyntheticDataReport,
+    *,
+    batch_size: int,
+    progress: ProgressCallback | None = None,
+) -> None:
+    if not spec.custom_plans or not buyers:
+        return
+    templates_by_type: dict[str, list[dict[str, Any]]] = {}
+    for plan in catalog:
+        for meal in plan.meals:
+            templates_by_type.setdefault(meal["meal_type"], []).append(meal)
+
+    plan_rows: list[dict[str, Any]] = []
+    meal_rows: list[dict[str, Any]] = []
+    pricing_rows: list[dict[str, Any]] = []
+    for index in range(spec.custom_plans):
+        owner = rng.choice(buyers)
+        goal = owner.goal
+        meal_types = [*CUSTOM_PLAN_MEAL_TYPES, *(("snack",) if rng.random() < 0.5 else ())]
+        meals = [
+            {**rng.choice(templates_by_type.get(meal_type) or templates_by_type["lunch"]), "day_of_week": day}
+            for day in WEEK_DAYS
+            for meal_type in meal_types
+        ]
+        pricing = [
+            (int(option["period_days"]), int(option["price_cents"]), str(option["currency"]))
+            for option in build_pricing_options(DEFAULT_DAILY_PRICE_BY_GOAL.get(goal) or 20.0)
+        ]
+
+        plan_id = ids.take(NutritionPlan)
+        created_at = owner.created_at + (spec.until - owner.created_at) * rng.random()
+        allergens = serialize_allergens(
+            allergen for meal in meals for allergen in (meal["allergens"] or "").split(",") if allergen
+        )
+        # the catalog filter columns are derived exactly like ``create_custom_plan`` does it
+        derived = SimpleNamespace(
+            meals=[SimpleNamespace(**meal) for meal in meals],
+            pricing_entries=[
+                SimpleNamespace(period_days=period, price_cents=price, is_active=True) for period, price, _ in pricing
+            ],
+            calories=None,
+            protein_grams=None,
+            carbs_grams=None,
+            fats_grams=None,
+            allergens=allergens,
+        )
+        refresh_plan_catalog_fields(derived)  # type: ignore[arg-type]
+        name = f"{owner.full_name.split()[0]} planas Nr. {index + 1}"
+        plan_rows.append(
+            {
+                "id": plan_id,
+                "name": name,
+                "description": "Individualus savaitės planas, sudarytas iš FitBite katalogo patiekalų.",
+                "goal_type": goal,
+                "allergens": allergens,
+                "daily_calories": derived.daily_calories,
+                "daily_protein_grams": derived.daily_protein_grams,
+                "daily_carbs_grams": derived.daily_carbs_grams,
+                "daily_fats_grams": derived.daily_fats_grams,
+                "daily_price_cents": derived.daily_price_cents,
+                "allergen_mask": derived.allergen_mask,
+                "is_custom": True,
+                "owner_id": owner.id,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+        )
+        meal_rows.extend({**meal, "id": ids.take(PlanMeal), "plan_id": plan_id} for meal in meals)
+        pricing_rows.extend(
+            {
+                "id": ids.take(PlanPeriodPricing),
+                "plan_id": plan_id,
+                "period_days": period,
+                "price_cents": price,
+                "currency": currency,
+                "is_active": True,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            for period, price, currency in pricing
+        )
+        owner.custom_plans.append(_PlanTemplate(plan_id, name, goal, pricing, _checkout_order(meals)))
+
+        if len(plan_rows) >= batch_size or index == spec.custom_plans - 1:
+            _insert(db, NutritionPlan, plan_rows)
+            _insert(db, PlanMeal, meal_rows)
+            _insert(db, PlanPeriodPricing, pricing_rows)
+            db.commit()
+            report.plans += len(plan_rows)
+            report.meals += len(meal_rows)
+            plan_rows, meal_rows, pricing_rows = [], [], []
+            if progress:
+                progress("plans", report)
+
+    # mapper events keep the search index current for API writes; bulk rows are indexed in one pass
+    rebuild_search_index(db)
+
+
+def _purchase_counts(spec: SyntheticDataSpec, rng: random.Random) -> Counter[int]:
+    """Purchases per buyer index, heavy-tailed: most users buy once or twice, a few buy dozens of times."""
+    weights = [rng.paretovariate(1.5) for _ in range(spec.users)]
+    return Counter(rng.choices(range(spec.users), weights=weights, k=spec.purchases))
+
+
+def _answers(rng: random.Random, survey_type: str) -> dict[str, Any]:
+    answers: dict[str, Any] = {}
+    for question in get_questions_for_type(survey_type):
+        if question["type"] == "scale":
+            low, high = question.get("scale_min", 1), question.get("scale_max", 5)
+            answers[question["id"]] = min(high, max(low, round(rng.triangular(low, high, high - 1))))
+        elif question["type"] == "single_choice":
+            answers[question["id"]] = rng.choice(question["options"])
+        elif question["type"] == "multi_choice":
+            answers[question["id"]] = rng.sample(question["options"], rng.randint(1, 2))
+        else:
+            answers[question["id"]] = rng.choice(PROGRESS_NOTES) if rng.random() < 0.3 else ""
+    return answers
+
+
+@dataclass
+class _PurchaseBatch:
+    purchases: list[dict[str, Any]] = field(default_factory=list)
+    items: list[dict[str, Any]] = field(default_factory=list)
+    surveys: list[dict[str, Any]] = field(default_factory=list)
+    responses: list[dict[str, Any]] = field(default_factory=list)
+    answers: list[dict[str, Any]] = field(default_factory=list)
+    rollups: list[tuple[int, str, int, dict[str, object], int | None]] = field(default_factory=list)
+
+    def flush(self, db: Session, report: SyntheticDataReport) -> None:
+        # parents first so foreign keys hold on Postgres
+        _insert(db, PlanPurchase, self.purchases)
+        _insert(db, PlanPurchaseItem, self.items)
+        _insert(db, PlanProgressSurvey, self.surveys)
+        _insert(db, PlanProgressSurveyResponse, self.responses)
+        _insert(db, PlanProgressSurveyAnswer, self.answers)
+        add_survey_rollups(db, self.rollups)
+        db.commit()
+        report.purchases += len(self.purchases)
+        report.items += len(self.items)
+        report.surveys += len(self.surveys)
+        report.responses += len(self.responses)
+        report.answers += len(self.answers)
+        for rows in (self.purchases, self.items, self.surveys, self.responses, self.answers, self.rollups):
+            rows.clear()
+
+
+def _add_purchase(
+    batch: _PurchaseBatch,
+    spec: SyntheticDataSpec,
+    rng: random.Random,
+    ids: _IdAllocator,
+    buyer: _Buyer,
+    plan: _PlanTemplate,
+    created_at: datetime,
+    first_purchase: bool,
+) -> None:
+    wanted_period = _weighted(rng, PERIOD_WEIGHTS)
+    period_days, base_price_cents, currency = next(
+        (option for option in plan.pricing if option[0] == wanted_period), plan.pricing[-1]
+    )
+    discount_cents = (
+        int((Decimal(base_price_cents) * FIRST_PURCHASE_PERCENT).quantize(Decimal("1"))) if first_purchase else 0
+    )
+    status = _weighted(rng, PURCHASE_STATUS_WEIGHTS)
+    paid_at = created_at + timedelta(seconds=rng.randint(2, 90)) if status != "pending" else None
+    purchase_id = ids.take(PlanPurchase)
+    batch.purchases.append(
+        {
+            "id": purchase_id,
+            "user_id": buyer.id,
+            "plan_id": plan.id,
+            "plan_name_snapshot": plan.name,
+            "period_days": period_days,
+            "base_price_cents": base_price_cents,
+            "price_cents": base_price_cents - discount_cents,
+            "discount_amount_cents": discount_cents,
+            "discount_label": "Pirmo pirkimo akcija" if discount_cents else None,
+            "discount_code": None,
+            "currency": currency,
+            "payment_method": _weighted(rng, PAYMENT_METHOD_WEIGHTS),
+            "status": status,
+            "transaction_reference": f"SIM-{purchase_id:06d}-{paid_at:%H%M%S}" if paid_at else None,
+            "buyer_full_name": buyer.full_name,
+            "buyer_email": buyer.email,
+            "buyer_phone": None,
+            "invoice_needed": False,
+            "company_name": None,
+            "company_code": None,
+            "vat_code": None,
+            "extra_notes": None,
+            "created_at": created_at,
+            "paid_at": paid_at,
+            # receipts are rendered on demand by real checkouts only; synthetic purchases have none
+            "pdf_path": None,
+        }
+    )
+    batch.items.extend(
+        {**snapshot, "id": ids.take(PlanPurchaseItem), "purchase_id": purchase_id} for snapshot in plan.item_snapshots
+    )
+    if paid_at is None:
+        return
+
+    # scheduled as checkout does it at payment time, then answered up to ``until``
+    for survey in build_survey_schedule(
+        user_id=buyer.id,
+        purchase_id=purchase_id,
+        plan_id=plan.id,
+        plan_name=plan.name,
+        period_days=period_days,
+        start_at=paid_at,
+        now=paid_at,
+    ):
+        survey_id = ids.take(PlanProgressSurvey)
+        # executemany needs the same keys in every row
+        survey.update(id=survey_id, created_at=paid_at, completed_at=None)
+        submitted_at = survey["scheduled_at"] + timedelta(minutes=rng.randint(5, 3 * 24 * 60))
+        if submitted_at <= spec.until and rng.random() < spec.response_rate:
+            survey.update(status=COMPLETED_STATUS, completed_at=submitted_at)
+            version = survey_registry.current_version(survey["survey_type"])
+            answers = _answers(rng, survey["survey_type"])
+            response_id = ids.take(PlanProgressSurveyResponse)
+            batch.responses.append(
+                {
+                    "id": response_id,
+                    "survey_id": survey_id,
+                    "user_id": buyer.id,
+                    "answers": answers,
+                    "definition_version": version,
+                    "submitted_at": submitted_at,
+                }
+            )
+            batch.answers.extend(
+                {
+                    **EMPTY_ANSWER_VALUES,
+                    **row,
+                    "id": ids.take(PlanProgressSurveyAnswer),
+                    "response_id": response_id,
+                }
+                for row in build_answer_rows(
+                    user_id=buyer.id,
+                    plan_id=plan.id,
+                    survey_type=survey["survey_type"],
+                    definition_version=version,
+                    answers=answers,
+                )
+            )
+            batch.rollups.append((plan.id, survey["survey_type"], survey["day_offset"], answers, version))
+        batch.surveys.append(survey)
+
+
+def generate_purchases(
+    db: Session,
+    spec: SyntheticDataSpec,
+    rng: random.Random,
+    ids: _IdAllocator,
+    buyers: list[_Buyer],
+    catalog: list[_PlanTemplate],
+    report: SyntheticDataReport,
+    *,
+    batch_size: int,
+    progress: ProgressCallback | None = None,
+) -> None:
+    if not spec.purchases or not buyers:
+        return
+    counts = _purchase_counts(spec, rng)
+    batch = _PurchaseBatch()
+    for index, buyer in enumerate(buyers):
+        count = counts.get(index, 0)
+        history = (spec.until - buyer.created_at).total_seconds()
+        moments = sorted(buyer.created_at + timedelta(seconds=rng.random() * history) for _ in range(count))
+        for position, created_at in enumerate(moments):
+            roll = rng.random()
+            if buyer.custom_plans and roll < 0.25:
+                plan = rng.choice(buyer.custom_plans)
+            elif roll < 0.75:
+                plan = buyer.preferred_plan
+            else:
+                plan = rng.choice(catalog)
+            _add_purchase(batch, spec, rng, ids, buyer, plan, created_at, first_purchase=position == 0)
+            if len(batch.purchases) >= batch_size:
+                batch.flush(db, report)
+                if progress:
+                    progress("purchases", report)
+    if batch.purchases:
+        batch.flush(db, report)
+        if progress:
+            progress("purchases", report)
+
+
+def generate_dataset(
+    db: Session,
+    spec: SyntheticDataSpec,
+    *,
+    batch_size: int = 2000,
+    progress: ProgressCallback | None = None,
+) -> SyntheticDataReport:
+    """Bulk-insert a reproducible dataset; the same spec always yields the same rows.
+
+    Run it against an idle database: ids are allocated above the current maximum, so rows
+    the API writes concurrently could collide with them.
+    """
+    rng = random.Random(spec.seed)
+    report = SyntheticDataReport()
+    catalog = load_catalog(db)
+    ids = _IdAllocator(db)
+    buyers = generate_users(db, spec, rng, catalog, report, batch_size=batch_size, progress=progress)
+    generate_custom_plans(db, spec, rng, ids, buyers, catalog, report, batch_size=batch_size, progress=progress)
+    generate_purchases(db, spec, rng, ids, buyers, catalog, report, batch_size=batch_size, progress=progress)
+    sync_id_sequences(db)
+    return report
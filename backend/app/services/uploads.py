@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import os
+import secrets
+from pathlib import Path
+from typing import BinaryIO
+
+from multipart.exceptions import FormParserError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import ClientDisconnect, Request
+
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": ".png",
+    b"\xff\xd8\xff": ".jpg",
+}
+SIGNATURE_LENGTH = max(len(signature) for signature in IMAGE_SIGNATURES)
+
+
+class UploadError(ValueError):
+    """Base class for rejected uploads."""
+
+
+class UploadTooLargeError(UploadError):
+    pass
+
+
+class UnsupportedUploadError(UploadError):
+    pass
+
+
+def sniff_image_extension(head: bytes) -> str | None:
+    for signature, extension in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return extension
+    return None
+
+
+class _FilePartWriter:
+    """Multipart parser callbacks that stream a single named field into an open file."""
+
+    def __init__(self, field_name: str, target: BinaryIO, max_bytes: int) -> None:
+        self.field_name = field_name
+        self.target = target
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.extension: str | None = None
+        self.found = False
+        self._head = b""
+        self._header_field = b""
+        self._header_value = b""
+        self._in_target = False
+
+    def on_part_begin(self) -> None:
+        self._in_target = False
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(self._header_value)
+            if options.get(b"name") == self.field_name.encode() and not self.found:
+                self._in_target = True
+                self.found = True
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._in_target:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+        if self.extension is None:
+            self._head += chunk
+            if len(self._head) < SIGNATURE_LENGTH:
+                return
+            self.extension = sniff_image_extension(self._head)
+            if self.extension is None:
+                raise UnsupportedUploadError("Only PNG and JPEG images are allowed")
+            chunk, self._head = self._head, b""
+        self.target.write(chunk)
+
+    def on_part_end(self) -> None:
+        if self._in_target and self.extension is None:
+            # file shorter than the longest signature
+            self.extension = sniff_image_extension(self._head)
+            if self.extension is None:
+                raise UnsupportedUploadError("Only PNG and JPEG images are allowed")
+            self.target.write(self._head)
+        self._in_target = False
+
+    def callbacks(self) -> dict[str, object]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+
+async def receive_image_upload(
+    request: Request,
+    *,
+    field_name: str,
+    destination: Path,
+    max_bytes: int,
+) -> str:
+    """Stream one multipart image field to ``destination`` and return its sniffed extension.
+
+    The body is consumed chunk by chunk from the ASGI stream, so nothing is spooled and a slow
+    client only occupies the event loop while bytes arrive. Oversized or non-image payloads are
+    rejected as soon as they are recognised. Data goes to a temporary sibling file that is
+    renamed into place only once the upload is complete.
+    """
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes + 64 * 1024:
+        # body can't fit even allowing for multipart framing
+        raise UploadTooLargeError(max_bytes)
+
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UnsupportedUploadError("Expected multipart/form-data")
+
+    partial = destination.with_name(f".{destination.name}.{secrets.token_hex(4)}.part")
+    try:
+        with partial.open("wb") as target:
+            writer = _FilePartWriter(field_name, target, max_bytes)
+            parser = MultipartParser(boundary, writer.callbacks())
+            async for chunk in request.stream():
+                parser.write(chunk)
+            parser.finalize()
+        if not writer.found or writer.extension is None:
+            raise UnsupportedUploadError("Only PNG and JPEG images are allowed")
+        os.replace(partial, destination)
+        return writer.extension
+    except ClientDisconnect as exc:
+        raise UploadError("Client disconnected") from exc
+    except FormParserError as exc:
+        raise UploadError("Malformed multipart body") from exc
+    finally:
+        partial.unlink(missing_ok=True)
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.allergens import allergen_mask, deserialize_allergens
+from app.core.config import settings
+from app.models.nutrition_plan import NutritionPlan
+from app.models.plan_meal import PlanMeal
+from app.models.user import User
+from app.schemas.plan import CustomPlanCreate, PlanMealCreate, WeekAssemblyRequest
+from app.services.meal_index import (
+    MACRO_SCALE,
+    REPEAT_SUFFIX,
+    LibrarySnapshot,
+    ensure_index_loaded,
+    meal_type_code,
+)
+from app.services.plan_recommendation import create_custom_plan
+from app.services.seed import WEEK_DAYS
+
+# Squared scaled-distance penalty for every extra use of the same dish within the week.
+REPEAT_PENALTY = 1.5
+
+
+class WeekAssemblyError(Exception):
+    """Raised when the meal library cannot fill the requested slots."""
+
+
+@dataclass
+class WeekAssembly:
+    rows: np.ndarray
+    """Library row per (day, slot), shape ``(days, slots)``."""
+    relative_error: float
+    """Mean absolute relative deviation from the daily macro targets."""
+    passes: int
+    elapsed_ms: float
+
+
+def _relative_error(day_totals: np.ndarray, target: np.ndarray) -> float:
+    safe_target = np.where(target > 0, target, 1.0)
+    return float(np.mean(np.abs(day_totals - target) / safe_target))
+
+
+def assemble_week(
+    library: LibrarySnapshot,
+    slot_types: list[int],
+    target: np.ndarray,
+    *,
+    days: int = len(WEEK_DAYS),
+    time_budget_ms: float = 50.0,
+    repeat_penalty: float = REPEAT_PENALTY,
+) -> WeekAssembly:
+    """Greedy construction followed by coordinate-descent local search within a time budget.
+
+    ``target`` holds the daily calories/protein/carbs/fats already multiplied by ``MACRO_SCALE``.
+    Every move is a single vectorized argmin over the slot's candidate pool, so the search can
+    stop between moves as soon as the budget is spent and still return a complete week.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000
+
+    pools: dict[int, np.ndarray] = {}
+    for slot_type in set(slot_types):
+        pool = np.flatnonzero(library.meal_types == slot_type)
+        if pool.size == 0:
+            raise WeekAssemblyError("Nėra tinkamų patiekalų vienam iš pasirinktų valgymų.")
+        pools[slot_type] = pool
+    # stored transposed so each move is a single (4,) @ (4, pool) product
+    pool_macros = {slot_type: np.ascontiguousarray(library.macros[pool].T) for slot_type, pool in pools.items()}
+    # ||m - n||^2 = ||m||^2 - 2 m.n + ||n||^2; the last term is constant per move and dropped
+    pool_norms = {slot_type: np.einsum("ij,ij->j", macros, macros) for slot_type, macros in pool_macros.items()}
+    pool_titles = {slot_type: library.title_codes[pool] for slot_type, pool in pools.items()}
+    pool_penalties = {slot_type: np.zeros(pool.size, dtype=np.float32) for slot_type, pool in pools.items()}
+
+    title_positions: dict[int, list[tuple[int, np.ndarray]]] = {}
+
+    def count_title(row: int, delta: int) -> None:
+        title = int(library.title_codes[row])
+        positions = title_positions.get(title)
+        if positions is None:
+            positions = [(slot_type, np.flatnonzero(titles == title)) for slot_type, titles in pool_titles.items()]
+            title_positions[title] = positions
+        for slot_type, indices in positions:
+            pool_penalties[slot_type][indices] += delta * repeat_penalty
+
+    def best_choice(slot_type: int, needed: np.ndarray) -> int:
+        scores = pool_norms[slot_type] - 2 * (needed @ pool_macros[slot_type]) + pool_penalties[slot_type]
+        return int(pools[slot_type][int(np.argmin(scores))])
+
+    def move_score(totals: np.ndarray, row: int, slot_type: int) -> float:
+        diff = totals - target
+        position = int(np.searchsorted(pools[slot_type], row))
+        return float(diff @ diff) + float(pool_penalties[slot_type][position])
+
+    slots = len(slot_types)
+    rows = np.zeros((days, slots), dtype=np.int64)
+    day_totals = np.zeros((days, target.shape[0]), dtype=np.float32)
+
+    # Greedy: each slot aims at an even share of what is still missing for the day.
+    for day in range(days):
+        for slot, slot_type in enumerate(slot_types):
+            needed = (target - day_totals[day]) / (slots - slot)
+            row = best_choice(slot_type, needed)
+            rows[day, slot] = row
+            day_totals[day] += library.macros[row]
+            count_title(row, 1)
+
+    # Local search: re-pick one slot at a time given the rest of its day.
+    passes = 0
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        passes += 1
+        for day in range(days):
+            for slot, slot_type in enumerate(slot_types):
+                if time.perf_counter() >= deadline:
+                    break
+                current = int(rows[day, slot])
+                count_title(current, -1)
+                others = day_totals[day] - library.macros[current]
+                row = best_choice(slot_type, target - others)
+                if row != current and move_score(others + library.macros[row], row, slot_type) < move_score(
+                    others + library.macros[current], current, slot_type
+                ) - 1e-6:
+                    rows[day, slot] = row
+                    day_totals[day] = others + library.macros[row]
+                    improved = True
+                    current = row
+                count_title(current, 1)
+
+    return WeekAssembly(
+        rows=rows,
+        relative_error=_relative_error(day_totals, target),
+        passes=passes,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+def build_target_vector(calories: int, protein_grams: int, carbs_grams: int, fats_grams: int) -> np.ndarray:
+    return np.array([calories, protein_grams, carbs_grams, fats_grams], dtype=np.float32) * MACRO_SCALE
+
+
+def generate_custom_plan(db: Session, user: User, payload: WeekAssemblyRequest) -> NutritionPlan:
+    """Assemble a week from the meal library that matches daily macro targets and save it as a custom plan."""
+    index = ensure_index_loaded(db)
+    excluded = allergen_mask(list(payload.excluded_allergens) + deserialize_allergens(user.allergies))
+    library = index.snapshot(excluded_allergens=excluded, owner_id=user.id)
+
+    assembly = assemble_week(
+        library,
+        [meal_type_code(slot) for slot in payload.meal_slots],
+        build_target_vector(payload.calories, payload.protein_grams, payload.carbs_grams, payload.fats_grams),
+        time_budget_ms=settings.week_assembler_budget_ms,
+    )
+
+    chosen_ids = {int(library.meal_ids[row]) for row in assembly.rows.flat}
+    meals_by_id = {meal.id: meal for meal in db.query(PlanMeal).filter(PlanMeal.id.in_(chosen_ids))}
+
+    meals: list[PlanMealCreate] = []
+    for day_index, day in enumerate(WEEK_DAYS):
+        for slot_index, slot in enumerate(payload.meal_slots):
+            source = meals_by_id.get(int(library.meal_ids[assembly.rows[day_index, slot_index]]))
+            if source is None:
+                raise WeekAssemblyError("Patiekalų biblioteka pasikeitė, bandykite dar kartą.")
+            meals.append(
+                PlanMealCreate(
+                    day_of_week=day,
+                    meal_type=slot,
+                    title=source.title.split(REPEAT_SUFFIX)[0],
+                    description=source.description,
+                    calories=source.calories,
+                    protein_grams=source.protein_grams,
+                    carbs_grams=source.carbs_grams,
+                    fats_grams=source.fats_grams,
+                    allergens=source.allergens,
+                )
+            )
+
+    return create_custom_plan(
+        db,
+        user,
+        CustomPlanCreate(name=payload.name, description=payload.description, meals=meals),
+    )
@@ -0,0 +1,449 @@
+"""End-to-end load test of the API with closed-loop virtual users and per-endpoint latency percentiles.
+
+Usage (from ``backend/``)::
+
+    python -m app.commands.generate_synthetic_data --users 10000 --purchases 100000 --until 2026-01-01
+    python -m benchmarks.load_test --spawn --duration 60 --users 20 --save-baseline benchmarks/results/baseline.json
+    python -m benchmarks.load_test --spawn --duration 60 --users 20 --baseline benchmarks/results/baseline.json
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --only checkout --users 8
+
+Each virtual user logs in as one of the synthetic users (``--synthetic-users`` of seed
+``--synthetic-seed``, or registers a fresh account when that is 0) and then repeatedly picks an
+action by weight: profile, catalog and recommendation reads, checkouts, receipt downloads of its
+own purchases, survey submissions, logins and registrations. ``--spawn`` starts uvicorn (one worker
+unless ``--workers`` says otherwise) on the current ``DATABASE_URL``, so by default the numbers
+answer "how much does one worker handle".
+Throughput and p50/p95/p99 latencies are reported per endpoint; with ``--baseline`` the run exits
+with status 1 when an endpoint's p95 grew, or its throughput shrank, by more than ``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+API = "/api"
+SYNTHETIC_EMAIL_DOMAIN = "synthetic.fitbite.lt"
+SYNTHETIC_PASSWORD = "Sintetinis123!"
+
+# rough shape of production traffic: mostly reads, a few writes per hundred requests
+DEFAULT_MIX = {
+    "profile": 30,
+    "plans": 20,
+    "recommended": 10,
+    "plan_detail": 10,
+    "checkout": 5,
+    "receipt": 5,
+    "survey": 4,
+    "login": 3,
+    "register": 1,
+}
+# extra sample a comparison needs before it is trusted
+MIN_COMPARABLE_REQUESTS = 20
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Counter[str] = field(default_factory=Counter)
+
+
+class Recorder:
+    """Collects latencies of requests that finish inside the measurement window."""
+
+    def __init__(self, measure_from: float, measure_until: float) -> None:
+        self.measure_from = measure_from
+        self.measure_until = measure_until
+        self.endpoints: dict[str, EndpointStats] = {}
+
+    def record(self, label: str, elapsed: float, status: str, ok: bool) -> None:
+        finished = time.perf_counter()
+        if not self.measure_from <= finished <= self.measure_until:
+            return
+        stats = self.endpoints.setdefault(label, EndpointStats())
+        stats.latencies.append(elapsed)
+        stats.statuses[status] += 1
+        if not ok:
+            stats.errors += 1
+
+
+class RequestFailed(Exception):
+    """An action could not continue because one of its requests failed (already recorded)."""
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, rng: random.Random, email: str, password: str):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.email = email
+        self.password = password
+        self.headers: dict[str, str] = {}
+        self.plans: list[dict[str, Any]] = []
+        self.purchase_ids: list[int] = []
+
+    async def request(self, label: str, method: str, url: str, expected: int = 200, **kwargs: Any) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, f"{API}{url}", headers=self.headers, **kwargs)
+        except httpx.HTTPError as exc:
+            self.recorder.record(label, time.perf_counter() - started, type(exc).__name__, ok=False)
+            raise RequestFailed(label) from exc
+        # the body is read by the client before returning, so this covers the whole response
+        elapsed = time.perf_counter() - started
+        ok = response.status_code == expected
+        self.recorder.record(label, elapsed, str(response.status_code), ok)
+        if not ok:
+            raise RequestFailed(f"{label}: {response.status_code}")
+        return response
+
+    async def login(self) -> None:
+        response = await self.request(
+            "POST /auth/login", "POST", "/auth/login", json={"email": self.email, "password": self.password}
+        )
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def register(self, email: str) -> None:
+        await self.request(
+            "POST /auth/register",
+            "POST",
+            "/auth/register",
+            201,
+            json={
+                "email": email,
+                "password": self.password,
+                "first_name": "Apkrova",
+                "goal": self.rng.choice(["weight_loss", "muscle_gain", "balanced", "vegetarian", "performance"]),
+                "height_cm": self.rng.randint(155, 195),
+                "weight_kg": self.rng.randint(55, 100),
+                "activity_level": "moderate",
+            },
+        )
+
+    async def profile(self) -> dict[str, Any]:
+        return (await self.request("GET /users/me", "GET", "/users/me")).json()
+
+    async def plans_list(self) -> None:
+        self.plans = (await self.request("GET /plans", "GET", "/plans")).json()
+
+    async def recommended(self) -> None:
+        await self.request("GET /plans/recommended", "GET", "/plans/recommended")
+
+    async def plan_detail(self) -> None:
+        if not self.plans:
+            await self.plans_list()
+        plan = self.rng.choice(self.plans)
+        await self.request("GET /plans/{id}", "GET", f"/plans/{plan['id']}")
+
+    async def checkout(self) -> None:
+        if not self.plans:
+            await self.plans_list()
+        plan = self.rng.choice(self.plans)
+        response = await self.request(
+            "POST /plans/{id}/checkout",
+            "POST",
+            f"/plans/{plan['id']}/checkout",
+            201,
+            json={
+                "period_days": self.rng.choice([7, 7, 14, 14, 3]),
+                "payment_method": "card",
+                "card_number": "4242424242424242",
+                "card_exp_month": "12",
+                "card_exp_year": "2030",
+                "card_cvc": "123",
+                "buyer_full_name": "Apkrovos Testas",
+                "buyer_email": self.email,
+            },
+        )
+        self.purchase_ids.append(response.json()["purchase_id"])
+
+    async def receipt(self) -> None:
+        # synthetic purchases have no rendered receipt, so only this user's checkouts are downloaded
+        if not self.purchase_ids:
+            await self.checkout()
+        purchase_id = self.rng.choice(self.purchase_ids)
+        await self.request(
+            "GET /purchases/{id}/receipt", "GET", f"/purchases/{purchase_id}/receipt", follow_redirects=False
+        )
+
+    async def survey(self) -> None:
+        profile = await self.profile()
+        due = [
+            survey
+            for survey in profile.get("plan_surveys", [])
+            if survey["status"] == "scheduled" and not survey.get("response_submitted")
+        ]
+        if not due:
+            return
+        survey_id = due[0]["id"]
+        detail = (await self.request("GET /surveys/{id}", "GET", f"/surveys/{survey_id}")).json()
+        await self.request(
+            "POST /surveys/{id}/responses",
+            "POST",
+            f"/surveys/{survey_id}/responses",
+            json={"answers": [self.answer(question) for question in detail["questions"]]},
+        )
+
+    def answer(self, question: dict[str, Any]) -> dict[str, Any]:
+        if question["type"] == "scale":
+            value: Any = self.rng.randint(question.get("scale_min") or 1, question.get("scale_max") or 5)
+        elif question["type"] == "single_choice":
+            value = self.rng.choice(question["options"])
+        elif question["type"] == "multi_choice":
+            value = [self.rng.choice(question["options"])]
+        else:
+            value = ""
+        return {"question_id": question["id"], "value": value}
+
+
+async def _virtual_user(
+    index: int,
+    args: argparse.Namespace,
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    mix: dict[str, int],
+    stop_at: float,
+    run_id: str,
+) -> None:
+    rng = random.Random(args.seed * 10_000 + index)
+    registrations = 0
+
+    def fresh_email() -> str:
+        nonlocal registrations
+        registrations += 1
+        return f"load-{run_id}-{index}-{registrations}@loadtest.fitbite.lt"
+
+    if args.synthetic_users:
+        number = rng.randrange(args.synthetic_users)
+        email = f"user{args.synthetic_seed}-{number:07d}@{SYNTHETIC_EMAIL_DOMAIN}"
+        user = VirtualUser(client, recorder, rng, email, args.password)
+    else:
+        user = VirtualUser(client, recorder, rng, fresh_email(), args.password)
+        await user.register(user.email)
+    await user.login()
+
+    actions = {
+        "profile": user.profile,
+        "plans": user.plans_list,
+        "recommended": user.recommended,
+        "plan_detail": user.plan_detail,
+        "checkout": user.checkout,
+        "receipt": user.receipt,
+        "survey": user.survey,
+        "login": user.login,
+        "register": lambda: user.register(fresh_email()),
+    }
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < stop_at:
+        action = rng.choices(names, weights=weights)[0]
+        try:
+            await actions[action]()
+        except RequestFailed:
+            # keep the pressure constant; failures are already counted per endpoint
+            pass
+        if args.think_ms:
+            await asyncio.sleep(rng.expovariate(1000 / args.think_ms))
+
+
+def _summarize(recorder: Recorder, window: float) -> dict[str, dict[str, float]]:
+    summary: dict[str, dict[str, float]] = {}
+    everything: list[float] = []
+    for label in sorted(recorder.endpoints):
+        stats = recorder.endpoints[label]
+        everything.extend(stats.latencies)
+        summary[label] = _latency_row(stats.latencies, stats.errors, window)
+        summary[label]["statuses"] = dict(stats.statuses)  # type: ignore[assignment]
+    errors = sum(stats.errors for stats in recorder.endpoints.values())
+    summary["TOTAL"] = _latency_row(everything, errors, window)
+    return summary
+
+
+def _latency_row(latencies: list[float], errors: int, window: float) -> dict[str, float]:
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / window, 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+def _print_table(summary: dict[str, dict[str, float]]) -> None:
+    print(f"{'endpoint':<32} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, row in summary.items():
+        print(
+            f"{label:<32} {row['requests']:>8} {row['errors']:>6} {row['rps']:>8.2f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+        )
+
+
+def compare_with_baseline(
+    summary: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], tolerance: float
+) -> list[str]:
+    """Print the change of every endpoint against the baseline and return the regressions."""
+    regressions: list[str] = []
+    print(f"\n{'endpoint':<32} {'req/s':>16} {'p95 ms':>18} {'p99 ms':>18}")
+    for label, row in summary.items():
+        before = baseline.get(label)
+        if not before:
+            continue
+
+        def change(key: str) -> str:
+            if not before[key]:
+                return f"{row[key]:>8.1f}        "
+            return f"{row[key]:>8.1f} ({(row[key] / before[key] - 1) * 100:+5.0f}%)"
+
+        print(f"{label:<32} {change('rps'):>16} {change('p95_ms'):>18} {change('p99_ms'):>18}")
+        if min(row["requests"], before["requests"]) < MIN_COMPARABLE_REQUESTS:
+            continue
+        if before["p95_ms"] and row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {before['p95_ms']:.1f} -> {row['p95_ms']:.1f} ms")
+        if before["rps"] and row["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {before['rps']:.2f} -> {row['rps']:.2f} req/s")
+    return regressions
+
+
+def _spawn_server(port: int, workers: int) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=os.environ.copy())
+
+
+def _wait_until_ready(base_url: str, server: subprocess.Popen | None, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise SystemExit(f"[load-test] uvicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/healthz", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"[load-test] {base_url} did not become ready in {timeout:.0f}s")
+
+
+async def run(args: argparse.Namespace, mix: dict[str, int]) -> dict[str, dict[str, float]]:
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    stop_at = measure_from + args.duration
+    recorder = Recorder(measure_from, stop_at)
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        tasks = [
+            asyncio.create_task(_virtual_user(index, args, client, recorder, mix, stop_at, run_id))
+            for index in range(args.users)
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    failed = [result for result in results if isinstance(result, BaseException)]
+    if failed:
+        print(f"[load-test] {len(failed)} virtual users could not start: {failed[0]!r}", flush=True)
+    return _summarize(recorder, args.duration)
+
+
+def _parse_mix(only: list[str] | None) -> dict[str, int]:
+    if not only:
+        return dict(DEFAULT_MIX)
+    unknown = [name for name in only if name not in DEFAULT_MIX]
+    if unknown:
+        raise SystemExit(f"[load-test] unknown actions {unknown}; choose from {list(DEFAULT_MIX)}")
+    return {name: DEFAULT_MIX[name] for name in only}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="Start a uvicorn server for the run.")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the --spawn server.")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers of the --spawn server.")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users.")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds.")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring.")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a user's actions.")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--only", nargs="+", metavar="ACTION", help=f"Restrict the mix to {', '.join(DEFAULT_MIX)}.")
+    parser.add_argument("--synthetic-users", type=int, default=1000, help="Log in as the first N synthetic users.")
+    parser.add_argument("--synthetic-seed", type=int, default=1)
+    parser.add_argument("--password", default=SYNTHETIC_PASSWORD)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON.")
+    parser.add_argument("--baseline", type=Path, help="Compare against results saved earlier.")
+    parser.add_argument("--save-baseline", type=Path, help="Store these results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95/throughput change, 0.2 = 20%%.")
+    args = parser.parse_args()
+    mix = _parse_mix(args.only)
+
+    server = None
+    if args.spawn:
+        args.base_url = f"http://127.0.0.1:{args.port}"
+        server = _spawn_server(args.port, args.workers)
+    try:
+        _wait_until_ready(args.base_url, server)
+        print(
+            f"[load-test] {args.users} users against {args.base_url} for {args.duration:.0f}s "
+            f"(+{args.warmup:.0f}s warmup)",
+            flush=True,
+        )
+        summary = asyncio.run(run(args, mix))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    _print_table(summary)
+    result = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "settings": {
+            "users": args.users,
+            "duration": args.duration,
+            "workers": args.workers if args.spawn else None,
+            "think_ms": args.think_ms,
+            "mix": mix,
+        },
+        "endpoints": summary,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+            print(f"[load-test] wrote {path}", flush=True)
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("settings", {}).get("mix") != mix or baseline.get("settings", {}).get("users") != args.users:
+            print("[load-test] note: the baseline was recorded with a different mix or user count", flush=True)
+        regressions = compare_with_baseline(summary, baseline["endpoints"], args.tolerance)
+        if regressions:
+            print("\n[load-test] regressions beyond tolerance:", flush=True)
+            for regression in regressions:
+                print(f"  {regression}", flush=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
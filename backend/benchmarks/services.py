@@ -0,0 +1,360 @@
+"""Microbenchmarks of the pure and hot service-layer functions with parametrized input sizes.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.services
+    python -m benchmarks.services --sizes 10 100 1000 --save-baseline /tmp/fitbite-services.json
+    python -m benchmarks.services --only allergens pricing --baseline /tmp/fitbite-services.json
+
+Every case builds its input once per size and is timed with ``timeit`` (loop count calibrated to at
+least 0.2 s, garbage collector off, ``--repeat`` runs). What a size means is printed next to each
+case: meals in a plan, allergen tokens, pricing entries, receipt lines, or the number of calls in one
+batch for functions whose input does not grow. The database and media store live in a throwaway
+directory. With ``--baseline`` the run exits with status 1 when a case's fastest run grew by more than
+``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+# the app reads its settings and creates the engine on import, so configure it first
+WORKDIR = tempfile.mkdtemp(prefix="fitbite-benchmarks-")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/benchmarks.db"
+os.environ["MEDIA_STORAGE"] = "local"
+os.environ["MEDIA_ROOT"] = os.path.join(WORKDIR, "media")
+
+from app.api.routes.surveys import _validate_answers  # noqa: E402
+from app.core.allergens import ALLERGEN_IDS, deserialize_allergens, normalize_allergen_list  # noqa: E402
+from app.core.config import DiscountCodeSetting, settings  # noqa: E402
+from app.db import base  # noqa: E402,F401 - ensures models are imported
+from app.db.base_class import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.nutrition_plan import NutritionPlan  # noqa: E402
+from app.models.plan_meal import PlanMeal  # noqa: E402
+from app.models.plan_period_pricing import PlanPeriodPricing  # noqa: E402
+from app.models.plan_progress_survey import PlanProgressSurvey  # noqa: E402
+from app.models.plan_purchase import PlanPurchase, PlanPurchaseItem  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.survey import SurveyAnswer, SurveySubmitRequest  # noqa: E402
+from app.services.discounts import BIRTHDAY_CODE, _is_within_birthday_window, compute_discount  # noqa: E402
+from app.services.pdf_export import render_purchase_pdf  # noqa: E402
+from app.services.plan_recommendation import attach_macro_totals  # noqa: E402
+from app.services.pricing import PricingService  # noqa: E402
+from app.services.seed import ALLOWED_PERIODS, WEEK_DAYS, build_pricing_options, ensure_full_week  # noqa: E402
+from app.services.survey_registry import survey_registry  # noqa: E402
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+# raw spellings the API receives: mixed case, spaces and dashes, plus values that are dropped
+RAW_ALLERGENS = [slug.replace("_", " ").title() for slug in ALLERGEN_IDS] + ["tree-nut", " MILK ", "kiwi", ""]
+
+
+@dataclass
+class Case:
+    name: str
+    group: str
+    unit: str
+    # builds the input for one size and returns the call to time
+    prepare: Callable[[random.Random, int], Callable[[], object]]
+    # cases whose cost does not depend on an input size run once with this size
+    fixed_size: int | None = None
+
+
+def _meals(rng: random.Random, count: int) -> list[PlanMeal]:
+    return [
+        PlanMeal(
+            day_of_week=WEEK_DAYS[index % len(WEEK_DAYS)],
+            meal_type=MEAL_TYPES[index % len(MEAL_TYPES)],
+            title=f"Patiekalas {index}",
+            description="Vištiena, kvinoja, keptos daržovės ir jogurto padažas.",
+            calories=rng.randint(150, 750),
+            protein_grams=rng.randint(5, 55),
+            carbs_grams=rng.randint(10, 90),
+            fats_grams=rng.randint(3, 35),
+            allergens=",".join(rng.sample(ALLERGEN_IDS, rng.randint(0, 3))) or None,
+        )
+        for index in range(count)
+    ]
+
+
+def _attach_macro_totals(rng: random.Random, size: int) -> Callable[[], object]:
+    plan = NutritionPlan(name="Planas", description="", goal_type="balanced", meals=_meals(rng, size))
+    return lambda: attach_macro_totals(plan)
+
+
+def _normalize_allergen_list(rng: random.Random, size: int) -> Callable[[], object]:
+    values = [rng.choice(RAW_ALLERGENS) for _ in range(size)]
+    return lambda: normalize_allergen_list(values)
+
+
+def _deserialize_allergens(rng: random.Random, size: int) -> Callable[[], object]:
+    value = ",".join(rng.choice(ALLERGEN_IDS) for _ in range(size))
+    return lambda: deserialize_allergens(value)
+
+
+def _compute_discount_code(rng: random.Random, size: int) -> Callable[[], object]:
+    settings.generic_discount_codes = [
+        DiscountCodeSetting(code=f"AKCIJA{index}", percent=0.1) for index in range(size)
+    ]
+    last_code = f"akcija{size - 1}"
+    today = date.today()
+    # inside the birthday window, so the birthday code is accepted
+    user = User(id="benchmark", birth_date=date(1990, today.month, min(today.day, 28)))
+
+    def call() -> None:
+        compute_discount(None, user, 4590, last_code)  # type: ignore[arg-type]
+        compute_discount(None, user, 4590, BIRTHDAY_CODE)  # type: ignore[arg-type]
+
+    return call
+
+
+def _compute_discount_first_purchase(rng: random.Random, size: int) -> Callable[[], object]:
+    db = SessionLocal()
+    user = User(id="benchmark")
+    return lambda: compute_discount(db, user, 4590, None)
+
+
+def _birthday_window(rng: random.Random, size: int) -> Callable[[], object]:
+    reference = date(2026, 1, 3)
+    birth_dates = [date(1950, 1, 1) + timedelta(days=rng.randint(0, 365 * 55)) for _ in range(size)]
+    return lambda: [_is_within_birthday_window(birth_date, reference) for birth_date in birth_dates]
+
+
+def _serialize_options(rng: random.Random, size: int) -> Callable[[], object]:
+    entries = [
+        PlanPeriodPricing(
+            period_days=ALLOWED_PERIODS[index % len(ALLOWED_PERIODS)] + 14 * (index // len(ALLOWED_PERIODS)),
+            price_cents=rng.randint(1500, 40000),
+            currency="EUR",
+            is_active=rng.random() > 0.1,
+        )
+        for index in range(size)
+    ]
+    rng.shuffle(entries)
+    service = PricingService(NutritionPlan(name="Planas", description="", goal_type="balanced", pricing_entries=entries))
+    return service.serialize_options
+
+
+def _ensure_full_week(rng: random.Random, size: int) -> Callable[[], object]:
+    # three filled days, so the other four are cloned from them
+    meals = [
+        {
+            "day_of_week": WEEK_DAYS[index % 3].upper(),
+            "meal_type": MEAL_TYPES[index % len(MEAL_TYPES)],
+            "title": f"Patiekalas {index}",
+            "calories": rng.randint(150, 750),
+        }
+        for index in range(size)
+    ]
+    return lambda: ensure_full_week(meals)
+
+
+def _build_pricing_options(rng: random.Random, size: int) -> Callable[[], object]:
+    rates = [round(rng.uniform(12, 35), 2) for _ in range(size)]
+    return lambda: [build_pricing_options(rate) for rate in rates]
+
+
+def _render_purchase_pdf(rng: random.Random, size: int) -> Callable[[], object]:
+    db = SessionLocal()
+    paid_at = datetime(2026, 1, 3, 12, 30)
+    purchase = PlanPurchase(
+        id=1,
+        user_id="benchmark",
+        plan_id=1,
+        plan_name_snapshot="FitBite Balance planas",
+        period_days=14,
+        base_price_cents=28700,
+        price_cents=24395,
+        discount_amount_cents=4305,
+        discount_label="Pirmo pirkimo akcija",
+        currency="EUR",
+        payment_method="card",
+        status="paid",
+        transaction_reference="TX-BENCHMARK",
+        buyer_full_name="Jonas Jonaitis",
+        buyer_email="jonas@fitbite.lt",
+        buyer_phone="+37060000000",
+        invoice_needed=True,
+        company_name="UAB Testas",
+        company_code="300000000",
+        created_at=paid_at,
+        paid_at=paid_at,
+    )
+    items = [
+        PlanPurchaseItem(
+            day_of_week=meal.day_of_week,
+            meal_type=meal.meal_type,
+            meal_title=meal.title,
+            meal_description=meal.description,
+            calories=meal.calories,
+            protein_grams=meal.protein_grams,
+            carbs_grams=meal.carbs_grams,
+            fats_grams=meal.fats_grams,
+        )
+        for meal in _meals(rng, size)
+    ]
+
+    def call() -> None:
+        render_purchase_pdf(db, purchase, items)
+        db.rollback()
+
+    return call
+
+
+def _survey_answers(survey_type: str, rng: random.Random) -> SurveySubmitRequest:
+    answers = []
+    for question in survey_registry.get(survey_type).questions:
+        value: object
+        if question.type == "scale":
+            value = rng.randint(question.scale_min or 1, question.scale_max or 5)
+        elif question.type == "single_choice":
+            value = rng.choice(question.options)
+        elif question.type == "multi_choice":
+            value = rng.sample(question.options, rng.randint(1, len(question.options)))
+        else:
+            value = "Porcijos galėtų būti didesnės, bet skonis puikus."
+        answers.append(SurveyAnswer(question_id=question.id, value=value))  # type: ignore[arg-type]
+    return SurveySubmitRequest(answers=answers)
+
+
+def _validate_survey_answers(rng: random.Random, size: int) -> Callable[[], object]:
+    submissions = []
+    for index in range(size):
+        survey_type = "final" if index % 4 == 3 else "progress"
+        submissions.append((PlanProgressSurvey(survey_type=survey_type), _survey_answers(survey_type, rng)))
+    return lambda: [_validate_answers(survey, payload) for survey, payload in submissions]
+
+
+CASES = [
+    Case("attach_macro_totals", "plans", "meals", _attach_macro_totals),
+    Case("normalize_allergen_list", "allergens", "tokens", _normalize_allergen_list),
+    Case("deserialize_allergens", "allergens", "tokens", _deserialize_allergens),
+    Case("compute_discount.code", "discounts", "configured codes", _compute_discount_code),
+    Case("compute_discount.first_purchase", "discounts", "call", _compute_discount_first_purchase, fixed_size=1),
+    Case("_is_within_birthday_window", "discounts", "calls", _birthday_window),
+    Case("PricingService.serialize_options", "pricing", "entries", _serialize_options),
+    Case("ensure_full_week", "seed", "meals", _ensure_full_week),
+    Case("build_pricing_options", "pricing", "calls", _build_pricing_options),
+    Case("render_purchase_pdf", "receipts", "lines", _render_purchase_pdf),
+    Case("_validate_answers", "surveys", "submissions", _validate_survey_answers),
+]
+
+
+def measure(call: Callable[[], object], repeat: int) -> dict[str, float]:
+    """Per-call timings in microseconds over ``repeat`` calibrated runs."""
+    timer = timeit.Timer(call)
+    loops, _ = timer.autorange()
+    runs = [elapsed / loops * 1e6 for elapsed in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        "loops": loops,
+        "min_us": round(min(runs), 3),
+        "median_us": round(statistics.median(runs), 3),
+        "mean_us": round(statistics.mean(runs), 3),
+        "stdev_us": round(statistics.stdev(runs), 3) if len(runs) > 1 else 0.0,
+    }
+
+
+def run(cases: list[Case], sizes: list[int], repeat: int, seed: int) -> dict[str, dict[str, float | str]]:
+    results: dict[str, dict[str, float | str]] = {}
+    for case in cases:
+        for size in [case.fixed_size] if case.fixed_size is not None else sizes:
+            call = case.prepare(random.Random(seed), size)
+            # the first call pays for lazy imports, registry compilation and cold caches
+            call()
+            row: dict[str, float | str] = {"case": case.name, "size": size, "unit": case.unit}
+            row.update(measure(call, repeat))
+            results[f"{case.name}[{size}]"] = row
+            print(
+                f"{case.name:<34} {size:>6} {case.unit:<17} {row['median_us']:>12.2f} {row['min_us']:>12.2f} "
+                f"{row['stdev_us']:>10.2f}",
+                flush=True,
+            )
+    return results
+
+
+def compare_with_baseline(
+    results: dict[str, dict[str, float | str]], baseline: dict[str, dict[str, float | str]], tolerance: float
+) -> list[str]:
+    """Print the change of every case's fastest run against the baseline and return the regressions."""
+    regressions: list[str] = []
+    print(f"\n{'case':<44} {'baseline min us':>16} {'min us':>12} {'change':>8}")
+    for key, row in results.items():
+        before = baseline.get(key)
+        if not before or not before["min_us"]:
+            continue
+        # the fastest run is the least disturbed by other processes, so it is the one compared
+        change = float(row["min_us"]) / float(before["min_us"]) - 1
+        print(f"{key:<44} {before['min_us']:>16.2f} {row['min_us']:>12.2f} {change * 100:>+7.0f}%")
+        if change > tolerance:
+            regressions.append(f"{key}: {before['min_us']:.2f} -> {row['min_us']:.2f} us")
+    return regressions
+
+
+def _select_cases(only: list[str] | None) -> list[Case]:
+    if not only:
+        return list(CASES)
+    selected = [case for case in CASES if case.group in only or case.name in only]
+    if not selected:
+        groups = sorted({case.group for case in CASES})
+        raise SystemExit(f"[benchmarks] nothing matches {only}; choose case names or groups {groups}")
+    return selected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--only", nargs="+", metavar="CASE", help="Case names or groups (allergens, pricing, ...).")
+    parser.add_argument("--repeat", type=int, default=5, help="Calibrated runs per case; the fastest one is compared.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON.")
+    parser.add_argument("--baseline", type=Path, help="Compare against results saved earlier.")
+    parser.add_argument("--save-baseline", type=Path, help="Store these results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown, 0.2 = 20%%.")
+    args = parser.parse_args()
+    cases = _select_cases(args.only)
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        print(f"{'case':<34} {'size':>6} {'unit':<17} {'median us':>12} {'min us':>12} {'stdev us':>10}", flush=True)
+        results = run(cases, args.sizes, args.repeat, args.seed)
+    finally:
+        engine.dispose()
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    result = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {"sizes": args.sizes, "repeat": args.repeat, "seed": args.seed},
+        "cases": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+            print(f"[benchmarks] wrote {path}", flush=True)
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare_with_baseline(results, baseline["cases"], args.tolerance)
+        if regressions:
+            print("\n[benchmarks] regressions beyond tolerance:", flush=True)
+            for regression in regressions:
+                print(f"  {regression}", flush=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
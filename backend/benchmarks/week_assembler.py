@@ -0,0 +1,97 @@
+"""Solution quality vs. runtime of the week assembler on synthetic meal libraries.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.week_assembler --sizes 1000 10000 100000 --budgets 1 5 10 25 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+
+import numpy as np
+
+from app.services.meal_index import MACRO_SCALE, MEAL_TYPES, LibrarySnapshot, meal_type_code
+from app.services.week_assembler import assemble_week, build_target_vector
+
+# (calories, protein, carbs, fats) centre and spread per meal type
+MEAL_PROFILES = {
+    "breakfast": ((380, 22, 45, 13), (120, 10, 18, 6)),
+    "lunch": ((560, 38, 55, 18), (160, 14, 22, 8)),
+    "dinner": ((520, 36, 45, 19), (150, 13, 20, 8)),
+    "snack": ((200, 10, 20, 8), (80, 6, 10, 4)),
+}
+TARGETS = [
+    (1650, 120, 155, 55),
+    (2200, 150, 240, 70),
+    (2800, 190, 320, 85),
+]
+
+
+def synthetic_library(size: int, seed: int = 0) -> LibrarySnapshot:
+    rng = np.random.default_rng(seed)
+    meal_types = rng.integers(0, len(MEAL_TYPES), size=size).astype(np.int8)
+    macros = np.zeros((size, 4), dtype=np.float32)
+    for code, name in enumerate(MEAL_TYPES):
+        mask = meal_types == code
+        centre, spread = (np.array(values, dtype=np.float32) for values in MEAL_PROFILES[name])
+        macros[mask] = np.clip(rng.normal(centre, spread, size=(int(mask.sum()), 4)), 0, None)
+    return LibrarySnapshot(
+        meal_ids=np.arange(size, dtype=np.int64),
+        macros=np.ascontiguousarray(macros * MACRO_SCALE),
+        meal_types=meal_types,
+        title_codes=np.arange(size, dtype=np.int32),
+    )
+
+
+def run(sizes: list[int], budgets: list[float], slots: list[str]) -> list[dict[str, float]]:
+    slot_types = [meal_type_code(slot) for slot in slots]
+    results: list[dict[str, float]] = []
+    for size in sizes:
+        library = synthetic_library(size)
+        for budget in budgets:
+            errors: list[float] = []
+            elapsed: list[float] = []
+            passes: list[int] = []
+            for target in TARGETS:
+                assembly = assemble_week(library, slot_types, build_target_vector(*target), time_budget_ms=budget)
+                errors.append(assembly.relative_error)
+                elapsed.append(assembly.elapsed_ms)
+                passes.append(assembly.passes)
+            results.append(
+                {
+                    "library_size": size,
+                    "budget_ms": budget,
+                    "mean_relative_error": round(statistics.mean(errors), 5),
+                    "max_elapsed_ms": round(max(elapsed), 3),
+                    "mean_passes": round(statistics.mean(passes), 2),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0, 1, 5, 10, 25, 50])
+    parser.add_argument("--slots", nargs="+", default=["breakfast", "lunch", "dinner", "snack"])
+    parser.add_argument("--json", action="store_true", help="Print raw JSON instead of a table.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.budgets, args.slots)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'library':>9} {'budget ms':>10} {'rel. error':>11} {'elapsed ms':>11} {'passes':>7}")
+    for row in results:
+        print(
+            f"{row['library_size']:>9} {row['budget_ms']:>10} {row['mean_relative_error']:>11.4f} "
+            f"{row['max_elapsed_ms']:>11.2f} {row['mean_passes']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
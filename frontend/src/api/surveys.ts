@@ -16,6 +16,7 @@ export interface SurveyDetail {
   id: number;
   survey_type: 'progress' | 'final';
   status: 'scheduled' | 'completed' | 'cancelled';
+  definition_version: number;
   plan_name: string;
   day_offset: number;
   scheduled_at: string;
@@ -33,3 +33,15 @@ export const uploadAvatar = async (file: File): Promise<UserProfile> => {
 
   return data;
 };
+
+const AVATAR_POLL_INTERVAL_MS = 500;
+const AVATAR_POLL_ATTEMPTS = 20;
+
+export const waitForAvatarProcessing = async (): Promise<UserProfile> => {
+  let profile = await fetchCurrentUser();
+  for (let attempt = 0; attempt < AVATAR_POLL_ATTEMPTS && profile.avatar_status === 'processing'; attempt += 1) {
+    await new Promise((resolve) => setTimeout(resolve, AVATAR_POLL_INTERVAL_MS));
+    profile = await fetchCurrentUser();
+  }
+  return profile;
+};
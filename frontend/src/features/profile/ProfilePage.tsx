@@ -2,7 +2,7 @@ import { ChangeEvent, FormEvent, useCallback, useEffect, useMemo, useState } fro
 import { useNavigate } from 'react-router-dom';
 
 import { FormField } from '../../components/FormField';
-import { updateProfile, uploadAvatar } from '../../api/users';
+import { updateProfile, uploadAvatar, waitForAvatarProcessing } from '../../api/users';
 import { cancelPurchase, downloadPurchaseReceipt, fetchPurchases } from '../../api/purchases';
 import { useAuth } from '../auth/AuthContext';
 import type {
@@ -369,8 +369,13 @@ export const ProfilePage = () => {
     setStatusMessage(null);
     try {
       await uploadAvatar(file);
+      const profile = await waitForAvatarProcessing();
       await refreshProfile();
-      setStatusMessage('Profilio nuotrauka atnaujinta.');
+      if (profile.avatar_status === 'failed') {
+        setErrorMessage('Nepavyko apdoroti nuotraukos. Pabandykite kitą failą.');
+      } else {
+        setStatusMessage('Profilio nuotrauka atnaujinta.');
+      }
     } catch (err) {
       setErrorMessage('Nepavyko įkelti nuotraukos. Patikrinkite failo formatą.');
     } finally {
@@ -596,7 +601,18 @@ export const ProfilePage = () => {
 
           <section className="profile-card profile-card--avatar">
             <h2>Profilio nuotrauka</h2>
-            {user.avatar_url ? (
+            {user.avatar_variants ? (
+              <picture>
+                <source srcSet={user.avatar_variants.profile.webp} type="image/webp" />
+                <img
+                  src={user.avatar_variants.profile.jpeg}
+                  alt="Profilio nuotrauka"
+                  className="avatar-preview"
+                  width={96}
+                  height={96}
+                />
+              </picture>
+            ) : user.avatar_url ? (
               <img src={user.avatar_url} alt="Profilio nuotrauka" className="avatar-preview" width={96} height={96} />
             ) : (
               <div
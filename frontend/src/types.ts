@@ -26,6 +26,8 @@ export interface UserProfile {
   allergies: AllergenId[];
   birth_date?: string | null;
   avatar_url?: string;
+  avatar_variants?: Record<'thumbnail' | 'profile' | 'full', Record<'webp' | 'jpeg', string>> | null;
+  avatar_status?: 'processing' | 'ready' | 'failed' | null;
   current_plan_id?: number;
   created_at: string;
   updated_at: string;